@@ -0,0 +1,158 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.metrics import metrics
+
+
+def normalize_question(question: str) -> str:
+    text = re.sub(r"[^a-z0-9]+", " ", question.lower())
+    return " ".join(text.split())
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sql: Optional[str]
+    elapsed: float
+    created_at: float = field(default_factory=time.monotonic)
+    embedding: Optional[List[float]] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class AnswerCache:
+    """LRU + TTL cache of final answers keyed on the normalized question.
+
+    When ``embeddings`` is given, a miss on the exact key falls back to the most similar
+    cached question above ``similarity_threshold``. ``watermark_fn`` returns a value that
+    changes with the underlying data (e.g. max ``order_date``); the cache is cleared
+    whenever it moves.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 900,
+        embeddings: Optional[Any] = None,
+        similarity_threshold: float = 0.95,
+        watermark_fn: Optional[Callable[[], Any]] = None,
+        watermark_interval: float = 30,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.watermark_fn = watermark_fn
+        self.watermark_interval = watermark_interval
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._watermark: Any = None
+        self._watermark_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def get(self, question: str) -> Optional[CachedAnswer]:
+        self._check_watermark()
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is None and self.embeddings is not None and self._entries:
+            entry = self._similar(question)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                metrics.incr("answer_cache_misses")
+                return None
+            self.hits += 1
+            self.saved_seconds += entry.elapsed
+        metrics.incr("answer_cache_hits")
+        metrics.observe("answer_cache_saved_seconds", entry.elapsed)
+        return entry
+
+    def put(
+        self, question: str, answer: str, sql: Optional[str], elapsed: float, data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        embedding = None
+        if self.embeddings is not None:
+            try:
+                embedding = self.embeddings.embed_query(question)
+            except Exception:
+                embedding = None
+
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = CachedAnswer(question, answer, sql, elapsed, embedding=embedding, data=data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_saved_seconds": round(self.saved_seconds / self.hits, 4) if self.hits else 0.0,
+            }
+
+    def _lookup(self, key: str) -> Optional[CachedAnswer]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _similar(self, question: str) -> Optional[CachedAnswer]:
+        try:
+            vector = self.embeddings.embed_query(question)
+        except Exception:
+            return None
+
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for key, entry in self._entries.items():
+                if entry.embedding is None:
+                    continue
+                score = _cosine(vector, entry.embedding)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            return self._lookup(best_key) if best_key else None
+
+    def _check_watermark(self) -> None:
+        if self.watermark_fn is None:
+            return
+        now = time.monotonic()
+        if now - self._watermark_checked_at < self.watermark_interval:
+            return
+        self._watermark_checked_at = now
+        try:
+            watermark = self.watermark_fn()
+        except Exception:
+            return
+        if watermark != self._watermark:
+            if self._watermark is not None:
+                metrics.incr("answer_cache_invalidations")
+            self._watermark = watermark
+            self.clear()
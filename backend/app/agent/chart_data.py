@@ -0,0 +1,138 @@
+import re
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+# SQLite and some drivers hand dates back as ISO strings
+ISO_DATE = re.compile(r"^\d{4}-\d{2}(-\d{2})?([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+# Integer columns that are really positions in time (EXTRACT(MONTH ...), "year", ...)
+TIME_PART_NAMES = {"year", "quarter", "month", "week", "day", "dow", "hour", "period"}
+
+
+def column_type(values: Sequence[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return "string"
+    if all(isinstance(v, bool) for v in present):
+        return "boolean"
+    if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in present):
+        return "number"
+    if all(isinstance(v, (date, datetime)) for v in present):
+        return "time"
+    if all(isinstance(v, str) and ISO_DATE.match(v) for v in present):
+        return "time"
+    return "string"
+
+
+def _json_value(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == "number":
+        return float(value) if isinstance(value, Decimal) else value
+    if kind == "time" and isinstance(value, (date, datetime, dt_time)):
+        return value.isoformat()
+    if kind == "boolean":
+        return value
+    return str(value)
+
+
+def lttb_indices(x: List[float], y: List[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: the ``threshold`` points that best keep the series' shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    bucket = (n - 2) / (threshold - 2)
+    indices = [0]
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        next_start, next_end = end, min(int((i + 2) * bucket) + 1, n)
+        avg_x = sum(x[next_start:next_end]) / max(next_end - next_start, 1)
+        avg_y = sum(y[next_start:next_end]) / max(next_end - next_start, 1)
+        best, best_area = start, -1.0
+        for j in range(start, min(end, n)):
+            area = abs((x[previous] - avg_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (avg_y - y[previous]))
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        previous = best
+    indices.append(n - 1)
+    return indices
+
+
+def _time_position(value: Any, index: int) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return float(value.toordinal() * 86400)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return float(index)
+
+
+def to_columnar(
+    columns: List[str],
+    rows: Sequence[Sequence[Any]],
+    complete: bool = True,
+    max_points: int = 500,
+) -> Dict[str, Any]:
+    """Column names, a type per column and one JSON array per column.
+
+    Single time series longer than ``max_points`` are downsampled with LTTB on the first numeric
+    column (in time order); other results are cut to the first ``max_points`` rows.
+    ``row_count`` is the number of rows read; ``complete`` says whether that is the whole result.
+    """
+    values = [[row[i] for row in rows] for i in range(len(columns))]
+    types = [column_type(column) for column in values]
+    selected = range(len(rows))
+    sampled = False
+    if len(rows) > max_points:
+        sampled = True
+        time_col = next((i for i, t in enumerate(types) if t == "time"), None)
+        value_col = next((i for i, t in enumerate(types) if t == "number"), None)
+        if time_col is not None and value_col is not None and "string" not in types:
+            positions = [_time_position(v, i) for i, v in enumerate(values[time_col])]
+            order = sorted(range(len(rows)), key=positions.__getitem__)
+            xs = [positions[i] for i in order]
+            ys = [float(values[value_col][i] or 0) for i in order]
+            selected = [order[i] for i in lttb_indices(xs, ys, max_points)]
+        else:
+            selected = range(max_points)
+
+    return {
+        "columns": [{"name": name, "type": kind} for name, kind in zip(columns, types)],
+        "values": [[_json_value(column[i], kind) for i in selected] for column, kind in zip(values, types)],
+        "row_count": len(rows),
+        "complete": complete,
+        "sampled": sampled,
+    }
+
+
+def infer_chart(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Pick a chart from the column types: metric, line, bar, scatter or table."""
+    if not data or not data["columns"] or data["row_count"] == 0:
+        return None
+    columns = data["columns"]
+    names = [c["name"] for c in columns]
+    numbers = [c["name"] for c in columns if c["type"] == "number"]
+    times = [c["name"] for c in columns if c["type"] == "time"]
+    # Numeric time parts (year, month, ...) act as the x axis of a trend
+    time_parts = [n for n in numbers if n.lower() in TIME_PART_NAMES]
+    measures = [n for n in numbers if n not in time_parts]
+    labels = [c["name"] for c in columns if c["type"] in ("string", "boolean")]
+
+    if data["row_count"] == 1 and len(measures) == len(columns):
+        return {"type": "metric", "y": measures}
+    if (times or time_parts) and measures:
+        spec = {"type": "line", "x": (times or time_parts)[0], "y": measures}
+        if labels:
+            spec["series"] = labels[0]
+        return spec
+    if labels and measures:
+        return {"type": "bar", "x": labels[0], "y": measures}
+    if len(measures) >= 2:
+        return {"type": "scatter", "x": measures[0], "y": measures[1:2]}
+    return {"type": "table", "columns": names}
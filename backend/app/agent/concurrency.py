@@ -0,0 +1,133 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.utils.metrics import metrics
+
+
+class EngineOverloaded(Exception):
+    """Raised when the LLM queue is full or a question waited too long for a slot."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Flight:
+    shared: bool
+    result: Optional[Dict[str, Any]] = None
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one execution.
+
+    The first caller (the leader) runs the work and sets ``flight.result``; callers that
+    arrive while it runs wait and receive the same result. If the leader fails or is
+    cancelled, one waiting caller takes over as the new leader instead of failing too.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    @asynccontextmanager
+    async def flight(self, key: str) -> AsyncIterator[Flight]:
+        while key in self._flights:
+            # Shielded so a disconnecting follower doesn't cancel the leader's future
+            result = await asyncio.shield(self._flights[key])
+            if result is not None:
+                metrics.incr("singleflight_shared")
+                yield Flight(shared=True, result=result)
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        flight = Flight(shared=False)
+        try:
+            yield flight
+        finally:
+            del self._flights[key]
+            # None tells the followers to elect a new leader
+            future.set_result(flight.result)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent LLM-backed executions, queueing up to ``max_queue`` more.
+
+    Bursts wait for a slot instead of piling onto the LLM provider's rate limit; once the
+    queue is full (or a caller waits longer than ``queue_timeout``) EngineOverloaded is
+    raised so the API can answer 503 with a Retry-After hint.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 32, queue_timeout: float = 30):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Moving average of how long a slot is held, for the Retry-After estimate
+        self.avg_hold_seconds = 5.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.avg_hold_seconds * (self.waiting + 1) / self.max_concurrent))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # One semaphore per event loop; scripts and tests may run several loops in turn
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self.active = self.waiting = 0
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        semaphore = self._get_semaphore()
+        # Counted here rather than via semaphore.locked(): a burst arrives before any acquire has run
+        if self.active + self.waiting >= self.max_concurrent + self.max_queue:
+            metrics.incr("llm_queue_rejected")
+            raise EngineOverloaded("Too many questions in progress, please retry shortly.", self.retry_after())
+
+        self.waiting += 1
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("llm_queue_timeouts")
+            raise EngineOverloaded("Timed out waiting for a free slot, please retry shortly.", self.retry_after())
+        finally:
+            self.waiting -= 1
+        metrics.observe("llm_queue_wait_seconds", time.perf_counter() - start)
+
+        self.active += 1
+        self._update_gauges()
+        held = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.avg_hold_seconds = 0.9 * self.avg_hold_seconds + 0.1 * (time.perf_counter() - held)
+            self.active -= 1
+            semaphore.release()
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge("llm_active", self.active)
+        metrics.set_gauge("llm_queued", self.waiting)
+
+
+def create_limiter() -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(
+        max_concurrent=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+        queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+    )
@@ -0,0 +1,44 @@
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+if TYPE_CHECKING:
+    from app.agent.query_engine import QueryEngine
+
+# The shared engine is built on first use (or by the startup warm-up), not when the app is imported:
+# query_engine pulls in LangChain and QueryEngine() connects to and reflects the database.
+_engine: Optional["QueryEngine"] = None
+_lock = threading.Lock()
+# Called with the engine right after it is built, by whichever caller built it
+_listeners: List[Callable[["QueryEngine"], None]] = []
+
+
+def get_query_engine() -> "QueryEngine":
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                from app.agent.query_engine import QueryEngine
+                _engine = QueryEngine()
+                for listener in list(_listeners):
+                    listener(_engine)
+    return _engine
+
+
+def add_engine_listener(listener: Callable[["QueryEngine"], None]) -> None:
+    _listeners.append(listener)
+
+
+def remove_engine_listener(listener: Callable[["QueryEngine"], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def set_query_engine(engine: Optional["QueryEngine"]) -> None:
+    # Swap in a preconfigured engine, e.g. one with a scripted LLM for benchmarks
+    global _engine
+    with _lock:
+        _engine = engine
+
+
+def started_query_engine() -> Optional["QueryEngine"]:
+    return _engine
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Any, AsyncIterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+def react_action(tool: str, tool_input: str) -> str:
+    blob = json.dumps({"action": tool, "action_input": tool_input})
+    return f'Thought: I should use {tool}.\nAction:\n```\n{blob}\n```'
+
+
+COUNT_SQL = "SELECT COUNT(*) FROM orders"
+
+# A typical recorded trajectory: list tables, read the schema, check the query, run it, answer.
+# Rules are matched against the latest message, most specific first.
+REACT_SCRIPT = [
+    (r"Double check the", COUNT_SQL),
+    (r"^Question:.*\nSQL:", "There are {rows} orders in the database."),
+    (r"^Write one SQL query", COUNT_SQL),
+    (r"(?:Observation:.*){4}", "Thought: I now know the final answer\nFinal Answer: There are {rows} orders in the database."),
+    (r"(?:Observation:.*){3}", react_action("sql_db_query", COUNT_SQL)),
+    (r"(?:Observation:.*){2}", react_action("sql_db_query_checker", COUNT_SQL)),
+    (r"Observation:", react_action("sql_db_schema", "orders")),
+    (r".*", react_action("sql_db_list_tables", "")),
+]
+
+
+def prompt_key(messages: List[BaseMessage]) -> str:
+    # Recorded responses are keyed on the latest message, like the rules
+    return " ".join(str(messages[-1].content).split())
+
+
+def load_script(path: str) -> Tuple[Dict[str, str], List[Tuple[str, str]]]:
+    """Read a JSONL script: {"prompt", "response"} lines recorded by ResponseRecorder and/or
+    hand-written {"pattern", "response"} rules."""
+    recorded, rules = {}, []
+    for line in Path(path).read_text().splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if "prompt" in entry:
+            recorded[" ".join(entry["prompt"].split())] = entry["response"]
+        else:
+            rules.append((entry["pattern"], entry["response"]))
+    return recorded, rules
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model for offline benchmarks.
+
+    A recorded response for the exact latest message wins; otherwise the first rule whose
+    pattern matches it does, so a ReAct trajectory replays correctly even when many
+    conversations run concurrently.
+    """
+
+    rules: List[Tuple[str, str]] = REACT_SCRIPT
+    recorded: Dict[str, str] = {}
+    latency: float = 0.0
+    calls: int = 0
+    # Prompts that neither a recording nor a rule covered
+    unmatched: int = 0
+
+    @classmethod
+    def from_script(cls, path: Optional[str] = None, latency: float = 0.0) -> "ScriptedChatModel":
+        if not path:
+            return cls(latency=latency)
+        recorded, rules = load_script(path)
+        # Hand-written rules go first; the default trajectory still covers anything unscripted
+        return cls(recorded=recorded, rules=rules + REACT_SCRIPT, latency=latency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        self.calls += 1
+        last = str(messages[-1].content)
+        content = self.recorded.get(prompt_key(messages))
+        if content is None:
+            content = next((response for pattern, response in self.rules if re.search(pattern, last, re.DOTALL)), None)
+        if content is None:
+            self.unmatched += 1
+            content = "Final Answer: No data available."
+        rows = re.findall(r"(?:Observation|Result): \[\((\d+),\)\]", last)
+        content = content.replace("{rows}", rows[-1] if rows else "0")
+        # {result} is the latest observation verbatim, for scripts that answer with whatever the query returned
+        results = re.findall(r"(?:Observation|Result): (.*)", last)
+        content = content.replace("{result}", results[-1].strip() if results else "")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # Spread the configured latency over word-sized chunks, like a real token stream
+        content = self._respond(messages).generations[0].message.content
+        words = re.findall(r"\S+\s*", content)
+        for word in words:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+
+class ResponseRecorder(BaseCallbackHandler):
+    """Appends every chat model response to a JSONL file that ScriptedChatModel can replay."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._prompts: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._prompts[run_id] = prompt_key(messages[0])
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt = self._prompts.pop(run_id, None)
+        if prompt is None or not response.generations:
+            return
+        line = json.dumps({"prompt": prompt, "response": response.generations[0][0].text})
+        with self._lock:
+            with self.path.open("a") as f:
+                f.write(line + "\n")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._prompts.pop(run_id, None)
@@ -0,0 +1,211 @@
+"""Offline index advisor over the agent query log.
+
+Groups logged queries by fingerprint, finds tables they scan sequentially (or through an
+index narrower than their filters) and proposes composite indexes from the columns those
+queries filter and join on (equality columns first, then one range column), skipping
+anything an existing index already covers.
+Run from backend/:  python -m app.agent.index_advisor --log logs/agent_queries.jsonl
+"""
+import argparse
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.agent.query_log import read_query_log
+from app.agent.sql_validation import FROM_FUNCTIONS, STRING_LITERAL
+
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+TABLE_ALIAS = re.compile(r"\b(?:from|join)\s+([a-z_]\w*)(?:\s+(?:as\s+)?([a-z_]\w*))?")
+# column <op> ...  and  ... <op> column, with an optional alias qualifier
+PREDICATE_LEFT = re.compile(r"(?:\b([a-z_]\w*)\.)?\b([a-z_]\w*)\s*(<=|>=|<>|!=|=|<|>|\bin\b|\bbetween\b|\bis\b)")
+PREDICATE_RIGHT = re.compile(r"(<=|>=|=|<|>)\s*(?:([a-z_]\w*)\.)?([a-z_]\w*)\b")
+EQUALITY_OPS = {"=", "in", "is"}
+RANGE_OPS = {"<", ">", "<=", ">=", "between"}
+NOT_ALIASES = {
+    "where", "join", "on", "left", "right", "inner", "outer", "full", "cross", "group", "order",
+    "limit", "union", "having", "using", "natural", "lateral", "offset", "window",
+}
+MAX_INDEX_COLUMNS = 3
+
+
+def fingerprint(sql: str) -> str:
+    text = NUMBER_LITERAL.sub("?", STRING_LITERAL.sub("?", sql.lower()))
+    return " ".join(text.split())
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    aliases = {}
+    for table, alias in TABLE_ALIAS.findall(sql):
+        aliases[table] = table
+        if alias and alias not in NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+def predicate_columns(sql: str, columns: Dict[str, Set[str]]) -> Dict[str, Dict[str, str]]:
+    """Map table -> {column: "eq" | "range"} for columns used in filters and join conditions."""
+    lowered = FROM_FUNCTIONS.sub("()", STRING_LITERAL.sub("''", sql.lower()))
+    aliases = table_aliases(lowered)
+    in_query = set(aliases.values())
+    found: Dict[str, Dict[str, str]] = defaultdict(dict)
+
+    def add(qualifier: Optional[str], column: str, op: str) -> None:
+        if qualifier:
+            table = aliases.get(qualifier)
+        else:
+            owners = [t for t in in_query if column in columns.get(t, ())]
+            table = owners[0] if len(owners) == 1 else None
+        if table is None or column not in columns.get(table, ()):
+            return
+        kind = "eq" if op in EQUALITY_OPS else "range" if op in RANGE_OPS else None
+        # Equality wins when a column is used both ways
+        if kind and found[table].get(column) != "eq":
+            found[table][column] = kind
+
+    for qualifier, column, op in PREDICATE_LEFT.findall(lowered):
+        add(qualifier, column, op)
+    for op, qualifier, column in PREDICATE_RIGHT.findall(lowered):
+        add(qualifier, column, op)
+    return found
+
+
+@dataclass
+class QueryStats:
+    sql: str
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    seq_scans: Set[str] = field(default_factory=set)
+    index_scans: Set[str] = field(default_factory=set)
+    plan_rows: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class IndexProposal:
+    table: str
+    columns: Tuple[str, ...]
+    queries: List[QueryStats] = field(default_factory=list)
+
+    @property
+    def calls(self) -> int:
+        return sum(q.calls for q in self.queries)
+
+    @property
+    def benefit_seconds(self) -> float:
+        # Upper bound: the time logged for the queries this index would serve
+        return sum(q.total_seconds for q in self.queries)
+
+    def ddl(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS ix_{self.table}_{'_'.join(self.columns)} ON {self.table} ({', '.join(self.columns)});"
+
+
+def aggregate(entries: Iterable[dict]) -> Dict[str, QueryStats]:
+    stats: Dict[str, QueryStats] = {}
+    for entry in entries:
+        # Replica timings say nothing about the primary's indexes
+        if entry.get("replica"):
+            continue
+        key = fingerprint(entry["sql"])
+        query = stats.setdefault(key, QueryStats(sql=entry["sql"]))
+        query.calls += 1
+        query.total_seconds += entry.get("seconds") or 0.0
+        if entry.get("error"):
+            query.errors += 1
+        aliases = table_aliases(entry["sql"].lower())
+        for node in entry.get("plan") or []:
+            if not node.get("relation"):
+                continue
+            table = aliases.get(node["relation"].lower(), node["relation"].lower())
+            if node.get("node") != "Seq Scan":
+                query.index_scans.add(table)
+            else:
+                query.seq_scans.add(table)
+                if node.get("rows"):
+                    query.plan_rows[table] = max(query.plan_rows.get(table, 0), node["rows"])
+    return stats
+
+
+def existing_indexes(engine: Engine) -> Dict[str, List[Tuple[str, ...]]]:
+    inspector = inspect(engine)
+    indexes: Dict[str, List[Tuple[str, ...]]] = {}
+    for table in inspector.get_table_names():
+        found = [tuple(ix["column_names"]) for ix in inspector.get_indexes(table)]
+        found += [tuple(uc["column_names"]) for uc in inspector.get_unique_constraints(table)]
+        pk = inspector.get_pk_constraint(table).get("constrained_columns")
+        if pk:
+            found.append(tuple(pk))
+        indexes[table] = found
+    return indexes
+
+
+def is_covered(columns: Tuple[str, ...], indexes: List[Tuple[str, ...]]) -> bool:
+    return any(index[:len(columns)] == columns for index in indexes)
+
+
+def propose_indexes(
+    stats: Dict[str, QueryStats],
+    columns: Dict[str, Set[str]],
+    indexes: Dict[str, List[Tuple[str, ...]]],
+    min_calls: int = 1,
+) -> List[IndexProposal]:
+    proposals: Dict[Tuple[str, Tuple[str, ...]], IndexProposal] = {}
+    for query in stats.values():
+        if query.calls < min_calls:
+            continue
+        used = predicate_columns(query.sql, columns)
+        for table in query.seq_scans | query.index_scans:
+            predicates = used.get(table, {})
+            equality = sorted(c for c, kind in predicates.items() if kind == "eq")
+            ranges = sorted(c for c, kind in predicates.items() if kind == "range")
+            candidate = tuple((equality + ranges[:1])[:MAX_INDEX_COLUMNS])
+            # An index scan already happens; only a wider composite could still help it
+            min_columns = 1 if table in query.seq_scans else 2
+            if len(candidate) < min_columns or is_covered(candidate, indexes.get(table, [])):
+                continue
+            proposal = proposals.setdefault((table, candidate), IndexProposal(table, candidate))
+            proposal.queries.append(query)
+    return sorted(proposals.values(), key=lambda p: p.benefit_seconds, reverse=True)
+
+
+def table_columns(engine: Engine) -> Dict[str, Set[str]]:
+    inspector = inspect(engine)
+    return {t: {c["name"] for c in inspector.get_columns(t)} for t in inspector.get_table_names()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=os.getenv("AGENT_QUERY_LOG", "logs/agent_queries.jsonl"))
+    parser.add_argument("--min-calls", type=int, default=1, help="Ignore query shapes seen fewer times")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    from app.utils.database import engine
+
+    stats = aggregate(read_query_log(args.log))
+    hot = sorted(stats.values(), key=lambda q: q.total_seconds, reverse=True)[:args.top]
+    print(f"🔥 Top {len(hot)} of {len(stats)} query shapes by total time")
+    print(f"{'calls':>6} {'total (s)':>10} {'mean (ms)':>10}  seq scans / query")
+    for query in hot:
+        scans = ", ".join(sorted(query.seq_scans)) or "-"
+        print(f"{query.calls:>6} {query.total_seconds:>10.2f} {query.total_seconds / query.calls * 1000:>10.1f}  "
+              f"[{scans}] {' '.join(query.sql.split())[:100]}")
+
+    proposals = propose_indexes(stats, table_columns(engine), existing_indexes(engine), args.min_calls)
+    if not proposals:
+        print("\n✅ No missing indexes found for the logged workload.")
+        return
+    print("\n💡 Proposed indexes (benefit = logged time of the queries they would serve)")
+    for proposal in proposals[:args.top]:
+        rows = max((q.plan_rows.get(proposal.table, 0) for q in proposal.queries), default=0)
+        estimate = f", ~{rows:,.0f} rows scanned" if rows else ""
+        print(f"   {proposal.benefit_seconds:>8.2f}s over {proposal.calls} calls{estimate}")
+        print(f"   {proposal.ddl()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+from typing import Callable, Dict, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+LLMFactory = Callable[[], BaseChatModel]
+
+# Provider name -> factory; selected with LLM_PROVIDER
+LLM_PROVIDERS: Dict[str, LLMFactory] = {}
+
+
+def register_llm_provider(name: str) -> Callable[[LLMFactory], LLMFactory]:
+    def decorator(factory: LLMFactory) -> LLMFactory:
+        LLM_PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+
+@register_llm_provider("openai")
+def openai_llm() -> BaseChatModel:
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        temperature=float(os.getenv("LLM_TEMPERATURE", "0")),
+        model=os.getenv("LLM_MODEL", "gpt-4o"),
+    )
+
+
+@register_llm_provider("scripted")
+def scripted_llm() -> BaseChatModel:
+    # Offline: replays FAKE_LLM_SCRIPT (or the built-in trajectory) after FAKE_LLM_LATENCY seconds per call
+    from app.agent.fake_llm import ScriptedChatModel
+    return ScriptedChatModel.from_script(
+        os.getenv("FAKE_LLM_SCRIPT") or None,
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+    )
+
+
+def create_llm(provider: Optional[str] = None) -> BaseChatModel:
+    name = provider or os.getenv("LLM_PROVIDER", "openai")
+    if name not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name} (available: {', '.join(sorted(LLM_PROVIDERS))})")
+    llm = LLM_PROVIDERS[name]()
+
+    record_path = os.getenv("LLM_RECORD_PATH")
+    if record_path:
+        # Capture real responses so the scripted provider can replay them later
+        from app.agent.fake_llm import ResponseRecorder
+        llm.callbacks = list(llm.callbacks or []) + [ResponseRecorder(record_path)]
+    return llm
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_community.utilities.sql_database import SQLDatabase
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Engine
+
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+# Changes whenever a column is added, dropped or retyped in the current schema
+POSTGRES_SCHEMA_VERSION_SQL = """
+SELECT md5(string_agg(table_name || '.' || column_name || ':' || data_type, ',' ORDER BY table_name, column_name))
+FROM information_schema.columns
+WHERE table_schema = current_schema()
+"""
+
+
+def schema_version(engine: Engine) -> Any:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            return conn.execute(sql_text(POSTGRES_SCHEMA_VERSION_SQL)).scalar()
+        if engine.dialect.name == "sqlite":
+            return conn.execute(sql_text("PRAGMA schema_version")).scalar()
+    # Unknown dialects only pick up schema changes on an explicit refresh
+    return None
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """SQLDatabase that builds each table's DDL and sample rows once and serves them from memory.
+
+    ``sql_db_schema`` asks for table info in almost every conversation; without this each call
+    runs a sample-row query per table. The cache lives as long as the instance does;
+    MetadataCache replaces the instance when the schema changes.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._table_info: Dict[str, str] = {}
+        self._table_info_lock = threading.Lock()
+
+    def get_table_info(self, table_names: Optional[List[str]] = None, get_col_comments: bool = False) -> str:
+        if get_col_comments:
+            return super().get_table_info(table_names, get_col_comments=True)
+
+        usable = self.get_usable_table_names()
+        if table_names is not None:
+            missing = set(table_names).difference(usable)
+            if missing:
+                raise ValueError(f"table_names {missing} not found in database")
+        names = list(dict.fromkeys(table_names)) if table_names is not None else list(usable)
+
+        infos = []
+        for name in names:
+            info = self._table_info.get(name)
+            if info is None:
+                metrics.incr("table_info_cache_misses")
+                info = super().get_table_info([name])
+                with self._table_info_lock:
+                    self._table_info[name] = info
+            else:
+                metrics.incr("table_info_cache_hits")
+            infos.append(info)
+        # Same layout as SQLDatabase: one block per table, sorted
+        return "\n\n".join(sorted(infos))
+
+    def prime(self) -> None:
+        # Read every table's info up front, e.g. during startup warm-up
+        self.get_table_info()
+
+
+class MetadataCache:
+    """Holds the current CachedSQLDatabase and rebuilds it on refresh or schema change.
+
+    The schema version is checked at most every ``check_interval`` seconds, so a request
+    costs at most one cheap catalog query per interval instead of one per table it inspects.
+    ``generation`` increments on every rebuild so dependents (the agent's tools) know to rebind.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        factory: Callable[[], SQLDatabase],
+        db: Optional[SQLDatabase] = None,
+        check_interval: float = 300,
+    ):
+        self.engine = engine
+        self.factory = factory
+        self.check_interval = check_interval
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._db = db or factory()
+        self._version = self._read_version()
+        self._checked_at = time.monotonic()
+
+    def get(self) -> SQLDatabase:
+        if self.check_interval > 0 and time.monotonic() - self._checked_at >= self.check_interval:
+            self._check_version()
+        return self._db
+
+    def refresh(self) -> SQLDatabase:
+        with self._lock:
+            self._db = self.factory()
+            self._version = self._read_version()
+            self._checked_at = time.monotonic()
+            self.generation += 1
+        metrics.incr("metadata_cache_refreshes")
+        return self._db
+
+    def _check_version(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.monotonic()
+        version = self._read_version()
+        if version != self._version:
+            logger.info("[METADATA] 🔄 Database schema changed; reloading table metadata")
+            self.refresh()
+
+    def _read_version(self) -> Any:
+        try:
+            return schema_version(self.engine)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read schema version: {e}")
+            return self._version if hasattr(self, "_version") else None
+
+
+def create_metadata_cache(engine: Engine, factory: Callable[[], SQLDatabase], db: Optional[SQLDatabase] = None) -> MetadataCache:
+    return MetadataCache(
+        engine,
+        factory,
+        db=db,
+        check_interval=float(os.getenv("SCHEMA_VERSION_CHECK_SECONDS", "300")),
+    )
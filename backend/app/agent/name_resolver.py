@@ -0,0 +1,116 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, text as sql_text
+from sqlalchemy.engine import Engine
+
+from app.utils.metrics import metrics
+
+UUID_PATTERN = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE
+)
+
+# Display-name lookups, tried in order for IDs the previous tables didn't know
+NAME_QUERIES = {
+    "users": "SELECT id, name FROM users WHERE id IN :ids",
+    "products": "SELECT id, name FROM products WHERE id IN :ids",
+    "categories": "SELECT id, name FROM categories WHERE id IN :ids",
+    "campaigns": "SELECT id, name FROM campaigns WHERE id IN :ids",
+    "groups": (
+        "SELECT g.id, u.name || '''s group' FROM groups g "
+        "JOIN users u ON u.id = g.created_by WHERE g.id IN :ids"
+    ),
+}
+
+
+class NameResolver:
+    """Replaces UUIDs in answers with display names, backed by an LRU cache.
+
+    Misses are fetched with one parameterized bulk query per table, so most answers resolve
+    without a database round-trip. Names are kept for ``ttl_seconds`` so renames show up; IDs
+    no table knows are cached as unknown for only ``miss_ttl_seconds``, since the row may simply
+    not exist yet.
+    """
+
+    def __init__(
+        self, engine: Engine, max_entries: int = 10000, ttl_seconds: float = 3600, miss_ttl_seconds: float = 60
+    ):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.miss_ttl_seconds = miss_ttl_seconds
+        # id -> (name or None if unknown, expiry on the monotonic clock)
+        self._names: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._queries = {
+            table: sql_text(query).bindparams(bindparam("ids", expanding=True))
+            for table, query in NAME_QUERIES.items()
+        }
+
+    def resolve(self, text: str) -> str:
+        ids = {match.lower() for match in UUID_PATTERN.findall(text)}
+        if not ids:
+            return text
+
+        names = self.lookup(ids)
+        return UUID_PATTERN.sub(lambda m: names.get(m.group(0).lower()) or m.group(0), text)
+
+    def lookup(self, ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        names: Dict[str, Optional[str]] = {}
+        missing = set()
+        now = time.monotonic()
+        with self._lock:
+            for id_ in ids:
+                entry = self._names.get(id_)
+                if entry is not None and entry[1] > now:
+                    self._names.move_to_end(id_)
+                    names[id_] = entry[0]
+                else:
+                    missing.add(id_)
+        metrics.incr("name_resolver_hits", len(names))
+        metrics.incr("name_resolver_misses", len(missing))
+
+        if missing:
+            fetched = self._fetch(missing)
+            names.update(fetched)
+            self._store(fetched)
+        return names
+
+    def _fetch(self, ids: set) -> Dict[str, Optional[str]]:
+        found: Dict[str, Optional[str]] = {}
+        remaining = sorted(ids)
+        try:
+            with self.engine.connect() as conn:
+                for query in self._queries.values():
+                    if not remaining:
+                        break
+                    for row in conn.execute(query, {"ids": remaining}):
+                        found[str(row[0]).lower()] = row[1]
+                    remaining = [id_ for id_ in remaining if id_ not in found]
+        except Exception:
+            # Leave unresolved IDs uncached so a transient failure isn't remembered
+            return found
+
+        found.update({id_: None for id_ in remaining})
+        return found
+
+    def _store(self, names: Dict[str, Optional[str]]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for id_, name in names.items():
+                self._names[id_] = (name, now + (self.ttl_seconds if name is not None else self.miss_ttl_seconds))
+                self._names.move_to_end(id_)
+            while len(self._names) > self.max_entries:
+                self._names.popitem(last=False)
+
+
+def create_name_resolver(engine: Engine) -> NameResolver:
+    return NameResolver(
+        engine,
+        ttl_seconds=float(os.getenv("NAME_CACHE_TTL", "3600")),
+        miss_ttl_seconds=float(os.getenv("NAME_CACHE_MISS_TTL", "60")),
+    )
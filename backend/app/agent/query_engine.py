@@ -1,30 +1,117 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
 from pathlib import Path
+import os
 import re
-
-from langchain.memory import ConversationBufferMemory
-from langchain.agents import initialize_agent, AgentType
+import asyncio
+import threading
+import time
+import uuid
+
+from langchain.agents import AgentExecutor
+from langchain.agents.chat.base import ChatAgent
+from langchain.chains import LLMChain
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_community.utilities.sql_database import SQLDatabase
 from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
-from sqlalchemy import text as sql_text
-
-from app.utils.database import engine
+from sqlalchemy import inspect, text as sql_text
+
+from app.agent.answer_cache import AnswerCache, CachedAnswer, normalize_question
+from app.agent.chart_data import infer_chart, to_columnar
+from app.agent.concurrency import ConcurrencyLimiter, EngineOverloaded, SingleFlight, create_limiter
+from app.agent.llm_providers import create_llm
+from app.agent.metadata_cache import CachedSQLDatabase, MetadataCache, create_metadata_cache
+from app.agent.name_resolver import create_name_resolver
+from app.agent.replica import AnalyticsReplica, create_analytics_replica
+from app.agent.rollups import ROLLUP_STATE_TABLE, RollupManager, create_rollup_manager
+from app.agent.schema_context import SchemaContextBuilder
+from app.agent.sql_executor import (
+    RESULT_HANDLE_PATTERN, BoundedQuerySQLDatabaseTool, QueryExecutor, QueryResult, capture_results,
+    create_query_executor
+)
+from app.agent.session_store import SESSION_TABLE, SessionStore, create_session_store
+from app.agent.sql_validation import clean_sql, validate_sql
+from app.agent.streaming import FinalAnswerFilter
+from app.agent.turn_memory import CompactTurnMemory, result_summary
+from app.utils.database import get_agent_engine, get_engine
+from app.utils.logger import IS_PRODUCTION, logger, request_id_var
+from app.utils.metrics import TOKEN_BUCKETS, metrics
+from app.utils.tokens import count_tokens
+from app.utils.tracing import current_trace, start_trace, trace_config, trace_span
+
+# Settings of the one AgentExecutor every session shares; history is passed in with each question
+AGENT_EXECUTOR_KWARGS = {
+    "handle_parsing_errors": True,
+    # Step-by-step agent output on stdout; traces cover the same ground in production
+    "verbose": os.getenv("AGENT_VERBOSE", "false" if IS_PRODUCTION else "true").lower() == "true",
+    "max_iterations": 20,
+    "early_stopping_method": "generate",
+    "return_intermediate_steps": True,
+}
+
+# Questions of one batch answered at once (capped by the LLM limiter) and retries when its queue is full
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_OVERLOAD_RETRIES = int(os.getenv("BATCH_OVERLOAD_RETRIES", "3"))
+
+# "agent" runs the full ReAct loop; "direct" generates one query and only falls back to the agent
+ENGINE_MODES = ("agent", "direct")
 
 
 def load_schema_text() -> str:
-    schema_path = Path(__file__).resolve().parents[2] / "backend/database/schema.sql"
+    schema_path = Path(__file__).resolve().parents[2] / "database/schema.sql"
     try:
         return schema_path.read_text()
     except Exception:
         return "-- Schema could not be loaded."
 
 
-def get_prompt_with_schema(schema: str):
-    return ChatPromptTemplate.from_messages([
-        SystemMessage(content=f"""
+# Bookkeeping tables the app may create next to the marketplace data; hidden from the agent
+INTERNAL_TABLES = {SESSION_TABLE, ROLLUP_STATE_TABLE}
+
+
+def create_sql_database() -> SQLDatabase:
+    engine = get_engine()
+    internal = INTERNAL_TABLES & set(inspect(engine).get_table_names())
+    return CachedSQLDatabase(engine, ignore_tables=sorted(internal) or None)
+
+
+def latest_order_date():
+    with get_engine().connect() as conn:
+        return conn.execute(sql_text("SELECT MAX(order_date) FROM orders")).scalar()
+
+
+def create_answer_cache() -> AnswerCache:
+    threshold = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))
+    embeddings = None
+    if threshold > 0:
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings()
+
+    return AnswerCache(
+        max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "900")),
+        embeddings=embeddings,
+        similarity_threshold=threshold or 0.95,
+        watermark_fn=latest_order_date,
+    )
+
+
+def create_schema_context_builder(schema: str) -> SchemaContextBuilder:
+    embeddings = None
+    if os.getenv("SCHEMA_CONTEXT_EMBEDDINGS", "false").lower() == "true":
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings()
+
+    return SchemaContextBuilder(
+        schema,
+        token_budget=int(os.getenv("SCHEMA_TOKEN_BUDGET", "1200")),
+        embeddings=embeddings,
+    )
+
+
+def get_system_prompt(schema: str) -> str:
+    return f"""
 You are ChipChip’s AI-powered SQL data analyst.
 
 🔒 You can ONLY answer questions that can be answered using the connected SQL database and the schema below.
@@ -40,7 +127,7 @@ You are ChipChip’s AI-powered SQL data analyst.
 
 ⚠️ DO NOT use markdown formatting (``` or ```sql) in SQL queries. Only output raw SQL.
 
-🔍 Use this schema to construct SQL:
+🔍 Use this schema to construct SQL (only the tables relevant to the question are listed):
 {schema}
 
 🔹 Business Rules:
@@ -51,65 +138,518 @@ You are ChipChip’s AI-powered SQL data analyst.
 - Use `EXTRACT(DOW FROM order_date)` for weekday filters
 
 🎯 Always return actual data or say “No data available.”
-        """),
+        """
+
+
+def get_agent_prompt(tools: List[Any]) -> ChatPromptTemplate:
+    # The schema is filled in per question; ChatAgent adds the tool list and ReAct format instructions
+    base = ChatAgent.create_prompt(tools, system_message_prefix=get_system_prompt("{schema_context}"))
+    system, human = base.messages
+    return ChatPromptTemplate.from_messages([
+        system,
         MessagesPlaceholder(variable_name="chat_history"),
-        ("human", "{input}"),
-        MessagesPlaceholder(variable_name="agent_scratchpad")
+        human
     ])
 
 
+def get_direct_sql_messages(schema: str, question: str, history: List[BaseMessage]) -> List[BaseMessage]:
+    instructions = """
+🛠️ Reply with exactly one read-only SQL query (SELECT or WITH) that answers the latest question.
+No explanation, no markdown, nothing but the SQL.
+"""
+    return [
+        SystemMessage(content=get_system_prompt(schema) + instructions),
+        *history,
+        HumanMessage(content=f"Write one SQL query that answers: {question}")
+    ]
+
+
+def get_direct_answer_messages(
+    question: str,
+    sql: str,
+    result: str,
+    history: List[BaseMessage]
+) -> List[BaseMessage]:
+    system = """
+You are ChipChip’s AI-powered SQL data analyst.
+Answer the user's question in plain language using only the SQL result provided.
+Prefer readable names over IDs. If the result is empty, say “No data available.”
+"""
+    return [
+        SystemMessage(content=system),
+        *history,
+        HumanMessage(content=f"Question: {question}\nSQL: {sql}\nResult: {result}\n\nAnswer the question using only this result.")
+    ]
+
+
 class QueryEngine:
     def __init__(
         self,
         db: Optional[SQLDatabase] = None,
-        llm: Optional[ChatOpenAI] = None
+        llm: Optional[BaseChatModel] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        session_store: Optional[SessionStore] = None,
+        mode: Optional[str] = None,
+        executor: Optional[QueryExecutor] = None,
+        rollups: Optional[RollupManager] = None,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        replica: Optional[AnalyticsReplica] = None
     ):
-        self.db = db or SQLDatabase(engine)
-        self.llm = llm or ChatOpenAI(temperature=0, model="gpt-4o")
-        self.memory_sessions: Dict[str, ConversationBufferMemory] = {}
-
-    def get_or_create_memory(self, session_id: str) -> ConversationBufferMemory:
-        if session_id not in self.memory_sessions:
-            self.memory_sessions[session_id] = ConversationBufferMemory(
-                memory_key="chat_history",
-                return_messages=True
+        self.mode = mode or os.getenv("QUERY_ENGINE_MODE", "agent")
+        if self.mode not in ENGINE_MODES:
+            raise ValueError(f"Unknown query engine mode: {self.mode}")
+        # Rollup tables must exist before the database is reflected so the agent can see them
+        engine = get_engine()
+        self.rollups = rollups or create_rollup_manager(engine)
+        self.schema_text = load_schema_text() + (self.rollups.schema_text() if self.rollups else "")
+        self.schema_context = create_schema_context_builder(self.schema_text)
+        # Reflected tables and sample rows are read once and reused until the schema changes
+        self.metadata: MetadataCache = create_metadata_cache(engine, create_sql_database, db=db)
+        self.llm = llm or create_llm()
+        self.answer_cache = answer_cache or create_answer_cache()
+        # An empty in-memory store is falsy (it has __len__), so test for None explicitly
+        self.session_store = session_store if session_store is not None else create_session_store(engine)
+        self.name_resolver = create_name_resolver(engine)
+        # Scan-heavy agent SQL can go to an embedded DuckDB copy instead of competing with OLTP traffic
+        self.replica = replica or create_analytics_replica(engine, load_schema_text())
+        # Agent SQL runs on agent_engine so it gets the statement timeout
+        self.executor = executor or create_query_executor(get_agent_engine(), replica=self.replica)
+        if self.rollups and self.executor.result_cache:
+            self.rollups.on_refresh = self.executor.result_cache.invalidate
+        # Identical questions in flight share one run; all runs share a bounded pool of LLM slots
+        self.single_flight = SingleFlight()
+        self.limiter = limiter or create_limiter()
+        self._agent: Optional[AgentExecutor] = None
+        self._agent_generation = -1
+        self._agent_lock = threading.Lock()
+        self.agent_build_seconds = 0.0
+        self.chart_max_points = int(os.getenv("CHART_MAX_POINTS", "500"))
+
+    @property
+    def db(self) -> SQLDatabase:
+        return self.metadata.get()
+
+    def refresh_metadata(self) -> None:
+        # Re-reflect the database, e.g. after a migration; the agent is rebuilt on next use
+        self.metadata.refresh()
+
+    def get_or_create_memory(self, session_id: str) -> CompactTurnMemory:
+        return self.session_store.get_memory(session_id)
+
+    def build_agent(self) -> AgentExecutor:
+        # Toolkit, schema prompt and agent are built once per metadata generation and shared by all sessions
+        db = self.db
+        if self._agent is None or self._agent_generation != self.metadata.generation:
+            with self._agent_lock:
+                if self._agent is None or self._agent_generation != self.metadata.generation:
+                    start = time.perf_counter()
+                    generation = self.metadata.generation
+                    toolkit = SQLDatabaseToolkit(db=db, llm=self.llm)
+                    tools = [
+                        BoundedQuerySQLDatabaseTool(db=db, executor=self.executor)
+                        if tool.name == "sql_db_query" else tool
+                        for tool in toolkit.get_tools()
+                    ]
+
+                    agent = ChatAgent(
+                        llm_chain=LLMChain(llm=self.llm, prompt=get_agent_prompt(tools)),
+                        allowed_tools=[tool.name for tool in tools],
+                        output_parser=ChatAgent._get_default_output_parser()
+                    )
+                    self._agent = AgentExecutor.from_agent_and_tools(agent=agent, tools=tools, **AGENT_EXECUTOR_KWARGS)
+                    self._agent_generation = generation
+                    self.agent_build_seconds = time.perf_counter() - start
+                    metrics.observe("agent_build_seconds", self.agent_build_seconds)
+        return self._agent
+
+    def warm(self) -> None:
+        self.build_agent()
+        if isinstance(self.db, CachedSQLDatabase):
+            self.db.prime()
+
+    def ping(self) -> None:
+        with get_engine().connect() as conn:
+            conn.execute(sql_text("SELECT 1"))
+
+    def run_query(self, question: str, session_id: str) -> Dict[str, Any]:
+        with start_trace(session_id) as trace, capture_results() as executed:
+            try:
+                cacheable, cached = self._lookup(question, session_id)
+                trace.attrs.update(mode=self.mode, cached=cached is not None)
+                if cached is not None:
+                    return self._build_response(cached.answer, session_id, sql=cached.sql, cached=True, data=cached.data)
+
+                start = time.perf_counter()
+                history = self._history(session_id)
+                result = self._run_direct(question, history) if self.mode == "direct" else None
+                if result is None:
+                    result = self._run_agent(question, history)
+
+                with trace_span("post_process", "post_process_output"):
+                    final_answer = self._post_process_output(result["output"])
+                    data = self._result_data(executed)
+                self._remember_turn(question, session_id, final_answer, result["sql"], data)
+                if cacheable:
+                    self.answer_cache.put(question, final_answer, result["sql"], time.perf_counter() - start, data=data)
+                return self._build_response(
+                    final_answer, session_id, sql=result["sql"], result_handle=result["result_handle"], data=data
+                )
+
+            except Exception as e:
+                trace.attrs["error"] = str(e)
+                return {"error": str(e)}
+
+    async def arun_query(self, question: str, session_id: str, remember: bool = True) -> Dict[str, Any]:
+        # LLM calls run natively async; the SQL tools and ID lookup are offloaded to threads.
+        # remember=False answers a one-off question (batch items): no session history is read or written
+        with start_trace(session_id) as trace, capture_results() as executed:
+            try:
+                # The history check and cache watermark may hit the database, the similarity lookup an embeddings API
+                cacheable, cached = await asyncio.to_thread(self._lookup, question, session_id, remember)
+                trace.attrs.update(mode=self.mode, cached=cached is not None)
+                if cached is not None:
+                    return self._build_response(cached.answer, session_id, sql=cached.sql, cached=True, data=cached.data)
+
+                async with self.single_flight.flight(self._flight_key(question, session_id, has_history=not cacheable)) as flight:
+                    trace.attrs["coalesced"] = flight.shared
+                    if flight.shared:
+                        if remember:
+                            await self._remember_shared(question, session_id, flight.result)
+                    else:
+                        async with self.limiter.slot():
+                            start = time.perf_counter()
+                            history = await asyncio.to_thread(self._history, session_id) if remember else []
+                            result = await self._arun_direct(question, history) if self.mode == "direct" else None
+                            if result is None:
+                                # Building the agent may re-check the schema version; the inputs may embed the question
+                                agent, inputs = await asyncio.to_thread(self._bind_agent, question, history)
+                                output = await agent.ainvoke(inputs, config=trace_config())
+                                result = self._agent_result(output)
+
+                        flight.result = await self._finish_run(
+                            question, session_id, result, executed, cacheable, start, remember=remember
+                        )
+
+                return self._flight_response(flight.result, session_id)
+
+            except EngineOverloaded as e:
+                trace.attrs["error"] = str(e)
+                return {"error": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                trace.attrs["error"] = str(e)
+                return {"error": str(e)}
+
+    async def astream_query(self, question: str, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+        # Yields sql/rows events as queries run, final-answer tokens as they arrive, then the full answer
+        with start_trace(session_id) as trace, capture_results() as executed:
+            try:
+                # The history check and cache watermark may hit the database, the similarity lookup an embeddings API
+                cacheable, cached = await asyncio.to_thread(self._lookup, question, session_id)
+                trace.attrs.update(mode=self.mode, cached=cached is not None)
+                if cached is not None:
+                    yield {"event": "answer", "data": self._build_response(cached.answer, session_id, sql=cached.sql, cached=True, data=cached.data)}
+                    return
+
+                async with self.single_flight.flight(self._flight_key(question, session_id, has_history=not cacheable)) as flight:
+                    trace.attrs["coalesced"] = flight.shared
+                    if flight.shared:
+                        # Someone else is already answering this; their answer arrives in one piece
+                        await self._remember_shared(question, session_id, flight.result)
+                    else:
+                        async with self.limiter.slot():
+                            start = time.perf_counter()
+                            history = await asyncio.to_thread(self._history, session_id)
+                            result: Optional[Dict[str, Any]] = None
+                            if self.mode == "direct":
+                                async for event in self._astream_direct(question, history):
+                                    if event["event"] == "result":
+                                        result = event["data"]
+                                    else:
+                                        yield event
+
+                            if result is None:
+                                agent, inputs = await asyncio.to_thread(self._bind_agent, question, history)
+                                answer_filter = FinalAnswerFilter()
+                                query_start = len(executed)
+                                async for event in agent.astream_events(inputs, config=trace_config(), version="v2"):
+                                    kind = event["event"]
+                                    if kind == "on_tool_start" and event["name"] == "sql_db_query":
+                                        query_start = len(executed)
+                                        yield {"event": "sql", "data": {"query": self._tool_query(event["data"].get("input"))}}
+                                    elif kind == "on_tool_end" and event["name"] == "sql_db_query":
+                                        # The executor captured the result; nothing new means the query failed
+                                        ran = executed[query_start:]
+                                        yield {"event": "rows", "data": self._rows_event(ran[-1] if ran else None)}
+                                    elif kind == "on_chat_model_stream":
+                                        token = answer_filter.feed(event["run_id"], str(event["data"]["chunk"].content))
+                                        if token:
+                                            yield {"event": "token", "data": {"text": token}}
+                                    elif kind == "on_chain_end" and not event["parent_ids"]:
+                                        result = self._agent_result(event["data"]["output"])
+
+                        flight.result = await self._finish_run(question, session_id, result, executed, cacheable, start)
+
+                yield {"event": "answer", "data": self._flight_response(flight.result, session_id)}
+
+            except EngineOverloaded as e:
+                trace.attrs["error"] = str(e)
+                yield {"event": "error", "data": {"error": str(e), "retry_after": e.retry_after}}
+            except Exception as e:
+                trace.attrs["error"] = str(e)
+                yield {"event": "error", "data": {"error": str(e)}}
+
+    async def _finish_run(
+        self,
+        question: str,
+        session_id: str,
+        result: Dict[str, Any],
+        executed: List[QueryResult],
+        cacheable: bool,
+        start: float,
+        remember: bool = True
+    ) -> Dict[str, Any]:
+        # The flight leader's work after the LLM is done; what it returns is shared with its followers
+        with trace_span("post_process", "post_process_output"):
+            final_answer = await asyncio.to_thread(self._post_process_output, result["output"])
+            data = self._result_data(executed)
+        if remember:
+            await asyncio.to_thread(self._remember_turn, question, session_id, final_answer, result["sql"], data)
+        if cacheable:
+            await asyncio.to_thread(
+                self.answer_cache.put, question, final_answer, result["sql"], time.perf_counter() - start, data=data
             )
-        return self.memory_sessions[session_id]
+        return {"answer": final_answer, "sql": result["sql"], "result_handle": result["result_handle"], "data": data}
 
-    def create_agent(self, session_id: str):
-        memory = self.get_or_create_memory(session_id)
-        toolkit = SQLDatabaseToolkit(db=self.db, llm=self.llm)
-        schema_text = load_schema_text()
-        prompt = get_prompt_with_schema(schema_text)
-
-        return initialize_agent(
-            tools=toolkit.get_tools(),
-            llm=self.llm,
-            agent=AgentType.CHAT_ZERO_SHOT_REACT_DESCRIPTION,
-            memory=memory,
-            prompt=prompt,
-            handle_parsing_errors=True,
-            verbose=True,
-            max_iterations=20,
-            early_stopping_method="generate"
+    async def _remember_shared(self, question: str, session_id: str, shared: Dict[str, Any]) -> None:
+        # A follower's session still records the turn it was answered with
+        await asyncio.to_thread(self._remember_turn, question, session_id, shared["answer"], shared["sql"], shared["data"])
+
+    def _flight_response(self, shared: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        return self._build_response(
+            shared["answer"], session_id, sql=shared["sql"], result_handle=shared["result_handle"], data=shared["data"]
         )
 
-    def run_query(self, question: str, session_id: str) -> Dict[str, Any]:
+    async def abatch_query(
+        self,
+        questions: List[str],
+        concurrency: Optional[int] = None,
+        session_prefix: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # Yields {"index", "question", **response} as each question completes; errors stay per item
+        workers = asyncio.Semaphore(min(concurrency or BATCH_CONCURRENCY, self.limiter.max_concurrent))
+        prefix = session_prefix or f"batch-{uuid.uuid4().hex[:8]}"
+        parent_request_id = request_id_var.get()
+
+        async def answer(index: int, question: str) -> Dict[str, Any]:
+            async with workers:
+                # Each question is its own conversation and trace; tasks copy the context, so this stays local
+                if parent_request_id:
+                    request_id_var.set(f"{parent_request_id}-{index}")
+                session_id = f"{prefix}-{index}"
+                for attempt in range(BATCH_OVERLOAD_RETRIES + 1):
+                    # Batch sessions are never continued; storing them would only evict live conversations
+                    result = await self.arun_query(question, session_id, remember=False)
+                    if "retry_after" not in result or attempt == BATCH_OVERLOAD_RETRIES:
+                        break
+                    await asyncio.sleep(result["retry_after"])
+                return {"index": index, "question": question, **result}
+
+        tasks = [asyncio.create_task(answer(i, q)) for i, q in enumerate(questions)]
         try:
-            agent = self.create_agent(session_id)
-            result = agent.run(question)
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # Stop the rest of the batch if the consumer goes away
+            for task in tasks:
+                task.cancel()
+
+    def batch_query(self, questions: List[str], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Blocking wrapper for scripts; results come back in input order
+        async def collect():
+            return [item async for item in self.abatch_query(questions, concurrency=concurrency)]
+        return sorted(asyncio.run(collect()), key=lambda item: item["index"])
+
+    def _run_agent(self, question: str, history: List[BaseMessage]) -> Dict[str, Any]:
+        agent, inputs = self._bind_agent(question, history)
+        return self._agent_result(agent.invoke(inputs, config=trace_config()))
+
+    def _bind_agent(self, question: str, history: List[BaseMessage]) -> Tuple[AgentExecutor, Dict[str, Any]]:
+        # The agent is shared by every session; each call only binds its own history and schema context
+        agent = self.build_agent()
+        start = time.perf_counter()
+        inputs = self._agent_inputs(question, history)
+        bind_seconds = time.perf_counter() - start
+        metrics.observe("agent_bind_seconds", bind_seconds)
+        metrics.observe("agent_setup_saved_seconds", max(self.agent_build_seconds - bind_seconds, 0.0))
+        return agent, inputs
+
+    def _agent_inputs(self, question: str, history: List[BaseMessage]) -> Dict[str, Any]:
+        return {"input": question, "chat_history": history, "schema_context": self._schema_context(question)}
+
+    def _history(self, session_id: str) -> List[BaseMessage]:
+        # Compact records of earlier turns, newest first until the history token budget is spent
+        history = self.get_or_create_memory(session_id).load_memory_variables({})["chat_history"]
+        tokens = sum(count_tokens(str(m.content)) for m in history)
+        metrics.observe("prompt_history_tokens", tokens, buckets=TOKEN_BUCKETS)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.attrs["history_tokens"] = tokens
+        return history
+
+    def _schema_context(self, question: str) -> str:
+        context = self.schema_context.build(question)
+        tokens = count_tokens(context)
+        metrics.observe("prompt_schema_tokens", tokens, buckets=TOKEN_BUCKETS)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.attrs["schema_tokens"] = tokens
+        return context
+
+    def _agent_result(self, output: Dict[str, Any]) -> Dict[str, Any]:
+        steps = output.get("intermediate_steps", [])
+        handles = [
+            match for _, observation in steps
+            for match in RESULT_HANDLE_PATTERN.findall(str(observation))
+        ]
+        return {
+            "output": str(output["output"]),
+            "sql": self._extract_sql(steps),
+            "result_handle": handles[-1] if handles else None
+        }
+
+    def _direct_sql(self, response: Any) -> str:
+        sql = clean_sql(str(response.content))
+        validate_sql(sql, self.db.get_usable_table_names())
+        return sql
+
+    def _direct_fallback(self, error: Exception) -> None:
+        metrics.incr("direct_mode_fallbacks")
+        logger.info(f"[ENGINE] ↩️ Direct mode falling back to the agent: {error}")
+
+    def _run_direct(self, question: str, history: List[BaseMessage]) -> Optional[Dict[str, Any]]:
+        # One LLM call writes the SQL, a second phrases the answer; None means "use the agent"
+        try:
+            sql = self._direct_sql(self.llm.invoke(get_direct_sql_messages(self._schema_context(question), question, history), config=trace_config()))
+            result = self.executor.execute(sql)
+        except Exception as e:
+            self._direct_fallback(e)
+            return None
 
-            final_answer = self._post_process_output(str(result))
-            chart_type = self._extract_chart_hint(final_answer)
+        response = self.llm.invoke(get_direct_answer_messages(question, sql, result.for_llm(), history), config=trace_config())
+        return {"output": str(response.content), "sql": sql, "result_handle": result.handle}
 
-            return {
-                "answer": final_answer,
-                "chart_suggestion": chart_type,
-                "session_id": session_id
-            }
+    async def _arun_direct(self, question: str, history: List[BaseMessage]) -> Optional[Dict[str, Any]]:
+        result = None
+        async for event in self._astream_direct(question, history, stream_answer=False):
+            if event["event"] == "result":
+                result = event["data"]
+        return result
 
+    async def _astream_direct(
+        self,
+        question: str,
+        history: List[BaseMessage],
+        stream_answer: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            schema_context = await asyncio.to_thread(self._schema_context, question)
+            response = await self.llm.ainvoke(get_direct_sql_messages(schema_context, question, history), config=trace_config())
+            # Validation reads the table list, which may re-check the schema version
+            sql = await asyncio.to_thread(self._direct_sql, response)
+            yield {"event": "sql", "data": {"query": sql}}
+            result = await asyncio.to_thread(self.executor.execute, sql)
         except Exception as e:
-            return {"error": str(e)}
+            self._direct_fallback(e)
+            return
+        yield {"event": "rows", "data": self._rows_event(result)}
+
+        messages = get_direct_answer_messages(question, sql, result.for_llm(), history)
+        if stream_answer:
+            answer = ""
+            async for chunk in self.llm.astream(messages, config=trace_config()):
+                answer += str(chunk.content)
+                yield {"event": "token", "data": {"text": str(chunk.content)}}
+        else:
+            answer = str((await self.llm.ainvoke(messages, config=trace_config())).content)
+
+        yield {"event": "result", "data": {"output": answer, "sql": sql, "result_handle": result.handle}}
+
+    def _build_response(
+        self,
+        answer: str,
+        session_id: str,
+        sql: Optional[str] = None,
+        cached: bool = False,
+        result_handle: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return {
+            "answer": answer,
+            "chart": infer_chart(data),
+            "data": data,
+            "session_id": session_id,
+            "sql": sql,
+            "cached": cached,
+            "result_handle": result_handle
+        }
+
+    def _rows_event(self, result: Optional[QueryResult]) -> Dict[str, Any]:
+        if result is None:
+            return {"count": None, "truncated": False, "result_handle": None}
+        return {"count": len(result.rows), "truncated": result.truncated, "result_handle": result.handle}
+
+    def _result_data(self, executed: List[QueryResult]) -> Optional[Dict[str, Any]]:
+        # The answer is written from the last query that ran; its rows go to the client as columns
+        if not executed:
+            return None
+        result = executed[-1]
+        return to_columnar(result.columns, result.data_rows, complete=result.complete, max_points=self.chart_max_points)
+
+    def _lookup(self, question: str, session_id: str, remember: bool = True) -> Tuple[bool, Optional[CachedAnswer]]:
+        # A question that is not remembered never has history, so there is nothing to check
+        cacheable = self._is_cacheable(session_id) if remember else True
+        return cacheable, self._get_cached_answer(question, session_id, remember) if cacheable else None
+
+    def _is_cacheable(self, session_id: str) -> bool:
+        # Once a session has history any question may lean on it ("December?", "Now only group
+        # orders"), so its answers are neither served from nor written to the shared cache
+        return not self.session_store.has_history(session_id)
+
+    def _get_cached_answer(self, question: str, session_id: str, remember: bool = True):
+        cached = self.answer_cache.get(question)
+        if cached is not None and remember:
+            self._remember_turn(question, session_id, cached.answer, cached.sql, cached.data)
+        return cached
+
+    def _remember_turn(
+        self,
+        question: str,
+        session_id: str,
+        answer: str,
+        sql: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        # Every turn is kept as question, final SQL, result summary and answer, including answers
+        # computed elsewhere, so follow-ups still resolve
+        memory = self.get_or_create_memory(session_id)
+        memory.save_context({"input": question}, {"output": answer, "sql": sql, "result": result_summary(data)})
+
+    def _flight_key(self, question: str, session_id: str, has_history: bool) -> str:
+        # With history behind it the same words can mean something else in each session, so such a
+        # question only coalesces with identical ones from its own session
+        key = normalize_question(question)
+        return f"{session_id}:{key}" if has_history else key
+
+    def _extract_sql(self, steps: List[Any]) -> Optional[str]:
+        queries = [action.tool_input for action, _ in steps if getattr(action, "tool", None) == "sql_db_query"]
+        if not queries:
+            return None
+        return self._tool_query(queries[-1])
+
+    def _tool_query(self, tool_input: Any) -> Optional[str]:
+        if isinstance(tool_input, dict):
+            return tool_input.get("query") or tool_input.get("tool_input")
+        return str(tool_input) if tool_input is not None else None
 
     def _post_process_output(self, text: str) -> str:
         text = self.map_user_ids_to_names(text)
@@ -126,34 +666,4 @@ class QueryEngine:
         return text
 
     def map_user_ids_to_names(self, text: str) -> str:
-        ids = re.findall(r"\b[0-9a-f]{8}-[0-9a-f\-]{27,36}\b", text)
-        if not ids:
-            return text
-
-        placeholders = ','.join(f"'{id}'" for id in ids)
-        query = sql_text(f"SELECT id, name FROM users WHERE id IN ({placeholders})")
-
-        try:
-            with engine.connect() as conn:
-                results = conn.execute(query).fetchall()
-                id_name_map = {str(row[0]): row[1] for row in results}
-                for uid, name in id_name_map.items():
-                    text = text.replace(uid, name)
-        except Exception:
-            pass
-
-        return text
-
-    def _extract_chart_hint(self, text: str) -> Optional[str]:
-        lowered = text.lower()
-        if "bar chart" in lowered:
-            return "bar"
-        elif "line chart" in lowered or "trend" in lowered:
-            return "line"
-        elif "pie chart" in lowered:
-            return "pie"
-        return None
-
-
-# Shared agent instance
-default_query_engine = QueryEngine()
+        return self.name_resolver.resolve(text)
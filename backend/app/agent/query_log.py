@@ -0,0 +1,136 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Engine
+
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+# SQLite's EXPLAIN QUERY PLAN detail, e.g. "SCAN orders" or "SEARCH o USING INDEX ix_orders_user_id (user_id=?)"
+SQLITE_PLAN_DETAIL = re.compile(r"^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\w+)(?:\s+AS\s+\w+)?(?:\s+USING\s+(.*))?")
+
+
+def plan_nodes_postgres(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    node = {
+        "node": plan.get("Node Type"),
+        "relation": plan.get("Relation Name"),
+        "index": plan.get("Index Name"),
+        "rows": plan.get("Plan Rows"),
+        "cost": plan.get("Total Cost"),
+    }
+    if node["relation"]:
+        yield node
+    for child in plan.get("Plans", []):
+        yield from plan_nodes_postgres(child)
+
+
+def plan_nodes_sqlite(rows: List[Any]) -> Iterator[Dict[str, Any]]:
+    for row in rows:
+        match = SQLITE_PLAN_DETAIL.match(str(row[-1]))
+        if match:
+            uses_index = match.group(3) is not None and "INDEX" in match.group(3)
+            yield {
+                "node": "Index Scan" if uses_index else "Seq Scan",
+                "relation": match.group(2),
+                "index": match.group(3),
+                "rows": None,
+                "cost": None,
+            }
+
+
+class QueryLog:
+    """Appends every executed agent query, its timing and its EXPLAIN plan to a JSONL file.
+
+    EXPLAIN runs on a single background thread after the query returns, so logging never
+    adds to request latency. At most ``max_pending`` entries wait for it; past that, new ones
+    are dropped (counted in ``query_log_dropped``) rather than piling up behind a slow EXPLAIN.
+    Queries the replica served are logged without a plan, since their cost says nothing about
+    the primary's indexes. The log is read offline by ``app.agent.index_advisor``.
+    """
+
+    def __init__(
+        self, engine: Engine, path: str, explain: bool = True, max_bytes: int = 50_000_000, max_pending: int = 1000
+    ):
+        self.engine = engine
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.explain = explain
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_pending)
+        threading.Thread(target=self._drain, name="query-log", daemon=True).start()
+
+    def record(
+        self, sql: str, seconds: float, rows: Optional[int] = None, error: Optional[str] = None, replica: bool = False
+    ) -> None:
+        entry = {
+            "ts": time.time(), "sql": sql, "seconds": round(seconds, 6), "rows": rows, "error": error, "replica": replica,
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            metrics.incr("query_log_dropped")
+
+    def explain_plan(self, sql: str) -> List[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            if self.engine.dialect.name == "postgresql":
+                plan = conn.execute(sql_text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                return list(plan_nodes_postgres(plan[0]["Plan"]))
+            if self.engine.dialect.name == "sqlite":
+                return list(plan_nodes_sqlite(conn.execute(sql_text(f"EXPLAIN QUERY PLAN {sql}")).all()))
+        return []
+
+    def _drain(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                self._write(entry)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        try:
+            if self.explain and entry["error"] is None and not entry["replica"]:
+                entry["plan"] = self.explain_plan(entry["sql"])
+            with self._lock:
+                # Keep one previous file around so the advisor still has history after a rotation
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    self.path.replace(self.path.with_name(self.path.name + ".1"))
+                with self.path.open("a") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+        except Exception as e:
+            metrics.incr("query_log_errors")
+            logger.warning(f"⚠️ Could not log agent query: {e}")
+
+    def flush(self) -> None:
+        # Waits for queued entries to be written, e.g. before reading the file back
+        self._queue.join()
+
+
+def read_query_log(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def create_query_log(engine: Engine) -> Optional[QueryLog]:
+    # Opt-in: every logged query costs an EXPLAIN on the primary
+    path = os.getenv("AGENT_QUERY_LOG", "")
+    if not path:
+        return None
+    return QueryLog(
+        engine,
+        path,
+        explain=os.getenv("AGENT_QUERY_EXPLAIN", "true").lower() == "true",
+        max_bytes=int(os.getenv("AGENT_QUERY_LOG_MAX_BYTES", "50000000")),
+        max_pending=int(os.getenv("AGENT_QUERY_LOG_MAX_PENDING", "1000")),
+    )
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
+
+from app.agent.schema_context import parse_schema
+from app.agent.sql_validation import referenced_tables
+from app.utils.database import instrument_engine
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+ROUTING_MODES = {"off", "analytics", "all"}
+# The scans and aggregations the agent runs most; lookups on small tables stay on the primary
+DEFAULT_ROUTE_TABLES = "orders,order_items,group_members"
+SYNC_CHUNK_ROWS = 250_000
+
+
+def sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def process_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def replica_type(column_type: str) -> str:
+    # UUIDs are stored as text so rows come back the same shape as from psycopg2
+    return "VARCHAR" if column_type.upper() == "UUID" else column_type
+
+
+class AnalyticsReplica:
+    """Embedded DuckDB copy of the schema.sql tables that analytics queries can be routed to.
+
+    ``sync()`` copies every table into a new DuckDB file and swaps it in, so queries never see a
+    half-built replica. DuckDB's postgres/sqlite scanners are used when the extension is available;
+    otherwise rows are streamed through pandas. ``route(sql)`` returns the replica engine when a
+    query only reads replicated tables, is allowed by ``routing`` and the copy is younger than
+    ``max_lag``; callers fall back to the primary on any replica error.
+
+    Each worker process writes its own ``{stem}.{pid}.{timestamp}`` files next to ``path`` and only
+    ever deletes those, so workers sharing a path never remove a file another one has open.
+    """
+
+    def __init__(
+        self,
+        source: Engine,
+        path: str,
+        schema: str,
+        routing: str = "analytics",
+        route_tables: Optional[Set[str]] = None,
+        max_lag: float = 3600,
+    ):
+        if routing not in ROUTING_MODES:
+            raise ValueError(f"Unknown replica routing mode: {routing}")
+        self.source = source
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.schema = parse_schema(schema)
+        self.routing = routing
+        self.route_tables = route_tables if route_tables is not None else set(DEFAULT_ROUTE_TABLES.split(","))
+        self.max_lag = max_lag
+        self.tables: Set[str] = set()
+        self.engine: Optional[Engine] = None
+        self._engine: Optional[Engine] = None
+        self.synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._scanner_unavailable = False
+        self._file_pattern = re.compile(
+            rf"{re.escape(self.path.stem)}\.(\d+)\.\d+{re.escape(self.path.suffix)}(\.building)?"
+        )
+        self._resume()
+
+    def route(self, sql: str) -> Optional[Engine]:
+        engine = self.engine
+        if engine is None or self.routing == "off":
+            return None
+        if self.max_lag > 0 and time.time() - self.synced_at > self.max_lag:
+            metrics.incr("replica_stale_skips")
+            return None
+        tables = referenced_tables(sql)
+        if not tables or not tables <= self.tables:
+            return None
+        if self.routing == "analytics" and not tables & self.route_tables:
+            return None
+        return engine
+
+    def sync(self) -> Dict[str, int]:
+        with self._sync_lock:
+            start = time.perf_counter()
+            target = self.path.with_name(f"{self.path.stem}.{os.getpid()}.{int(time.time() * 1000)}{self.path.suffix}")
+            building = Path(f"{target}.building")
+            copied = self._build(building)
+            # Only complete files carry the replica suffix, so a crashed sync is never resumed
+            os.replace(building, target)
+            self._swap(target, set(copied), time.time())
+            elapsed = time.perf_counter() - start
+            metrics.observe("replica_sync_seconds", elapsed)
+            metrics.set_gauge("replica_rows", sum(copied.values()))
+            logger.info(f"🦆 Synced {len(copied)} tables ({sum(copied.values())} rows) to the analytics replica in {elapsed:.2f}s")
+            return copied
+
+    async def sync_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                metrics.incr("replica_sync_errors")
+                logger.error(f"❌ Analytics replica sync failed: {e}")
+            await asyncio.sleep(interval)
+
+    def _build(self, target: Path) -> Dict[str, int]:
+        import duckdb
+
+        source_tables = set(inspect(self.source).get_table_names())
+        copied = {}
+        conn = duckdb.connect(str(target))
+        try:
+            scanner = self._attach_source(conn)
+            for name, table in self.schema.items():
+                if name not in source_tables:
+                    continue
+                available = {c["name"] for c in inspect(self.source).get_columns(name)}
+                columns = [(c, t) for c, t in table.columns if c in available]
+                conn.execute(f"CREATE TABLE {name} ({', '.join(f'{c} {replica_type(t)}' for c, t in columns)})")
+                column_list = ", ".join(c for c, _ in columns)
+                if scanner:
+                    conn.execute(f"INSERT INTO {name} ({column_list}) SELECT {column_list} FROM {scanner}.{name}")
+                else:
+                    self._copy_chunks(conn, name, column_list)
+                copied[name] = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+            conn.execute("CHECKPOINT")
+        except Exception:
+            conn.close()
+            target.unlink(missing_ok=True)
+            raise
+        conn.close()
+        return copied
+
+    def _attach_source(self, conn) -> Optional[str]:
+        # Scanning the source from inside DuckDB is much faster than moving rows through Python
+        import duckdb
+
+        if self._scanner_unavailable:
+            return None
+        dialect = self.source.dialect.name
+        url = self.source.url
+        try:
+            if dialect == "postgresql":
+                conn.execute("INSTALL postgres; LOAD postgres")
+                dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+                conn.execute(f"ATTACH {sql_literal(dsn)} AS source (TYPE postgres, READ_ONLY)")
+                return f"source.{inspect(self.source).default_schema_name}"
+            if dialect == "sqlite" and url.database:
+                conn.execute("INSTALL sqlite; LOAD sqlite")
+                conn.execute(f"ATTACH {sql_literal(url.database)} AS source (TYPE sqlite, READ_ONLY)")
+                return "source"
+        except duckdb.Error as e:
+            self._scanner_unavailable = True
+            logger.warning(f"⚠️ DuckDB {dialect} scanner unavailable, copying rows through pandas: {str(e).splitlines()[0]}")
+        return None
+
+    def _copy_chunks(self, conn, name: str, column_list: str) -> None:
+        import pandas as pd
+
+        with self.source.connect() as source:
+            source = source.execution_options(stream_results=True)
+            for chunk in pd.read_sql_query(f"SELECT {column_list} FROM {name}", source, chunksize=SYNC_CHUNK_ROWS):
+                conn.register("sync_chunk", chunk)
+                conn.execute(f"INSERT INTO {name} ({column_list}) SELECT {column_list} FROM sync_chunk")
+                conn.unregister("sync_chunk")
+
+    def _swap(self, target: Path, tables: Optional[Set[str]], synced_at: float) -> None:
+        # Each sync gets its own file: DuckDB caches open databases by path within a process
+        engine = create_engine(f"duckdb:///{target}", connect_args={"read_only": True})
+        if tables is None:
+            tables = set(inspect(engine).get_table_names()) & set(self.schema)
+        instrument_engine(engine)
+        with self._lock:
+            previous = self._engine
+            self._engine = engine
+            self.engine = engine.execution_options(agent_sql=True)
+            self.tables = tables
+            self.synced_at = synced_at
+        metrics.set_gauge("replica_synced_at", synced_at)
+        if previous is not None:
+            previous.dispose()
+        # Other workers may share the path; only this process's older files are ours to remove
+        self._remove(old for old, pid in self._owned_files() if pid == os.getpid() and old != target)
+
+    def _owned_files(self) -> List[Tuple[Path, int]]:
+        # Every replica file under the path, complete or still building, with the pid that wrote it
+        matches = ((p, self._file_pattern.fullmatch(p.name)) for p in self.path.parent.glob(f"{self.path.stem}.*"))
+        return [(p, int(match.group(1))) for p, match in matches if match]
+
+    def _files(self) -> List[Path]:
+        complete = [p for p, _ in self._owned_files() if p.suffix == self.path.suffix]
+        return sorted(complete, key=lambda p: p.stat().st_mtime)
+
+    def _remove(self, files) -> None:
+        for old in files:
+            old.unlink(missing_ok=True)
+            Path(f"{old}.wal").unlink(missing_ok=True)
+
+    def _resume(self) -> None:
+        # Reuse the newest complete replica from a previous run until the first sync finishes
+        files = self._files()
+        if not files:
+            return
+        # Files of exited processes are nobody's; keep only the newest, which is about to be reused
+        self._remove(p for p, pid in self._owned_files() if p != files[-1] and not process_running(pid))
+        try:
+            self._swap(files[-1], None, files[-1].stat().st_mtime)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not reuse analytics replica {files[-1].name}: {e}")
+
+
+def create_analytics_replica(source: Engine, schema: str) -> Optional[AnalyticsReplica]:
+    path = os.getenv("ANALYTICS_REPLICA_PATH", "")
+    routing = os.getenv("REPLICA_ROUTING", "analytics")
+    if not path or routing == "off":
+        return None
+    route_tables = {t.strip() for t in os.getenv("REPLICA_ROUTE_TABLES", DEFAULT_ROUTE_TABLES).split(",") if t.strip()}
+    return AnalyticsReplica(
+        source,
+        path,
+        schema,
+        routing=routing,
+        route_tables=route_tables,
+        max_lag=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "3600")),
+    )
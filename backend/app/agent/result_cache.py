@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Engine
+
+from app.agent.sql_validation import referenced_tables
+from app.utils.metrics import metrics
+
+SQL_TOKEN = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/|[^'\"/-]+|.", re.DOTALL)
+SIMPLE_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+PUNCTUATION_SPACE = re.compile(r"\s*([(),=<>*/])\s*")
+# Results that depend on when or how often the query runs must not be reused
+NONDETERMINISTIC = re.compile(r"\b(now|random|current_date|current_time|current_timestamp|localtime|localtimestamp|clock_timestamp)\b")
+
+# Per-table change counters; they only grow, so any difference means rows were written
+POSTGRES_TABLE_VERSIONS_SQL = """
+SELECT relname, n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables
+"""
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Normalize whitespace, comments, keyword case and quoting of plain identifiers.
+
+    String literals are kept byte for byte, so queries that differ only in a value never share a key.
+    """
+    parts = []
+    code = []
+
+    def flush():
+        if code:
+            text = PUNCTUATION_SPACE.sub(r"\1", " ".join("".join(code).lower().split()))
+            parts.append(text)
+            code.clear()
+
+    for token in SQL_TOKEN.findall(sql.strip().rstrip(";")):
+        if token.startswith("'"):
+            flush()
+            parts.append(token)
+        elif token.startswith('"') and len(token) > 1:
+            name = token[1:-1]
+            if SIMPLE_IDENTIFIER.match(name):
+                code.append(name)
+            else:
+                flush()
+                parts.append(token)
+        elif token.startswith("--") or token.startswith("/*"):
+            code.append(" ")
+        else:
+            code.append(token)
+    flush()
+    return " ".join(part for part in parts if part).strip()
+
+
+def postgres_table_versions(engine: Engine) -> Dict[str, Any]:
+    with engine.connect() as conn:
+        return {name: version for name, version in conn.execute(sql_text(POSTGRES_TABLE_VERSIONS_SQL))}
+
+
+@dataclass
+class CachedResult:
+    columns: List[str]
+    rows: List[Tuple[Any, ...]]
+    truncated: bool
+    extra_rows: List[Tuple[Any, ...]]
+    complete: bool
+    tables: Set[str]
+    size: int
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class ResultCache:
+    """LRU of SQL results keyed on the canonical query text, bounded by total bytes.
+
+    Each entry remembers the tables its query reads. Entries are dropped when one of those
+    tables changes: ``versions_fn`` returns a per-table change counter and is polled at most every
+    ``check_interval`` seconds, and writers can call ``invalidate(tables)`` directly. ``ttl_seconds``
+    bounds staleness when the database offers no change counters.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16_000_000,
+        ttl_seconds: float = 300,
+        versions_fn: Optional[Callable[[], Dict[str, Any]]] = None,
+        check_interval: float = 5,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.versions_fn = versions_fn
+        self.check_interval = check_interval
+        self.bytes = 0
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._by_table: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._versions: Optional[Dict[str, Any]] = None
+        self._versions_checked_at = 0.0
+
+    def key(self, sql: str) -> Optional[str]:
+        key = canonicalize_sql(sql)
+        if self.max_bytes <= 0 or NONDETERMINISTIC.search(key):
+            return None
+        return key
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        self._check_versions()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created_at > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                metrics.incr("sql_result_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr("sql_result_cache_hits")
+        return entry
+
+    def put(self, key: str, result: Any) -> None:
+        # result is a sql_executor.QueryResult
+        size = len(key) + sum(len(repr(row)) for row in result.data_rows)
+        if size > self.max_bytes:
+            return
+        entry = CachedResult(
+            result.columns, result.rows, result.truncated, result.extra_rows, result.complete, referenced_tables(key), size
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.bytes += size
+            for table in entry.tables:
+                self._by_table[table].add(key)
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            metrics.set_gauge("sql_result_cache_bytes", self.bytes)
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        with self._lock:
+            keys = set()
+            for table in tables:
+                keys |= self._by_table.pop(table.lower(), set())
+            for key in keys:
+                self._remove(key)
+            metrics.set_gauge("sql_result_cache_bytes", self.bytes)
+        if keys:
+            metrics.incr("sql_result_cache_invalidations", len(keys))
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self.bytes = 0
+            metrics.set_gauge("sql_result_cache_bytes", 0)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def _check_versions(self) -> None:
+        if self.versions_fn is None:
+            return
+        now = time.monotonic()
+        if now - self._versions_checked_at < self.check_interval:
+            return
+        self._versions_checked_at = now
+        try:
+            versions = self.versions_fn()
+        except Exception:
+            return
+        previous, self._versions = self._versions, versions
+        if previous is None:
+            # Nothing cached before the first reading can be trusted against it
+            self.clear()
+            return
+        changed = [table for table in set(previous) | set(versions) if previous.get(table) != versions.get(table)]
+        if changed:
+            self.invalidate(changed)
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Connection, Engine
+
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+ROLLUP_STATE_TABLE = "rollup_state"
+GRAINS = {"day": "daily", "month": "monthly"}
+
+# Period bucket for an order_date expression, per dialect
+BUCKET_SQL = {
+    "postgresql": {
+        "day": "CAST(DATE_TRUNC('day', {col}) AS DATE)",
+        "month": "CAST(DATE_TRUNC('month', {col}) AS DATE)",
+    },
+    "sqlite": {
+        "day": "DATE({col})",
+        "month": "DATE({col}, 'start of month')",
+    },
+}
+
+GROUP_ORDER = "CASE WHEN o.groups_carts_id IS NOT NULL THEN 1 ELSE 0 END"
+# Every rollup is split by order status so cancelled and pending orders can be left out
+STATUS = ("status", "VARCHAR(20)", "o.status")
+
+
+@dataclass
+class RollupDefinition:
+    name: str
+    description: str
+    source: str
+    # (column, SQL type, expression); "ID" is swapped for the dialect's ID type
+    dimensions: List[Tuple[str, str, str]]
+    measures: List[Tuple[str, str, str]]
+
+
+ROLLUPS = [
+    RollupDefinition(
+        name="orders",
+        description="Order counts and revenue per period, split into group and solo orders",
+        source="orders o",
+        dimensions=[STATUS],
+        measures=[
+            ("order_count", "INTEGER", "COUNT(*)"),
+            ("group_order_count", "INTEGER", f"SUM({GROUP_ORDER})"),
+            ("solo_order_count", "INTEGER", f"SUM(1 - {GROUP_ORDER})"),
+            ("revenue", "NUMERIC", "SUM(o.total_amount)"),
+            ("group_revenue", "NUMERIC", f"SUM({GROUP_ORDER} * o.total_amount)"),
+            ("customer_count", "INTEGER", "COUNT(DISTINCT o.user_id)"),
+        ],
+    ),
+    RollupDefinition(
+        name="product_sales",
+        description="Units and item revenue per product (and its category) per period",
+        source="order_items oi JOIN orders o ON o.id = oi.order_id LEFT JOIN products p ON p.id = oi.product_id",
+        dimensions=[
+            STATUS,
+            ("product_id", "ID", "oi.product_id"),
+            ("category_id", "ID", "p.name_id"),
+        ],
+        measures=[
+            ("order_count", "INTEGER", "COUNT(DISTINCT o.id)"),
+            ("units", "INTEGER", "SUM(oi.quantity)"),
+            ("group_units", "INTEGER", f"SUM({GROUP_ORDER} * oi.quantity)"),
+            ("revenue", "NUMERIC", "SUM(oi.price * oi.quantity)"),
+        ],
+    ),
+    RollupDefinition(
+        name="campaign_sales",
+        description="Orders, revenue and customers attributed to each campaign per period",
+        source="orders o",
+        dimensions=[STATUS, ("campaign_id", "ID", "o.campaign_id")],
+        measures=[
+            ("order_count", "INTEGER", "COUNT(*)"),
+            ("group_order_count", "INTEGER", f"SUM({GROUP_ORDER})"),
+            ("revenue", "NUMERIC", "SUM(o.total_amount)"),
+            ("customer_count", "INTEGER", "COUNT(DISTINCT o.user_id)"),
+        ],
+    ),
+    RollupDefinition(
+        name="leader_sales",
+        description="Group orders, revenue and groups per group leader (groups.created_by) per period",
+        source="orders o JOIN groups g ON g.id = o.groups_carts_id",
+        dimensions=[STATUS, ("leader_id", "ID", "g.created_by")],
+        measures=[
+            ("order_count", "INTEGER", "COUNT(*)"),
+            ("group_count", "INTEGER", "COUNT(DISTINCT g.id)"),
+            ("revenue", "NUMERIC", "SUM(o.total_amount)"),
+            ("customer_count", "INTEGER", "COUNT(DISTINCT o.user_id)"),
+        ],
+    ),
+]
+
+
+def rollup_table(definition: RollupDefinition, grain: str) -> str:
+    return f"rollup_{GRAINS[grain]}_{definition.name}"
+
+
+def as_datetime(value) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, datetime.min.time())
+
+
+def period_start(value, grain: str) -> date:
+    day = as_datetime(value).date()
+    return day.replace(day=1) if grain == "month" else day
+
+
+class RollupManager:
+    """Keeps day/month summary tables of the order facts and describes them to the agent.
+
+    Each refresh recomputes only the periods from the last ``order_date`` watermark onward, or
+    from ``lookback_days`` before the newest order if that is earlier: orders have no update
+    timestamp, and recent ones still move from pending to completed or cancelled. The bucket
+    holding that start is deleted and rebuilt together with everything newer. Older status
+    changes and backdated orders are picked up by ``refresh(full=True)``, which
+    ``refresh_forever`` runs every ``full_interval`` seconds. ``on_refresh`` is called with the
+    names of the tables a refresh rewrote.
+    """
+
+    def __init__(self, engine: Engine, lookback_days: float = 30, full_interval: float = 86400):
+        if engine.dialect.name not in BUCKET_SQL:
+            raise ValueError(f"Rollups are not supported on {engine.dialect.name}")
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.id_type = "UUID" if self.dialect == "postgresql" else "TEXT"
+        self.lookback_days = lookback_days
+        self.full_interval = full_interval
+        self.on_refresh: Optional[Callable[[List[str]], None]] = None
+
+    def tables(self) -> List[Tuple[str, RollupDefinition, str]]:
+        return [(rollup_table(d, grain), d, grain) for d in ROLLUPS for grain in GRAINS]
+
+    def columns(self, definition: RollupDefinition) -> List[Tuple[str, str]]:
+        return [("period_start", "DATE")] + [(c, t) for c, t, _ in definition.dimensions + definition.measures]
+
+    def ddl(self, table: str, definition: RollupDefinition) -> str:
+        columns = self.columns(definition)
+        body = ",\n    ".join(f"{c} {self.id_type if t == 'ID' else t}" for c, t in columns)
+        return f"CREATE TABLE IF NOT EXISTS {table} (\n    {body}\n)"
+
+    def create_tables(self) -> None:
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {ROLLUP_STATE_TABLE} "
+                "(table_name VARCHAR(255) PRIMARY KEY, watermark TIMESTAMP, refreshed_at TIMESTAMP)"
+            )
+            existing = inspect(conn)
+            for table, definition, _ in self.tables():
+                if existing.has_table(table) and (
+                    {c["name"] for c in existing.get_columns(table)} != {c for c, _ in self.columns(definition)}
+                ):
+                    # Built from an older definition; rollups are derived data, so rebuild from scratch
+                    conn.exec_driver_sql(f"DROP TABLE {table}")
+                    conn.execute(
+                        sql_text(f"DELETE FROM {ROLLUP_STATE_TABLE} WHERE table_name = :table"), {"table": table}
+                    )
+                conn.exec_driver_sql(self.ddl(table, definition))
+                conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{table}_period_start ON {table} (period_start)")
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        start = time.perf_counter()
+        written = {}
+        with self.engine.begin() as conn:
+            latest = conn.execute(sql_text("SELECT MAX(order_date) FROM orders")).scalar()
+            watermarks = dict(conn.execute(sql_text(f"SELECT table_name, watermark FROM {ROLLUP_STATE_TABLE}")).all())
+            for table, definition, grain in self.tables():
+                previous = None if full else watermarks.get(table)
+                if latest is None or (not self.lookback_days and previous is not None and str(previous) == str(latest)):
+                    continue
+                since = None
+                if previous is not None:
+                    lookback = as_datetime(latest) - timedelta(days=self.lookback_days)
+                    since = period_start(min(as_datetime(previous), lookback), grain)
+                written[table] = self._rebuild(conn, table, definition, grain, since)
+                conn.execute(sql_text(f"DELETE FROM {ROLLUP_STATE_TABLE} WHERE table_name = :table"), {"table": table})
+                conn.execute(
+                    sql_text(f"INSERT INTO {ROLLUP_STATE_TABLE} (table_name, watermark, refreshed_at) "
+                             "VALUES (:table, :watermark, :now)"),
+                    {"table": table, "watermark": latest, "now": datetime.utcnow()},
+                )
+
+        elapsed = time.perf_counter() - start
+        metrics.observe("rollup_refresh_seconds", elapsed)
+        if written:
+            logger.info(f"📊 Refreshed {len(written)} rollup tables ({sum(written.values())} rows) in {elapsed:.2f}s")
+            if self.on_refresh:
+                self.on_refresh(list(written))
+        return written
+
+    async def refresh_forever(self, interval: float) -> None:
+        last_full = time.monotonic()
+        while True:
+            try:
+                full = self.full_interval > 0 and time.monotonic() - last_full >= self.full_interval
+                await asyncio.to_thread(self.refresh, full)
+                if full:
+                    last_full = time.monotonic()
+            except Exception as e:
+                metrics.incr("rollup_refresh_errors")
+                logger.error(f"❌ Rollup refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def schema_text(self) -> str:
+        lines = [
+            "",
+            "-- ======================",
+            "-- 📊 ROLLUP TABLES (precomputed from orders / order_items)",
+            "-- ======================",
+            "-- Prefer these over the raw tables for daily or monthly totals of orders, revenue,",
+            "-- group vs solo share, products, categories, campaigns and group leaders.",
+            "-- period_start is the first day of the day/month bucket. status is the order status",
+            "-- (pending, completed, cancelled); filter on it exactly as you would on orders.status",
+            "-- and sum over all statuses only when the question covers every order. Sum counts and",
+            "-- revenue across rows, but never customer_count/group_count/order_count of product_sales",
+            "-- (distinct per row). Join the *_id columns to their tables for names. Rollups can lag",
+            "-- the raw tables by a few minutes; use raw tables for anything they do not cover.",
+        ]
+        if self.full_interval > 0:
+            lines.append(
+                f"-- Status changes to orders older than {self.lookback_days:g} days can take up to "
+                f"{self.full_interval / 3600:g} hours to show."
+            )
+        for table, definition, grain in self.tables():
+            lines += ["", f"-- {definition.description} ({grain})", self.ddl(table, definition) + ";"]
+        return "\n".join(lines) + "\n"
+
+    def _rebuild(self, conn: Connection, table: str, definition: RollupDefinition, grain: str,
+                 since: Optional[date]) -> int:
+        bucket = BUCKET_SQL[self.dialect][grain].format(col="o.order_date")
+        columns = ["period_start"] + [c for c, _, _ in definition.dimensions + definition.measures]
+        select = [bucket] + [expr for _, _, expr in definition.dimensions + definition.measures]
+        group_by = [bucket] + [expr for _, _, expr in definition.dimensions]
+        where, params = "", {}
+        if since is not None:
+            where, params = "WHERE o.order_date >= :since", {"since": datetime.combine(since, datetime.min.time())}
+            conn.execute(sql_text(f"DELETE FROM {table} WHERE period_start >= :since_day"), {"since_day": since})
+        else:
+            conn.execute(sql_text(f"DELETE FROM {table}"))
+
+        return conn.execute(sql_text(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(select)} FROM {definition.source} {where} GROUP BY {', '.join(group_by)}"
+        ), params).rowcount
+
+
+def create_rollup_manager(engine: Engine) -> Optional[RollupManager]:
+    if os.getenv("ROLLUPS_ENABLED", "false").lower() != "true":
+        return None
+    manager = RollupManager(
+        engine,
+        lookback_days=float(os.getenv("ROLLUP_LOOKBACK_DAYS", "30")),
+        full_interval=float(os.getenv("ROLLUP_FULL_REFRESH_SECONDS", "86400")),
+    )
+    manager.create_tables()
+    return manager
+
+
+if __name__ == "__main__":
+    # Cron-friendly: python -m app.agent.rollups [--full]
+    import sys
+
+    from app.utils.database import engine
+
+    manager = RollupManager(engine)
+    manager.create_tables()
+    print(manager.refresh(full="--full" in sys.argv))
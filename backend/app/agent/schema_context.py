@@ -0,0 +1,193 @@
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.tokens import count_tokens
+
+CREATE_TABLE = re.compile(
+    r"(?:--\s*(?P<comment>[^\n]*)\n)?\s*CREATE TABLE (?:IF NOT EXISTS )?(?P<name>\w+)\s*\((?P<body>.*?)\n\);?",
+    re.IGNORECASE | re.DOTALL,
+)
+REFERENCES = re.compile(r"REFERENCES\s+(\w+)\s*\((\w+)\)", re.IGNORECASE)
+CHECK_IN = re.compile(r"CHECK\s*\(\s*\w+\s+IN\s*\(([^)]*)\)\s*\)", re.IGNORECASE)
+WORD = re.compile(r"[a-z]+")
+
+# Question words that point at tables without naming them
+SYNONYMS = {
+    "revenue": ["orders", "order_items"], "sales": ["orders", "order_items"], "spend": ["orders"],
+    "sold": ["order_items", "products"], "selling": ["order_items", "products"], "bought": ["order_items", "products"], "basket": ["order_items"],
+    "leader": ["groups", "users"], "member": ["group_members"], "joined": ["group_members"],
+    "customer": ["users"], "buyer": ["users"], "signup": ["users"], "registration": ["users"],
+    "segment": ["users"], "cohort": ["users"], "retention": ["users", "orders"],
+    "item": ["order_items", "products"], "category": ["categories"], "deal": ["group_deals"],
+    "price": ["products", "group_deals"], "campaign": ["campaigns"], "marketing": ["campaigns"],
+    "channel": ["campaigns", "users"], "solo": ["orders"], "group": ["groups"],
+}
+TREND_WORDS = {"month", "monthly", "daily", "day", "week", "weekly", "trend", "over", "time", "year", "per"}
+GRAIN_WORDS = {"daily": {"day", "daily", "week", "weekly"}, "monthly": {"month", "monthly", "year", "quarter"}}
+ROLLUP_NOTE = (
+    "-- rollup_* tables are precomputed day/month summaries of orders; prefer them over raw tables for "
+    "totals over time. Never sum customer_count or group_count across periods."
+)
+
+
+def stem(word: str) -> str:
+    for suffix in ("ies", "es", "s"):
+        if word.endswith(suffix) and len(word) > len(suffix) + 2:
+            return word[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[Tuple[str, str]]
+    foreign_keys: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    allowed_values: Dict[str, List[str]] = field(default_factory=dict)
+    primary_key: Optional[str] = None
+    comment: str = ""
+
+    def render(self) -> str:
+        parts = []
+        for column, column_type in self.columns:
+            text = f"{column} {column_type}"
+            if column == self.primary_key:
+                text += " PK"
+            if column in self.foreign_keys:
+                text += " -> {}.{}".format(*self.foreign_keys[column])
+            if column in self.allowed_values:
+                text += f" [{'|'.join(self.allowed_values[column])}]"
+            parts.append(text)
+        prefix = f"-- {self.comment}\n" if self.comment else ""
+        return f"{prefix}{self.name}({', '.join(parts)})"
+
+    def keywords(self) -> set:
+        words = set(self.name.split("_")) | {stem(self.name)}
+        for column, _ in self.columns:
+            words |= set(column.split("_"))
+        words |= set(WORD.findall(self.comment.lower()))
+        return {stem(w) for w in words}
+
+
+def parse_schema(schema: str) -> Dict[str, TableInfo]:
+    """Compact table/column/foreign-key view of CREATE TABLE statements; indexes are dropped."""
+    tables: Dict[str, TableInfo] = {}
+    for match in CREATE_TABLE.finditer(schema):
+        name = match.group("name").lower()
+        comment = (match.group("comment") or "").strip()
+        # Section banners like "-- USERS" carry nothing the table name doesn't
+        if comment.replace(" ", "_").lower() == name or not re.search(r"[a-z]", comment):
+            comment = ""
+        table = TableInfo(name=name, columns=[], comment=comment)
+        for line in match.group("body").split(",\n"):
+            line = " ".join(line.split())
+            if not line or line.upper().startswith(("PRIMARY KEY", "FOREIGN KEY", "UNIQUE", "CONSTRAINT", "CHECK")):
+                continue
+            column, column_type = (line.split(" ", 2) + [""])[:2]
+            table.columns.append((column, column_type.lower()))
+            if "PRIMARY KEY" in line.upper():
+                table.primary_key = column
+            reference = REFERENCES.search(line)
+            if reference:
+                table.foreign_keys[column] = (reference.group(1).lower(), reference.group(2))
+            allowed = CHECK_IN.search(line)
+            if allowed:
+                table.allowed_values[column] = [v.strip().strip("'") for v in allowed.group(1).split(",")]
+        tables[name] = table
+    return tables
+
+
+class SchemaContextBuilder:
+    """Picks the tables a question needs and renders them compactly within a token budget.
+
+    Tables are scored by keyword and synonym matches against the question (plus embedding
+    similarity when embeddings are given), then their foreign-key neighbours are added so
+    joins stay possible. The agent can still reach anything left out through its schema tools.
+    """
+
+    def __init__(self, schema: str, token_budget: int = 1200, embeddings: Any = None):
+        self.schema = schema
+        self.tables = parse_schema(schema)
+        self.token_budget = token_budget
+        self.embeddings = embeddings
+        self._rendered = {name: table.render() for name, table in self.tables.items()}
+        self._tokens = {name: count_tokens(text) for name, text in self._rendered.items()}
+        self._keywords = {name: table.keywords() for name, table in self.tables.items()}
+        self._vectors: Optional[Dict[str, List[float]]] = None
+
+    def full_context(self) -> str:
+        return self._render(list(self.tables))
+
+    def score_tables(self, question: str) -> Dict[str, float]:
+        words = {stem(w) for w in WORD.findall(question.lower())}
+        scores: Dict[str, float] = {}
+        for name, keywords in self._keywords.items():
+            parts = {stem(p) for p in name.split("_")}
+            score = 6.0 * (stem(name) in words) + 2.0 * len(words & parts) + len(words & keywords)
+            score += 4.0 * sum(name in SYNONYMS.get(w, ()) for w in words)
+            if name.startswith("rollup_"):
+                # Rollups only help with totals over time, and only at the grain the question asks for
+                grain = name.split("_")[1]
+                other = next(g for g in GRAIN_WORDS if g != grain)
+                if not words & TREND_WORDS or words & GRAIN_WORDS[other] and not words & GRAIN_WORDS[grain]:
+                    score = 0.0
+                else:
+                    score += 3.0 * bool(words & GRAIN_WORDS[grain])
+            if score:
+                scores[name] = score
+        if self.embeddings is not None:
+            for name, similarity in self._similarities(question).items():
+                if similarity > 0.3:
+                    scores[name] = scores.get(name, 0.0) + 5.0 * similarity
+        return scores
+
+    def select_tables(self, question: str) -> List[str]:
+        scores = self.score_tables(question)
+        if not scores:
+            # Nothing matched: fall back to the raw tables in schema order
+            return [name for name in self.tables if not name.startswith("rollup_")]
+
+        # Strong matches first, then the tables they reference so joins stay possible
+        cutoff = max(scores.values()) / 3
+        ranked = sorted((n for n in scores if scores[n] >= cutoff), key=lambda n: scores[n], reverse=True)
+        selected = list(ranked)
+        for name in ranked:
+            for target, _ in self.tables[name].foreign_keys.values():
+                if target in self.tables and target not in selected:
+                    selected.append(target)
+        return selected
+
+    def build(self, question: str) -> str:
+        if self.token_budget <= 0:
+            # Budgeting disabled: the schema exactly as loaded
+            return self.schema
+        chosen, used = [], 0
+        for name in self.select_tables(question):
+            if used + self._tokens[name] > self.token_budget:
+                continue
+            chosen.append(name)
+            used += self._tokens[name]
+        return self._render(chosen)
+
+    def _render(self, names: List[str]) -> str:
+        lines = [self._rendered[name] for name in names]
+        if any(name.startswith("rollup_") for name in names):
+            lines.insert(0, ROLLUP_NOTE)
+        omitted = len(self.tables) - len(names)
+        if omitted > 0:
+            lines.append(f"-- {omitted} more tables exist; use sql_db_list_tables / sql_db_schema if you need them.")
+        return "\n".join(lines)
+
+    def _similarities(self, question: str) -> Dict[str, float]:
+        if self._vectors is None:
+            names = list(self.tables)
+            self._vectors = dict(zip(names, self.embeddings.embed_documents([self._rendered[n] for n in names])))
+        query = self.embeddings.embed_query(question)
+        return {name: cosine(query, vector) for name, vector in self._vectors.items()}
+
+
+def cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
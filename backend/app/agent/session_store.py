@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, Text, create_engine, delete, func, select
+)
+from sqlalchemy.engine import Engine
+
+from app.agent.turn_memory import CompactTurnMemory
+
+SESSION_TABLE = "chat_session_messages"
+
+
+class WindowedChatMessageHistory(BaseChatMessageHistory):
+    """In-process history that only ever keeps the last ``max_messages`` messages."""
+
+    def __init__(self, max_messages: int):
+        self._messages = deque(maxlen=max_messages)
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return list(self._messages)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self._messages.extend(messages)
+
+    def clear(self) -> None:
+        self._messages.clear()
+
+
+class SQLSessionHistory(BaseChatMessageHistory):
+    """History rows shared by every worker through a SQL table, trimmed to ``max_messages``."""
+
+    def __init__(self, store: "SQLSessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        table = self.store.table
+        query = (
+            select(table.c.message)
+            .where(table.c.session_id == self.session_id)
+            .order_by(table.c.id.desc())
+            .limit(self.store.max_messages)
+        )
+        with self.store.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in reversed(rows)])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        table = self.store.table
+        now = datetime.utcnow()
+        rows = [
+            {"session_id": self.session_id, "message": json.dumps(message_to_dict(m)), "created_at": now}
+            for m in messages
+        ]
+        with self.store.engine.begin() as conn:
+            conn.execute(table.insert(), rows)
+            # Drop everything older than the newest max_messages rows for this session
+            cutoff = conn.execute(
+                select(table.c.id)
+                .where(table.c.session_id == self.session_id)
+                .order_by(table.c.id.desc())
+                .offset(self.store.max_messages)
+                .limit(1)
+            ).scalar()
+            if cutoff is not None:
+                conn.execute(delete(table).where(table.c.session_id == self.session_id, table.c.id <= cutoff))
+        self.store.maybe_purge()
+
+    def clear(self) -> None:
+        table = self.store.table
+        with self.store.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.session_id == self.session_id))
+
+
+class SessionStore(ABC):
+    """Per-session chat history with bounded size and idle eviction.
+
+    The last ``window_turns`` turns are kept as compact records; memories handed to the LLM
+    replay only the newest ones that fit in ``history_tokens``, so the prompt cost of a session
+    stays flat no matter how long it runs.
+    """
+
+    def __init__(self, window_turns: int = 20, idle_ttl: float = 3600, history_tokens: int = 250):
+        self.window_turns = window_turns
+        self.max_messages = window_turns * 2
+        self.idle_ttl = idle_ttl
+        self.history_tokens = history_tokens
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> BaseChatMessageHistory:
+        ...
+
+    def has_history(self, session_id: str) -> bool:
+        return bool(self.get_history(session_id).messages)
+
+    def get_memory(self, session_id: str) -> CompactTurnMemory:
+        return CompactTurnMemory(
+            chat_memory=self.get_history(session_id),
+            token_budget=self.history_tokens,
+            memory_key="chat_history",
+            input_key="input",
+            output_key="output",
+            return_messages=True
+        )
+
+
+class InMemorySessionStore(SessionStore):
+    def __init__(self, max_sessions: int = 1000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, WindowedChatMessageHistory]" = OrderedDict()
+        self._last_seen = {}
+        self._lock = threading.Lock()
+
+    def get_history(self, session_id: str) -> BaseChatMessageHistory:
+        with self._lock:
+            self._evict_idle()
+            history = self._sessions.get(session_id)
+            if history is None:
+                history = WindowedChatMessageHistory(self.max_messages)
+                self._sessions[session_id] = history
+            self._sessions.move_to_end(session_id)
+            self._last_seen[session_id] = time.monotonic()
+
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self._last_seen.pop(evicted, None)
+            return history
+
+    def has_history(self, session_id: str) -> bool:
+        with self._lock:
+            history = self._sessions.get(session_id)
+            return history is not None and bool(history.messages)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        # Oldest-accessed sessions sit at the front of the LRU order
+        while self._sessions:
+            session_id = next(iter(self._sessions))
+            if self._last_seen.get(session_id, 0) >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self._last_seen.pop(session_id, None)
+
+
+class SQLSessionStore(SessionStore):
+    """Shared backend for multi-worker deployments (SQLite file or Postgres)."""
+
+    def __init__(self, engine: Engine, purge_interval: float = 300, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        metadata = MetaData()
+        self.table = Table(
+            SESSION_TABLE, metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("session_id", String(255), nullable=False, index=True),
+            Column("message", Text, nullable=False),
+            Column("created_at", DateTime, nullable=False),
+        )
+        metadata.create_all(engine)
+
+    def get_history(self, session_id: str) -> BaseChatMessageHistory:
+        return SQLSessionHistory(self, session_id)
+
+    def maybe_purge(self) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self.purge_idle()
+
+    def purge_idle(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.idle_ttl)
+        idle = (
+            select(self.table.c.session_id)
+            .group_by(self.table.c.session_id)
+            .having(func.max(self.table.c.created_at) < cutoff)
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(delete(self.table).where(self.table.c.session_id.in_(idle))).rowcount
+
+
+def create_session_store(default_engine: Optional[Engine] = None) -> SessionStore:
+    options = {
+        "window_turns": int(os.getenv("SESSION_WINDOW_TURNS", "20")),
+        "idle_ttl": float(os.getenv("SESSION_IDLE_TTL", "3600")),
+        "history_tokens": int(os.getenv("SESSION_HISTORY_TOKENS", "250")),
+    }
+    backend = os.getenv("SESSION_STORE", "memory")
+
+    if backend == "memory":
+        return InMemorySessionStore(max_sessions=int(os.getenv("SESSION_MAX", "1000")), **options)
+    if backend == "sql":
+        url = os.getenv("SESSION_STORE_URL")
+        return SQLSessionStore(create_engine(url) if url else default_engine, **options)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
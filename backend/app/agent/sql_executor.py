@@ -0,0 +1,268 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.agent.query_log import QueryLog, create_query_log
+from app.agent.replica import AnalyticsReplica
+from app.agent.result_cache import ResultCache, postgres_table_versions
+from app.agent.sql_validation import clean_sql, strip_comments
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+RESULT_HANDLE_PATTERN = re.compile(r"result_handle=([0-9a-f]{32})")
+
+
+@dataclass
+class QueryResult:
+    columns: List[str]
+    rows: List[Tuple[Any, ...]]
+    truncated: bool = False
+    handle: Optional[str] = None
+    # Rows read past the LLM's cap for the client payload; complete is False if even those stop short
+    extra_rows: List[Tuple[Any, ...]] = field(default_factory=list)
+    complete: bool = True
+    # Served by the analytics replica rather than the primary
+    replica: bool = False
+
+    @property
+    def data_rows(self) -> List[Tuple[Any, ...]]:
+        return self.rows + self.extra_rows
+
+    def for_llm(self) -> str:
+        # Same shape as SQLDatabase.run so the agent's prompts and parsers keep working
+        text = str(self.rows) if self.rows else ""
+        if self.truncated:
+            text += (
+                f"\n[Only the first {len(self.rows)} rows are shown. The full result is paged to the "
+                f"client as result_handle={self.handle}; summarize these rows instead of fetching more.]"
+            )
+        return text
+
+
+# Every result executed during the current request; the engine turns the last one into client data
+captured_results: ContextVar[Optional[List[QueryResult]]] = ContextVar("captured_results", default=None)
+
+
+@contextmanager
+def capture_results() -> Iterator[List[QueryResult]]:
+    results: List[QueryResult] = []
+    previous = captured_results.get()
+    captured_results.set(results)
+    try:
+        yield results
+    finally:
+        captured_results.set(previous)
+
+
+@dataclass
+class ResultHandle:
+    sql: str
+    columns: List[str]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class QueryExecutor:
+    """Runs agent SQL with a server-side cursor and caps what flows back into the LLM.
+
+    Rows are streamed until ``max_rows`` or ``max_bytes`` is reached; up to ``data_rows`` in total
+    are kept for the client's chart data but never shown to the LLM. When a result is cut
+    short, its SQL is kept behind a handle so clients can page through the full result
+    without it ever being materialized in this process or in the prompt. With a ``result_cache``,
+    repeated queries (after canonicalization) are answered from memory. With a ``replica``,
+    queries it accepts run there first and fall back to ``engine`` if the replica errors.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_rows: int = 50,
+        max_bytes: int = 8000,
+        handle_ttl: float = 3600,
+        max_handles: int = 256,
+        data_rows: int = 5000,
+        query_log: Optional[QueryLog] = None,
+        result_cache: Optional[ResultCache] = None,
+        replica: Optional[AnalyticsReplica] = None,
+    ):
+        self.engine = engine
+        self.query_log = query_log
+        self.result_cache = result_cache
+        self.replica = replica
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.handle_ttl = handle_ttl
+        self.max_handles = max_handles
+        self.data_rows = data_rows
+        self._handles: "OrderedDict[str, ResultHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def execute(self, sql: str) -> QueryResult:
+        key = self.result_cache.key(sql) if self.result_cache else None
+        if key is not None:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                # A truncated result gets a fresh handle; the one issued with the original may have expired
+                handle = self._register(sql, cached.columns) if cached.truncated else None
+                return self._capture(QueryResult(
+                    columns=cached.columns, rows=cached.rows, truncated=cached.truncated, handle=handle,
+                    extra_rows=cached.extra_rows, complete=cached.complete,
+                ))
+
+        start = time.perf_counter()
+        try:
+            result = self._execute(sql)
+        except SQLAlchemyError as e:
+            if self.query_log:
+                self.query_log.record(sql, time.perf_counter() - start, error=str(e).split("\n")[0])
+            raise
+        if self.query_log:
+            self.query_log.record(sql, time.perf_counter() - start, rows=len(result.rows), replica=result.replica)
+        if key is not None:
+            self.result_cache.put(key, result)
+        return self._capture(result)
+
+    def _capture(self, result: QueryResult) -> QueryResult:
+        results = captured_results.get()
+        if results is not None:
+            results.append(result)
+        return result
+
+    def _routed(self, sql: str, run: Callable[[Engine], Any]) -> Any:
+        replica = self.replica.route(sql) if self.replica else None
+        if replica is not None:
+            try:
+                result = run(replica)
+                metrics.incr("replica_queries")
+                return result
+            except SQLAlchemyError as e:
+                # DuckDB speaks most, not all, of Postgres' SQL; the primary gets the last word
+                metrics.incr("replica_fallbacks")
+                logger.warning(f"⚠️ Replica could not run query, using the primary: {str(e).splitlines()[0]}")
+        return run(self.engine)
+
+    def _execute(self, sql: str) -> QueryResult:
+        return self._routed(sql, lambda engine: self._fetch(engine, sql))
+
+    def _fetch(self, engine: Engine, sql: str) -> QueryResult:
+        rows: List[Tuple[Any, ...]] = []
+        extra_rows: List[Tuple[Any, ...]] = []
+        size = 0
+        truncated = False
+        complete = True
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=self.max_rows + 1).execute(sql_text(sql))
+            columns = list(result.keys())
+            for row in result:
+                row = tuple(row)
+                if truncated or len(rows) >= self.max_rows or size >= self.max_bytes:
+                    truncated = True
+                    if len(rows) + len(extra_rows) >= self.data_rows:
+                        complete = False
+                        break
+                    extra_rows.append(row)
+                    continue
+                size += len(repr(row))
+                rows.append(row)
+            result.close()
+
+        metrics.observe("agent_sql_rows_returned", len(rows))
+        handle = self._register(sql, columns) if truncated else None
+        if truncated:
+            metrics.incr("agent_sql_truncated_results")
+        return QueryResult(
+            columns=columns, rows=rows, truncated=truncated, handle=handle, extra_rows=extra_rows, complete=complete,
+            replica=engine is not self.engine,
+        )
+
+    def run_for_llm(self, sql: str) -> str:
+        try:
+            return self.execute(sql).for_llm()
+        except SQLAlchemyError as e:
+            # Same contract as SQLDatabase.run_no_throw: the agent reads the error and retries
+            return f"Error: {e}"
+
+    def fetch_page(self, handle_id: str, page: int = 1, page_size: int = 100) -> Optional[Dict[str, Any]]:
+        handle = self._get_handle(handle_id)
+        if handle is None:
+            return None
+
+        query = sql_text(f"SELECT * FROM ({handle.sql}) AS paged_result LIMIT :limit OFFSET :offset")
+
+        def fetch(engine: Engine):
+            with engine.connect() as conn:
+                return conn.execute(query, {"limit": page_size + 1, "offset": (page - 1) * page_size}).fetchall()
+
+        rows = self._routed(handle.sql, fetch)
+        return {
+            "result_handle": handle_id,
+            "columns": handle.columns,
+            "rows": [list(row) for row in rows[:page_size]],
+            "page": page,
+            "page_size": page_size,
+            "has_more": len(rows) > page_size,
+        }
+
+    def _register(self, sql: str, columns: List[str]) -> str:
+        # Pages wrap the query in a subquery, where a trailing ";" or "-- comment" would break it
+        sql = clean_sql(strip_comments(sql))
+        handle_id = uuid.uuid4().hex
+        with self._lock:
+            self._handles[handle_id] = ResultHandle(sql=sql, columns=columns)
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+        return handle_id
+
+    def _get_handle(self, handle_id: str) -> Optional[ResultHandle]:
+        with self._lock:
+            handle = self._handles.get(handle_id)
+            if handle is None:
+                return None
+            if time.monotonic() - handle.created_at > self.handle_ttl:
+                del self._handles[handle_id]
+                return None
+            return handle
+
+
+class BoundedQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """Drop-in ``sql_db_query`` tool that executes through a QueryExecutor."""
+
+    executor: Any
+
+    def _run(self, query: str, run_manager: Any = None) -> str:
+        return self.executor.run_for_llm(query)
+
+
+def create_result_cache(engine: Engine) -> ResultCache:
+    # Postgres exposes per-table write counters; elsewhere entries live until the TTL or an explicit invalidate()
+    versions_fn = (lambda: postgres_table_versions(engine)) if engine.dialect.name == "postgresql" else None
+    return ResultCache(
+        max_bytes=int(os.getenv("SQL_RESULT_CACHE_BYTES", "16000000")),
+        ttl_seconds=float(os.getenv("SQL_RESULT_CACHE_TTL", "300")),
+        versions_fn=versions_fn,
+        check_interval=float(os.getenv("SQL_RESULT_CACHE_CHECK_SECONDS", "5")),
+    )
+
+
+def create_query_executor(engine: Engine, replica: Optional[AnalyticsReplica] = None) -> QueryExecutor:
+    return QueryExecutor(
+        engine,
+        max_rows=int(os.getenv("AGENT_MAX_ROWS", "50")),
+        max_bytes=int(os.getenv("AGENT_MAX_RESULT_BYTES", "8000")),
+        handle_ttl=float(os.getenv("RESULT_HANDLE_TTL", "3600")),
+        data_rows=int(os.getenv("RESULT_DATA_ROWS", "5000")),
+        query_log=create_query_log(engine),
+        result_cache=create_result_cache(engine),
+        replica=replica,
+    )
@@ -0,0 +1,48 @@
+import re
+from typing import Iterable, Set
+
+WRITE_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|merge|drop|alter|create|truncate|grant|revoke|copy|vacuum|comment|call|do)\b"
+)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# EXTRACT(DOW FROM order_date) and friends use FROM without naming a table
+FROM_FUNCTIONS = re.compile(r"\b(extract|substring|trim|overlay|position)\s*\([^()]*\)")
+TABLE_REFERENCE = re.compile(r"\b(?:from|join)\s+([a-z_][\w.\"]*)")
+CTE_NAME = re.compile(r"(?:\bwith|,)\s*(?:recursive\s+)?([a-z_]\w*)\s+as\s*\(")
+# Literals and quoted identifiers are matched first so a "--" or "/*" inside them isn't taken for a comment
+LITERAL_OR_COMMENT = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def clean_sql(text: str) -> str:
+    text = text.replace("```sql", "").replace("```", "").strip()
+    text = re.sub(r"^(sql\s*query|sql)\s*:\s*", "", text, flags=re.IGNORECASE)
+    return text.strip().rstrip(";").strip()
+
+
+def strip_comments(sql: str) -> str:
+    return LITERAL_OR_COMMENT.sub(lambda m: " " if m.group(0)[0] in "-/" else m.group(0), sql)
+
+
+def referenced_tables(sql: str) -> Set[str]:
+    lowered = FROM_FUNCTIONS.sub("()", STRING_LITERAL.sub("''", sql.lower()))
+    ctes = set(CTE_NAME.findall(lowered))
+    tables = {name.replace('"', "").split(".")[-1] for name in TABLE_REFERENCE.findall(lowered)}
+    return tables - ctes
+
+
+def validate_sql(sql: str, known_tables: Iterable[str]) -> None:
+    """Cheap local checks before a generated query touches the database; raises ValueError."""
+    if not sql:
+        raise ValueError("Empty SQL")
+
+    lowered = STRING_LITERAL.sub("''", sql.lower())
+    if ";" in lowered:
+        raise ValueError("Only a single SQL statement is allowed")
+    if not re.match(r"^\s*(select|with)\b", lowered):
+        raise ValueError("Only SELECT queries are allowed")
+    if WRITE_KEYWORDS.search(lowered):
+        raise ValueError("Query contains a write or DDL keyword")
+
+    unknown = referenced_tables(sql) - {t.lower() for t in known_tables}
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
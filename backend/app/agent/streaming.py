@@ -0,0 +1,41 @@
+import json
+from typing import Any, Dict
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+def format_ndjson(item: Dict[str, Any]) -> str:
+    return json.dumps(item, default=str) + "\n"
+
+
+class FinalAnswerFilter:
+    """Turns raw ReAct token streams into only the text after ``Final Answer:``.
+
+    Every LLM call in the agent loop streams Thought/Action text too; tokens are buffered
+    per run until the marker shows up and only what follows it is released.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, str] = {}
+        self._emitted: Dict[str, int] = {}
+
+    def feed(self, run_id: str, token: str) -> str:
+        buffer = self._buffers.get(run_id, "") + token
+        self._buffers[run_id] = buffer
+        if FINAL_ANSWER_MARKER not in buffer:
+            return ""
+
+        answer = buffer.split(FINAL_ANSWER_MARKER, 1)[1]
+        emitted = self._emitted.get(run_id)
+        if emitted is None:
+            # Drop the space after the marker before the first token goes out
+            stripped = answer.lstrip()
+            emitted = len(answer) - len(stripped)
+            if not stripped:
+                return ""
+        self._emitted[run_id] = len(answer)
+        return answer[emitted:]
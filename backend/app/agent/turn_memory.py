@@ -0,0 +1,131 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.utils.tokens import count_tokens
+
+SUMMARY_ROWS = 3
+SUMMARY_VALUE_CHARS = 40
+
+
+def result_summary(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Row count, column names and the first few rows of a columnar result (see chart_data)."""
+    if not data or not data["columns"]:
+        return None
+    names = [c["name"] for c in data["columns"]]
+    rows = list(zip(*data["values"]))[:SUMMARY_ROWS]
+    shown = "; ".join(
+        ", ".join(str(v)[:SUMMARY_VALUE_CHARS] for v in row) for row in rows
+    )
+    count = f"{data['row_count']}{'' if data['complete'] else '+'} rows"
+    return f"{count} ({', '.join(names)})" + (f": {shown}" if shown else "") + (" ..." if data["row_count"] > len(rows) else "")
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    # Cut proportionally, then trim until it fits
+    cut = text[:max(len(text) * max_tokens // tokens, 1)]
+    while count_tokens(cut + " ...") > max_tokens and len(cut) > 1:
+        cut = cut[:int(len(cut) * 0.9)]
+    return cut.rstrip() + " ..."
+
+
+def prompt_tokens(messages: List[BaseMessage]) -> int:
+    return sum(count_tokens(str(m.content)) for m in messages)
+
+
+@dataclass
+class TurnRecord:
+    question: str
+    answer: str
+    sql: Optional[str] = None
+    result: Optional[str] = None
+
+    def to_messages(self) -> List[BaseMessage]:
+        # The record rides on the AI message so every history backend stores it unchanged
+        return [
+            HumanMessage(content=self.question),
+            AIMessage(content=self.answer, additional_kwargs={"sql": self.sql, "result": self.result}),
+        ]
+
+    def to_prompt(self, answer_tokens: int, brief: bool = False, field_tokens: Optional[int] = None) -> List[BaseMessage]:
+        """Prompt messages for this turn. A ``brief`` turn keeps only the question and its SQL
+        (the answer when there is no SQL); ``field_tokens`` caps every field."""
+
+        def cap(text: str) -> str:
+            return truncate_tokens(text, field_tokens) if field_tokens else text
+
+        lines = []
+        if not (brief and self.sql):
+            lines.append(cap(truncate_tokens(self.answer, answer_tokens)))
+        if self.sql:
+            lines.append(f"SQL: {cap(self.sql)}")
+        if self.result and not brief:
+            lines.append(f"Result: {cap(self.result)}")
+        return [HumanMessage(content=cap(self.question)), AIMessage(content="\n".join(lines))]
+
+
+class CompactTurnMemory(BaseChatMemory):
+    """Session memory that keeps one compact record per turn: question, final SQL, a result
+    summary and the answer. Prompts get the newest records that fit in ``token_budget``, so the
+    history costs the same on the 50th turn as on the 5th. The latest turn is always included,
+    with its answer cut to ``answer_tokens`` and its result summary; earlier turns keep only
+    the question and SQL.
+    """
+
+    memory_key: str = "chat_history"
+    token_budget: int = 250
+    answer_tokens: int = 30
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def records(self) -> List[TurnRecord]:
+        records, question = [], None
+        for message in self.chat_memory.messages:
+            if isinstance(message, HumanMessage):
+                question = str(message.content)
+            elif isinstance(message, AIMessage) and question is not None:
+                extra = message.additional_kwargs
+                records.append(TurnRecord(question, str(message.content), extra.get("sql"), extra.get("result")))
+                question = None
+        return records
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, List[BaseMessage]]:
+        messages: List[BaseMessage] = []
+        used = 0
+        for record in reversed(self.records()):
+            # Follow-ups mostly refer to the latest turn; earlier ones only need what was asked and queried
+            turn = record.to_prompt(self.answer_tokens, brief=bool(messages))
+            tokens = prompt_tokens(turn)
+            if used + tokens > self.token_budget:
+                if messages:
+                    break
+                turn, tokens = self._fit(record)
+            messages = turn + messages
+            used += tokens
+        return {self.memory_key: messages}
+
+    def _fit(self, record: TurnRecord) -> Tuple[List[BaseMessage], int]:
+        # The latest turn alone is over budget: cap every field, tighter until the whole turn fits
+        field_tokens = self.token_budget // 4
+        while True:
+            turn = record.to_prompt(min(self.answer_tokens, field_tokens), field_tokens=field_tokens)
+            tokens = prompt_tokens(turn)
+            if tokens <= self.token_budget or field_tokens == 1:
+                return turn, tokens
+            field_tokens = max(field_tokens * 3 // 4, 1)
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        question, answer = self._get_input_output(inputs, outputs)
+        self.chat_memory.add_messages(TurnRecord(question, answer, outputs.get("sql"), outputs.get("result")).to_messages())
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        # BaseChatMemory's version writes a plain question/answer pair; the history backends are blocking
+        await asyncio.to_thread(self.save_context, inputs, outputs)
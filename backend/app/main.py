@@ -1,10 +1,86 @@
 # app/main.py
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.agent.default_engine import (
+    add_engine_listener,
+    get_query_engine,
+    remove_engine_listener,
+    started_query_engine,
+)
 from app.routes import chat
+from app.utils.logger import logger, request_id_var
+from app.utils.metrics import metrics
+
+# Filled in by the startup warm-up; /ready reports it
+startup_state: Dict[str, Any] = {"error": None, "seconds": None}
+# Retry delays while the database is not reachable yet, e.g. a compose Postgres still booting
+STARTUP_RETRY_SECONDS = 1.0
+STARTUP_RETRY_MAX_SECONDS = 30.0
+# Rollup refresh and replica sync loops, started once per engine
+background_tasks: Dict[int, List[asyncio.Task]] = {}
+
+
+def start_background(engine) -> None:
+    if id(engine) in background_tasks:
+        return
+    loops = []
+    if engine.rollups:
+        loops.append(engine.rollups.refresh_forever(float(os.getenv("ROLLUP_REFRESH_SECONDS", "300"))))
+    if engine.replica:
+        loops.append(engine.replica.sync_forever(float(os.getenv("REPLICA_SYNC_SECONDS", "900"))))
+    background_tasks[id(engine)] = [asyncio.create_task(loop) for loop in loops]
+
+
+async def warm_up() -> None:
+    # Builds the engine and agent off the event loop, so /health answers while this runs
+    start = time.perf_counter()
+    delay = STARTUP_RETRY_SECONDS
+    while True:
+        try:
+            engine = await asyncio.to_thread(get_query_engine)
+            await asyncio.to_thread(engine.warm)
+            break
+        except Exception as e:
+            startup_state["error"] = str(e)
+            metrics.incr("startup_warm_errors")
+            logger.error(f"[STARTUP] ❌ Query engine failed to start, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_SECONDS)
+    startup_state.update(error=None, seconds=round(time.perf_counter() - start, 3))
+    metrics.set_gauge("startup_warm_seconds", startup_state["seconds"])
+    logger.info(f"[STARTUP] ✅ Query engine ready in {startup_state['seconds']}s")
+    start_background(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+
+    def engine_built(engine) -> None:
+        # A request may build the engine before the warm-up does; its loops start either way
+        loop.call_soon_threadsafe(start_background, engine)
 
-app = FastAPI(title="ChipChip AI Agent")
+    add_engine_listener(engine_built)
+    startup_task = asyncio.create_task(warm_up())
+    yield
+    remove_engine_listener(engine_built)
+    startup_task.cancel()
+    for tasks in background_tasks.values():
+        for task in tasks:
+            task.cancel()
+    background_tasks.clear()
+
+
+app = FastAPI(title="ChipChip AI Agent", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,8 +88,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+
+@app.middleware("http")
+async def add_request_id(request: Request, call_next):
+    # Every log line and trace of this request carries the ID; clients may pass their own
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # ✅ Only include what you're using
 app.include_router(chat.router)
 # app.include_router(examples.router)
@@ -21,4 +112,31 @@ app.include_router(chat.router)
 
 @app.get("/health")
 def health_check():
+    # Liveness: the process is serving; says nothing about the database or the agent
     return {"status": "healthy", "message": "Service is up and running"}
+
+
+@app.get("/ready")
+def readiness_check():
+    # Readiness: the engine is built (by the warm-up or a request) and the database answers
+    engine = started_query_engine()
+    if engine is None:
+        status = "retrying" if startup_state["error"] else "starting"
+        return JSONResponse(status_code=503, content={"status": status, "error": startup_state["error"]})
+    try:
+        engine.ping()
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "database unavailable", "error": str(e)})
+    return {"status": "ready", "startup_seconds": startup_state["seconds"]}
+
+
+@app.get("/metrics")
+def metrics_snapshot():
+    from app.utils.database import pool_status
+
+    engine = started_query_engine()
+    return {
+        **metrics.snapshot(),
+        "answer_cache": engine.answer_cache.stats() if engine else None,
+        "db_pool": pool_status(),
+    }
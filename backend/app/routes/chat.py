@@ -1,8 +1,12 @@
 # app/routes/chat.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-from app.agent.query_engine import default_query_engine
+from sqlalchemy.exc import SQLAlchemyError
+import os
+from typing import List, Optional
+from app.agent.default_engine import get_query_engine
+from app.agent.streaming import format_ndjson, format_sse
 from app.utils.logger import logger
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
@@ -11,17 +15,29 @@ class ChatRequest(BaseModel):
     question: str
     session_id: Optional[str] = None
 
+class BatchRequest(BaseModel):
+    questions: List[str]
+    concurrency: Optional[int] = None
+
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "200"))
+
 @router.post("/")
-async def chat_with_agent(request: ChatRequest):
+async def chat_with_agent(request: ChatRequest, engine=Depends(get_query_engine)):
     try:
         session_id = request.session_id or "frontend-session"
         logger.info(f"[CHAT] ❓ {request.question} | Session: {session_id}")
 
-        result = default_query_engine.run_query(
+        result = await engine.arun_query(
             question=request.question,
             session_id=session_id
         )
 
+        if "retry_after" in result:
+            # Queue in front of the LLM is full; tell the client when to come back
+            logger.warning(f"[CHAT] ⏳ {result['error']}")
+            raise HTTPException(
+                status_code=503, detail=result["error"], headers={"Retry-After": str(result["retry_after"])}
+            )
         if "error" in result:
             logger.error(f"[CHAT] ❌ {result['error']}")
             raise HTTPException(status_code=500, detail=result["error"])
@@ -29,9 +45,73 @@ async def chat_with_agent(request: ChatRequest):
         return {
             "status": "success",
             "answer": result["answer"],
-            "session_id": session_id
+            "session_id": session_id,
+            "result_handle": result.get("result_handle"),
+            # Rows of the query behind the answer, as columns, and a chart inferred from their types
+            "data": result.get("data"),
+            "chart": result.get("chart")
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[CHAT] 🔥 Unexpected Error: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/results/{result_handle}")
+def get_result_page(
+    result_handle: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    engine=Depends(get_query_engine)
+):
+    # Full results of queries that were cut short before reaching the LLM
+    try:
+        result = engine.executor.fetch_page(result_handle, page=page, page_size=page_size)
+    except SQLAlchemyError as e:
+        message = str(e).splitlines()[0]
+        logger.error(f"[CHAT] ❌ Result page {page} of {result_handle} failed: {message}")
+        raise HTTPException(status_code=500, detail=f"Could not fetch result page: {message}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return result
+
+
+@router.post("/stream")
+async def stream_chat_with_agent(request: ChatRequest, engine=Depends(get_query_engine)):
+    session_id = request.session_id or "frontend-session"
+    logger.info(f"[CHAT] ❓ (stream) {request.question} | Session: {session_id}")
+
+    async def event_stream():
+        async for event in engine.astream_query(
+            question=request.question,
+            session_id=session_id
+        ):
+            if event["event"] == "error":
+                logger.error(f"[CHAT] ❌ {event['data']['error']}")
+            yield format_sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/batch")
+async def batch_chat_with_agent(request: BatchRequest, engine=Depends(get_query_engine)):
+    # One NDJSON line per question, in completion order; each line carries its input index
+    if not request.questions or len(request.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {BATCH_MAX_QUESTIONS} questions")
+    if request.concurrency is not None and request.concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be at least 1")
+    logger.info(f"[CHAT] 📦 Batch of {len(request.questions)} questions")
+
+    async def lines():
+        async for item in engine.abatch_query(request.questions, concurrency=request.concurrency):
+            if "error" in item:
+                logger.error(f"[CHAT] ❌ Batch item {item['index']}: {item['error']}")
+            yield format_ndjson(item)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
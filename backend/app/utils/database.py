@@ -1,9 +1,141 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Dict, Optional
 
-DATABASE_URL = os.getenv("DATABASE_URL")  # Use env var in Render
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL is not set")
+from app.utils.metrics import metrics
 
-engine = create_engine(DATABASE_URL)
+# Pool settings; the engine is shared by the agent's tools, name lookups and the caches
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+AGENT_STATEMENT_TIMEOUT_MS = int(os.getenv("AGENT_STATEMENT_TIMEOUT_MS", "15000"))
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        # Time spent here is time a request waited for a free connection
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db_pool_checkout_wait_seconds", time.perf_counter() - start)
+
+
+def create_db_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=DB_POOL_PRE_PING)
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+def database_url() -> str:
+    url = os.getenv("DATABASE_URL")  # Use env var in Render
+    if not url:
+        raise ValueError("DATABASE_URL is not set")
+    # Render hands out postgres:// URLs, which SQLAlchemy no longer accepts
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+# Created on first use so importing the app (and serving /health) never waits on the database
+_engine: Optional[Engine] = None
+_agent_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    global _engine, _agent_engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_db_engine(database_url())
+                instrument_engine(engine)
+                # Same pool, but transactions opened through it are marked as running agent-generated SQL
+                _agent_engine = engine.execution_options(agent_sql=True)
+                _engine = engine
+    return _engine
+
+
+def instrument_engine(engine: Engine) -> None:
+    # Query timings, trace spans and the agent statement timeout; also used for the analytics replica
+    event.listen(engine, "begin", _apply_agent_statement_timeout)
+    event.listen(engine, "before_cursor_execute", _start_query_timer)
+    event.listen(engine, "after_cursor_execute", _record_query_time)
+    event.listen(engine, "handle_error", _discard_query_timer)
+
+
+def get_agent_engine() -> Engine:
+    get_engine()
+    return _agent_engine
+
+
+def engine_started() -> bool:
+    return _engine is not None
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from app.utils.database import engine` working for scripts, without creating it at import
+    if name == "engine":
+        return get_engine()
+    if name == "agent_engine":
+        return get_agent_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _apply_agent_statement_timeout(conn):
+    if conn.dialect.name == "postgresql" and conn.get_execution_options().get("agent_sql"):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {AGENT_STATEMENT_TIMEOUT_MS}")
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    # Imported here: tracing pulls in langchain_core, which app startup shouldn't pay for
+    from app.utils.tracing import current_trace
+
+    start = conn.info["query_start_time"].pop()
+    elapsed = time.perf_counter() - start
+    metrics.observe("db_query_seconds", elapsed)
+    agent_sql = bool(conn.get_execution_options().get("agent_sql"))
+    if agent_sql:
+        metrics.observe("agent_sql_seconds", elapsed)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span("sql", " ".join(statement.split())[:200], start, elapsed, agent=agent_sql)
+
+
+def _discard_query_timer(context):
+    if context.connection is not None and context.connection.info.get("query_start_time"):
+        context.connection.info["query_start_time"].pop()
+
+
+def pool_status() -> Dict[str, Any]:
+    if _engine is None:
+        return {"pool": None}
+    pool = _engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
@@ -1,112 +1,270 @@
-import pandas as pd
-import random
-from faker import Faker
-from datetime import datetime, timedelta
+import argparse
+import time
 from pathlib import Path
 
-# Setup
-fake = Faker()
+import numpy as np
+import pandas as pd
+
+# Tables are shaped like database/schema.sql and written in dependency order,
+# so loading them one after another keeps every foreign key satisfied
 DATA_DIR = Path("backend/data")
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# Row counts at scale factor 1; the lookup tables below stay fixed
+BASE_COUNTS = {
+    "users": 200,
+    "group_leaders": 40,
+    "group_deals": 50,
+    "groups": 100,
+    "group_members": 400,
+    "orders": 2200,
+}
+CHUNK_SIZE = 250_000
+DATE_RANGE_DAYS = 730
+# Fixed reference point so a given seed always produces the same timestamps
+END_DATE = np.datetime64("2025-01-01T00:00:00", "s")
+
+# Table codes go in the top bits of each UUID; the low bits are the row index
+TABLE_CODES = {
+    "users": 1, "categories": 2, "products": 3, "campaigns": 4, "group_deals": 5,
+    "groups": 6, "group_members": 7, "orders": 8, "order_items": 9,
+}
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+NIBBLE_SHIFTS = np.arange(60, -4, -4, dtype=np.int64)
+
+CHANNELS = np.array(["organic", "referral", "paid ad", "email", "influencer"])
+SEGMENTS = np.array(["Working Professionals", "Students", "Parents", "Seniors"])
+FIRST_NAMES = np.array(["Abebe", "Almaz", "Dawit", "Hana", "Kebede", "Liya", "Meron", "Samuel", "Selam", "Yonas"])
+LAST_NAMES = np.array(["Alemu", "Bekele", "Girma", "Haile", "Kassa", "Mengistu", "Tadesse", "Tesfaye", "Wolde", "Zewdu"])
+CATEGORIES = ["Fresh Produce", "Dairy", "Meat", "Snacks", "Bakery"]
+PRODUCT_DEFS = [
+    ("Carrot", "Fresh Produce", 1.2), ("Apple", "Fresh Produce", 0.8), ("Banana", "Fresh Produce", 0.6),
+    ("Tomato", "Fresh Produce", 1.0), ("Spinach", "Fresh Produce", 0.9), ("Milk", "Dairy", 1.5),
+    ("Cheese", "Dairy", 4.5), ("Chicken", "Meat", 6.0), ("Beef", "Meat", 8.5),
+    ("Chips", "Snacks", 2.0), ("Biscuits", "Snacks", 1.8), ("Bread", "Bakery", 1.4),
+]
+CAMPAIGN_CHANNELS = ["facebook", "influencer", "email", "tiktok"]
+CAMPAIGN_COUNT = 12
+# Share of orders placed through a group; the rest are solo orders with no groups_carts_id
+GROUP_ORDER_SHARE = 0.7
+
 
 # Debug logger
 def log(msg):
     print(f"[DEBUG] {msg}")
 
-# Constants
-CHANNELS = ['organic', 'referral', 'paid_ad']
-CAMPAIGNS = ['facebook', 'influencer', 'google_ads']
-SEGMENTS = ['Working Professionals', 'Students', 'Parents', 'Retired']
-PRODUCT_DEFS = [
-    {"name": "Carrot", "category": "vegetable", "price": 1.2, "is_fresh_produce": True},
-    {"name": "Apple", "category": "fruit", "price": 0.8, "is_fresh_produce": True},
-    {"name": "Banana", "category": "fruit", "price": 0.6, "is_fresh_produce": True},
-    {"name": "Rice", "category": "grain", "price": 2.2, "is_fresh_produce": False},
-    {"name": "Tomato", "category": "vegetable", "price": 1.0, "is_fresh_produce": True},
-    {"name": "Lentils", "category": "grain", "price": 3.0, "is_fresh_produce": False},
-    {"name": "Orange", "category": "fruit", "price": 1.1, "is_fresh_produce": True},
-    {"name": "Spinach", "category": "vegetable", "price": 0.9, "is_fresh_produce": True},
-    {"name": "Quinoa", "category": "grain", "price": 4.0, "is_fresh_produce": False},
-    {"name": "Pear", "category": "fruit", "price": 1.3, "is_fresh_produce": True}
-]
 
-# Generate users
-log("Generating users...")
-users = []
-for i in range(1, 201):
-    signup_offset = random.randint(0, 180)
-    signup_date = datetime.now() - timedelta(days=signup_offset)
-    users.append({
-        "id": i,
-        "name": fake.name(),
-        "email": fake.unique.email(),
-        "channel": random.choice(CHANNELS),
-        "acquisition_campaign": random.choice(CAMPAIGNS),
-        "signup_date": signup_date,
-        "segment": random.choice(SEGMENTS),
-        "created_at": signup_date
-    })
-log(f"✅ Created {len(users)} users.")
-
-# Group leaders
-log("Generating group leaders...")
-group_leaders = [{"id": i+1, "user_id": users[i]["id"], "created_at": users[i]["created_at"]} for i in range(40)]
-log(f"✅ Created {len(group_leaders)} group leaders.")
-
-# Products
-log("Generating products...")
-products = [{"id": i+1, **prod, "created_at": datetime.now()} for i, prod in enumerate(PRODUCT_DEFS)]
-price_lookup = {p["id"]: p["price"] for p in products}
-log(f"✅ Created {len(products)} products.")
-
-# Orders + OrderItems
-log("Generating orders and order items with total order value and is_first_order...")
-orders = []
-order_items = []
-order_id_counter = 1
-order_item_id = 1
-user_first_order_flag = {}
-
-for _ in range(2200):
-    user = random.choice(users)
-    group_leader = random.choice(group_leaders)
-    timestamp = user["signup_date"] + timedelta(days=random.randint(0, 120), hours=random.randint(6, 22))
-    is_first_order = not user_first_order_flag.get(user["id"], False)
-    user_first_order_flag[user["id"]] = True
-
-    items = []
-    total_value = 0.0
-    for _ in range(random.randint(1, 4)):
-        product = random.choice(products)
-        quantity = random.randint(1, 5)
-        price = price_lookup[product["id"]]
-        total_value += price * quantity
-        items.append({
-            "id": order_item_id,
-            "order_id": order_id_counter,
-            "product_id": product["id"],
+def entity_ids(table, index):
+    # Same text as str(uuid.UUID(int=(code << 96) | index)), built as a byte matrix for the whole array
+    out = np.empty((len(index), 36), dtype=np.uint8)
+    out[:] = np.frombuffer(f"{TABLE_CODES[table]:08x}-0000-0000-0000-000000000000".encode(), dtype=np.uint8)
+    nibbles = HEX_DIGITS[(np.asarray(index, dtype=np.int64)[:, None] >> NIBBLE_SHIFTS) & 0xF]
+    out[:, 19:23] = nibbles[:, :4]
+    out[:, 24:] = nibbles[:, 4:]
+    return out.view("S36").ravel().astype("U36")
+
+
+def chunk_rng(seed, table, chunk_no):
+    # Each chunk gets its own stream, so output does not depend on what was generated before it
+    return np.random.default_rng([seed, TABLE_CODES[table], chunk_no])
+
+
+def random_dates(rng, size, days=DATE_RANGE_DAYS):
+    return pd.to_datetime(END_DATE - rng.integers(0, days * 86400, size).astype("timedelta64[s]"))
+
+
+def scaled_counts(scale):
+    return {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+
+
+def chunk_ranges(total, size):
+    for chunk_no, start in enumerate(range(0, total, size)):
+        yield chunk_no, np.arange(start, min(start + size, total), dtype=np.int64)
+
+
+class ChunkWriter:
+    """Appends DataFrame chunks to one CSV or Parquet file per table."""
+
+    def __init__(self, out_dir, fmt="csv"):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.rows = {}
+        self._parquet = {}
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("❌ Parquet output needs pyarrow: pip install pyarrow")
+
+    def write(self, table, df):
+        path = self.out_dir / f"{table}.{self.fmt}"
+        if self.fmt == "csv":
+            df.to_csv(path, mode="a" if table in self.rows else "w", header=table not in self.rows, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            batch = pa.Table.from_pandas(df, preserve_index=False)
+            if table not in self._parquet:
+                self._parquet[table] = pq.ParquetWriter(path, batch.schema)
+            self._parquet[table].write_table(batch)
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+
+    def close(self):
+        for writer in self._parquet.values():
+            writer.close()
+
+
+def generate_lookups(writer, seed):
+    category_index = np.arange(len(CATEGORIES))
+    writer.write("categories", pd.DataFrame({
+        "id": entity_ids("categories", category_index),
+        "name": CATEGORIES,
+        "status": "active",
+    }))
+
+    product_index = np.arange(len(PRODUCT_DEFS))
+    names, categories, prices = zip(*PRODUCT_DEFS)
+    writer.write("products", pd.DataFrame({
+        "id": entity_ids("products", product_index),
+        "name": names,
+        "name_id": entity_ids("categories", np.array([CATEGORIES.index(c) for c in categories])),
+        "status": "active",
+        "unit_price": prices,
+    }))
+
+    rng = chunk_rng(seed, "campaigns", 0)
+    campaign_index = np.arange(CAMPAIGN_COUNT)
+    writer.write("campaigns", pd.DataFrame({
+        "id": entity_ids("campaigns", campaign_index),
+        "name": [f"Campaign {i + 1}" for i in campaign_index],
+        "channel": rng.choice(CAMPAIGN_CHANNELS, CAMPAIGN_COUNT),
+        "start_date": random_dates(rng, CAMPAIGN_COUNT),
+        "status": "active",
+    }))
+    return np.array(prices)
+
+
+def generate_users(writer, seed, counts, chunk_size):
+    for chunk_no, index in chunk_ranges(counts["users"], chunk_size):
+        rng = chunk_rng(seed, "users", chunk_no)
+        first = rng.choice(FIRST_NAMES, len(index))
+        last = rng.choice(LAST_NAMES, len(index))
+        writer.write("users", pd.DataFrame({
+            "id": entity_ids("users", index),
+            "name": np.char.add(np.char.add(first, " "), last),
+            # Unique by construction, which Faker cannot guarantee without tracking every email
+            "email": np.char.add(np.char.lower(first), np.char.mod(".%d@example.com", index)),
+            "created_at": random_dates(rng, len(index)),
+            "registration_channel": rng.choice(CHANNELS, len(index)),
+            "customer_segment": rng.choice(SEGMENTS, len(index)),
+            "user_status": "active",
+            # The first group_leaders users lead groups, so leader IDs are just a prefix of the user range
+            "user_type": np.where(index < counts["group_leaders"], "group_leader", "customer"),
+        }))
+
+
+def generate_groups(writer, seed, counts, chunk_size):
+    product_count = len(PRODUCT_DEFS)
+    for chunk_no, index in chunk_ranges(counts["group_deals"], chunk_size):
+        rng = chunk_rng(seed, "group_deals", chunk_no)
+        created_at = random_dates(rng, len(index))
+        writer.write("group_deals", pd.DataFrame({
+            "id": entity_ids("group_deals", index),
+            "product_id": entity_ids("products", rng.integers(0, product_count, len(index))),
+            "max_group_member": rng.integers(3, 11, len(index)),
+            "group_price": rng.uniform(2, 15, len(index)).round(2),
+            "created_at": created_at,
+            "effective_from": created_at + pd.Timedelta(days=1),
+        }))
+
+    for chunk_no, index in chunk_ranges(counts["groups"], chunk_size):
+        rng = chunk_rng(seed, "groups", chunk_no)
+        writer.write("groups", pd.DataFrame({
+            "id": entity_ids("groups", index),
+            "group_deals_id": entity_ids("group_deals", rng.integers(0, counts["group_deals"], len(index))),
+            "created_by": entity_ids("users", rng.integers(0, counts["group_leaders"], len(index))),
+            "status": rng.choice(["completed", "open"], len(index)),
+            "created_at": random_dates(rng, len(index)),
+        }))
+
+    for chunk_no, index in chunk_ranges(counts["group_members"], chunk_size):
+        rng = chunk_rng(seed, "group_members", chunk_no)
+        writer.write("group_members", pd.DataFrame({
+            "id": entity_ids("group_members", index),
+            "group_id": entity_ids("groups", rng.integers(0, counts["groups"], len(index))),
+            "user_id": entity_ids("users", rng.integers(0, counts["users"], len(index))),
+            "joined_at": random_dates(rng, len(index)),
+        }))
+
+
+def generate_orders(writer, seed, counts, chunk_size, unit_prices):
+    item_offset = 0
+    for chunk_no, index in chunk_ranges(counts["orders"], chunk_size):
+        rng = chunk_rng(seed, "orders", chunk_no)
+        size = len(index)
+
+        # Items for the whole chunk at once; each order gets 1-4 lines
+        items_per_order = rng.integers(1, 5, size)
+        item_order = np.repeat(np.arange(size), items_per_order)
+        item_count = len(item_order)
+        products = rng.integers(0, len(unit_prices), item_count)
+        quantity = rng.integers(1, 6, item_count)
+        price = unit_prices[products]
+        totals = np.bincount(item_order, weights=price * quantity, minlength=size).round(2)
+
+        order_ids = entity_ids("orders", index)
+        writer.write("orders", pd.DataFrame({
+            "id": order_ids,
+            "groups_carts_id": np.where(rng.random(size) < GROUP_ORDER_SHARE,
+                                        entity_ids("groups", rng.integers(0, counts["groups"], size)), None),
+            "user_id": entity_ids("users", rng.integers(0, counts["users"], size)),
+            "status": "completed",
+            "total_amount": totals,
+            "order_date": random_dates(rng, size),
+            "campaign_id": entity_ids("campaigns", rng.integers(0, CAMPAIGN_COUNT, size)),
+        }))
+        writer.write("order_items", pd.DataFrame({
+            "id": entity_ids("order_items", np.arange(item_offset, item_offset + item_count, dtype=np.int64)),
+            "order_id": order_ids[item_order],
+            "product_id": entity_ids("products", products),
             "quantity": quantity,
-            "created_at": timestamp
-        })
-        order_item_id += 1
-    order_items.extend(items)
-    orders.append({
-        "id": order_id_counter,
-        "user_id": user["id"],
-        "group_leader_id": group_leader["id"],
-        "timestamp": timestamp,
-        "order_total_value": round(total_value, 2),
-        "is_first_order": is_first_order,
-        "created_at": timestamp
-    })
-    order_id_counter += 1
-log(f"✅ Created {len(orders)} orders and {len(order_items)} order items.")
-
-# Save to CSV
-log("Saving CSV files with new schema...")
-pd.DataFrame(users).to_csv(DATA_DIR / "users.csv", index=False)
-pd.DataFrame(group_leaders).to_csv(DATA_DIR / "group_leaders.csv", index=False)
-pd.DataFrame(products).to_csv(DATA_DIR / "products.csv", index=False)
-pd.DataFrame(orders).to_csv(DATA_DIR / "orders.csv", index=False)
-pd.DataFrame(order_items).to_csv(DATA_DIR / "order_items.csv", index=False)
-log("✅ CSV export complete. Files saved to backend/data/")
+            "price": price,
+        }))
+        item_offset += item_count
+
+
+def generate(out_dir=DATA_DIR, seed=42, scale=1.0, chunk_size=CHUNK_SIZE, fmt="csv"):
+    counts = scaled_counts(scale)
+    writer = ChunkWriter(out_dir, fmt)
+    start = time.perf_counter()
+    try:
+        log(f"Generating scale {scale} with seed {seed} in chunks of {chunk_size:,}...")
+        unit_prices = generate_lookups(writer, seed)
+        generate_users(writer, seed, counts, chunk_size)
+        generate_groups(writer, seed, counts, chunk_size)
+        generate_orders(writer, seed, counts, chunk_size, unit_prices)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    total = sum(writer.rows.values())
+    for table, count in writer.rows.items():
+        log(f"✅ {table}: {count:,} rows")
+    log(f"✅ {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec). Files saved to {out_dir}/")
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic ChipChip data shaped like schema.sql.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for users, groups and orders (1 = 2,200 orders)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out-dir", default=str(DATA_DIR))
+    args = parser.parse_args()
+    generate(args.out_dir, seed=args.seed, scale=args.scale, chunk_size=args.chunk_size, fmt=args.format)
+
+
+if __name__ == "__main__":
+    main()
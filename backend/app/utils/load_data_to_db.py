@@ -1,61 +1,107 @@
+import io
 import os
 import sys
+import time
 
 # Add the project root directory to the Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, project_root)
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import MetaData, create_engine, inspect, text
 from dotenv import load_dotenv
 
-# Rest of your existing code
-from app.utils.models import Base, User, GroupLeader, Product, Order, OrderItem
 # Load environment variables
 load_dotenv()
 
-# Import models
-
 # Database connection
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./test.db')
 engine = create_engine(DATABASE_URL)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-# Create a session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-session = SessionLocal()
+SCHEMA_PATH = os.path.join(project_root, "database", "schema.sql")
 
-# Data directory
+# Data directory, as written by generate_data.py
 DATA_DIR = "backend/data"
+CHUNK_SIZE = int(os.getenv("LOAD_CHUNK_SIZE", "100000"))
+
+# Parents before children so foreign keys hold while loading
+TABLE_ORDER = [
+    "users", "categories", "products", "campaigns", "group_deals",
+    "groups", "group_members", "orders", "order_items",
+]
+
+
+def create_tables():
+    if inspect(engine).has_table("users"):
+        return
+    with open(SCHEMA_PATH) as f:
+        statements = [s.strip() for s in f.read().split(";") if s.strip()]
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
 
-def load_csv_to_model(model, file_name):
+
+def read_chunks(path):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_SIZE):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=CHUNK_SIZE)
+
+
+def copy_chunk(table, df):
+    # Postgres: stream the chunk through COPY on the raw DBAPI connection
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    raw = engine.raw_connection()
     try:
-        path = os.path.join(DATA_DIR, file_name)
-        df = pd.read_csv(path)
-
-        # Convert datetime fields if present
-        for col in df.columns:
-            if "date" in col or "timestamp" in col or "created_at" in col:
-                df[col] = pd.to_datetime(df[col])
-
-        # Insert data into DB
-        records = [model(**row) for row in df.to_dict(orient="records")]
-        session.add_all(records)
-        session.commit()
-        print(f"✅ Inserted {len(records)} rows into {model.__tablename__}")
+        with raw.cursor() as cur:
+            cur.copy_expert(f"COPY {table.name} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def insert_chunk(table, df):
+    # Other backends: one executemany per chunk instead of one ORM object per row. Values are
+    # bound untyped, since reflected types differ by backend (SQLite reports UUID as NUMERIC)
+    statement = text(f"INSERT INTO {table.name} ({', '.join(df.columns)}) VALUES ({', '.join(':' + c for c in df.columns)})")
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    with engine.begin() as conn:
+        conn.execute(statement, records)
+
+
+def load_table(table, path):
+    write_chunk = copy_chunk if engine.dialect.name == "postgresql" else insert_chunk
+    start = time.perf_counter()
+    total = 0
+    try:
+        for df in read_chunks(path):
+            write_chunk(table, df)
+            total += len(df)
+        elapsed = time.perf_counter() - start
+        print(f"✅ Inserted {total} rows into {table.name} ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
     except Exception as e:
-        session.rollback()
-        print(f"❌ Error inserting data into {model.__tablename__}: {e}")
-
-# Load data
-load_csv_to_model(User, "users.csv")
-load_csv_to_model(GroupLeader, "group_leaders.csv")
-load_csv_to_model(Product, "products.csv")
-load_csv_to_model(Order, "orders.csv")
-load_csv_to_model(OrderItem, "order_items.csv")
-
-# Close the session
-session.close()
+        print(f"❌ Error inserting data into {table.name} after {total} rows: {e}")
+
+
+def main():
+    create_tables()
+    metadata = MetaData()
+    metadata.reflect(bind=engine, only=TABLE_ORDER)
+
+    for name in TABLE_ORDER:
+        for ext in ("parquet", "csv"):
+            path = os.path.join(DATA_DIR, f"{name}.{ext}")
+            if os.path.exists(path):
+                load_table(metadata.tables[name], path)
+                break
+        else:
+            print(f"⚠️ No data file for {name} in {DATA_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 import logging
+import os
+from contextvars import ContextVar
+from typing import Optional
+
+# Set per HTTP request by the request-ID middleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+IS_PRODUCTION = os.getenv("APP_ENV", "development") == "production"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO" if IS_PRODUCTION else "DEBUG")
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
 
 logger = logging.getLogger("chipchip_logger")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
 
 # Console handler
 console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
+console_handler.setLevel(LOG_LEVEL)
+console_handler.addFilter(RequestIdFilter())
 
 # Format
-formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] - %(message)s")
+formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] [%(request_id)s] - %(message)s")
 console_handler.setFormatter(formatter)
 
 # Add handler if not added already
@@ -0,0 +1,28 @@
+import math
+import threading
+from typing import Any
+
+_encoder: Any = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    # tiktoken missing or its encoding can't be downloaded
+                    _encoder = False
+    return _encoder or None
+
+
+def count_tokens(text: str) -> int:
+    encoder = get_encoder()
+    if encoder is None:
+        # Roughly four characters per token for English and SQL
+        return math.ceil(len(text) / 4)
+    return len(encoder.encode(text))
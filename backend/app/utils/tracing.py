@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import get_buffer_string
+from langchain_core.outputs import LLMResult
+
+from app.utils.logger import logger, request_id_var
+from app.utils.metrics import TOKEN_BUCKETS, metrics
+from app.utils.tokens import count_tokens
+
+# The trace of the question being answered; copied into worker threads by asyncio.to_thread
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    start: float
+    seconds: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """Spans for one question: LLM calls, tool calls, SQL statements and post-processing.
+
+    Finishing a trace writes one structured log line and feeds per-span and per-request
+    latency histograms into the metrics registry.
+    """
+
+    def __init__(self, request_id: str, session_id: str):
+        self.request_id = request_id
+        self.session_id = session_id
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+        self.attrs: Dict[str, Any] = {}
+        self.callbacks = [TracingCallbackHandler(self)]
+        self._lock = threading.Lock()
+
+    def add_span(self, kind: str, name: str, start: float, seconds: float, **attrs: Any) -> None:
+        span = Span(kind, name, round(start - self.started, 6), round(seconds, 6), attrs)
+        with self._lock:
+            self.spans.append(span)
+        metrics.observe(f"{kind}_span_seconds", seconds)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(kind, name, start, time.perf_counter() - start, **attrs)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        totals: Dict[str, float] = {}
+        for span in spans:
+            totals[span.kind] = totals.get(span.kind, 0.0) + span.seconds
+        llm_spans = [s for s in spans if s.kind == "llm"]
+        return {
+            "request_id": self.request_id,
+            "session_id": self.session_id,
+            "seconds": round(time.perf_counter() - self.started, 6),
+            **self.attrs,
+            "seconds_by_kind": {k: round(v, 6) for k, v in totals.items()},
+            "llm_calls": len(llm_spans),
+            "prompt_tokens": sum(s.attrs.get("prompt_tokens") or 0 for s in llm_spans),
+            "completion_tokens": sum(s.attrs.get("completion_tokens") or 0 for s in llm_spans),
+            "spans": [asdict(s) for s in spans],
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        summary = self.summary()
+        metrics.observe("request_seconds", summary["seconds"])
+        for kind, seconds in summary["seconds_by_kind"].items():
+            metrics.observe(f"request_{kind}_seconds", seconds)
+        tokens = summary["prompt_tokens"] + summary["completion_tokens"]
+        if tokens:
+            metrics.observe("request_tokens", tokens, buckets=TOKEN_BUCKETS)
+        metrics.incr("llm_prompt_tokens", summary["prompt_tokens"])
+        metrics.incr("llm_completion_tokens", summary["completion_tokens"])
+        logger.info(f"[TRACE] {json.dumps(summary, default=str)}")
+        return summary
+
+
+def token_usage(response: LLMResult) -> Tuple[Optional[int], Optional[int]]:
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens"), metadata.get("output_tokens")
+    return None, None
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain LLM and tool callbacks into spans on a trace."""
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self._runs: Dict[UUID, Tuple[float, str]] = {}
+        self._prompt_estimates: Dict[UUID, int] = {}
+
+    def _start(self, run_id: UUID, name: str) -> None:
+        self._runs[run_id] = (time.perf_counter(), name)
+
+    def _end(self, run_id: UUID, kind: str, **attrs: Any) -> None:
+        started = self._runs.pop(run_id, None)
+        if started is not None:
+            start, name = started
+            self.trace.add_span(kind, name, start, time.perf_counter() - start, **attrs)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, (serialized or {}).get("name") or "chat_model")
+        # Fallback for providers (and fakes) that don't report token usage
+        self._prompt_estimates[run_id] = sum(count_tokens(get_buffer_string(batch)) for batch in messages)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, (serialized or {}).get("name") or "llm")
+        self._prompt_estimates[run_id] = sum(count_tokens(prompt) for prompt in prompts)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens, completion_tokens = token_usage(response)
+        estimate = self._prompt_estimates.pop(run_id, None)
+        if prompt_tokens is None:
+            prompt_tokens = estimate
+        if completion_tokens is None and response.generations:
+            completion_tokens = sum(count_tokens(g.text) for batch in response.generations for g in batch)
+        if prompt_tokens or completion_tokens:
+            metrics.observe("llm_call_tokens", (prompt_tokens or 0) + (completion_tokens or 0), buckets=TOKEN_BUCKETS)
+        self._end(run_id, "llm", prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._prompt_estimates.pop(run_id, None)
+        self._end(run_id, "llm", error=str(error))
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, (serialized or {}).get("name") or "tool")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "tool")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, "tool", error=str(error))
+
+
+@contextmanager
+def start_trace(session_id: str) -> Iterator[Trace]:
+    trace = Trace(request_id_var.get() or uuid.uuid4().hex, session_id)
+    previous = current_trace.get()
+    current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        # Restored rather than reset: async generators may resume in a copied context
+        current_trace.set(previous)
+        trace.finish()
+
+
+@contextmanager
+def trace_span(kind: str, name: str, **attrs: Any) -> Iterator[None]:
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(kind, name, **attrs):
+        yield
+
+
+def trace_config() -> Dict[str, Any]:
+    # RunnableConfig carrying the current trace's callbacks to every nested LLM and tool run
+    trace = current_trace.get()
+    if trace is None:
+        return {}
+    return {"callbacks": trace.callbacks, "metadata": {"request_id": trace.request_id, "session_id": trace.session_id}}
@@ -0,0 +1,73 @@
+"""Nightly-report style batch: serial run_query loop vs QueryEngine.batch_query.
+
+Both runs answer the same questions (some repeated, as reports tend to) against a scripted
+LLM and a local SQLite database, each starting from an empty answer cache.
+Run from backend/:  python -m benchmarks.batch --questions 50 --concurrency 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from app.agent.fake_llm import ScriptedChatModel
+from benchmarks.local_db import create_local_db
+
+TEMPLATES = [
+    "How many orders were placed in {}?",
+    "Total revenue for {}",
+    "How many new users signed up in {}?",
+    "Top 5 products sold in {}",
+    "Group vs solo order share in {}",
+]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October"]
+
+
+def report_questions(count: int):
+    # Every fifth question repeats an earlier one, which the shared cache answers for free
+    questions = []
+    for i in range(count):
+        n = i - 1 if i % 5 == 4 else i
+        questions.append(TEMPLATES[n % len(TEMPLATES)].format(MONTHS[(n // len(TEMPLATES)) % len(MONTHS)]))
+    return questions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (seconds)")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+
+    from app.agent.answer_cache import AnswerCache
+    from app.agent.concurrency import ConcurrencyLimiter
+    from app.agent.query_engine import QueryEngine
+    from app.utils.logger import logger
+    logger.setLevel("WARNING")
+
+    questions = report_questions(args.questions)
+    llm = ScriptedChatModel(latency=args.latency)
+    engine = QueryEngine(llm=llm, limiter=ConcurrencyLimiter(max_concurrent=args.concurrency))
+    engine.warm()
+
+    print(f"{'run':>8} {'questions':>10} {'errors':>7} {'LLM calls':>10} {'seconds':>8} {'q/s':>7}")
+    for label in ("serial", "batch"):
+        engine.answer_cache = AnswerCache()
+        llm.calls = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if label == "serial":
+                results = [engine.run_query(q, session_id=f"serial-{i}") for i, q in enumerate(questions)]
+            else:
+                results = engine.batch_query(questions, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+        errors = sum("error" in r for r in results)
+        print(f"{label:>8} {len(results):>10} {errors:>7} {llm.calls:>10} {elapsed:>8.2f} {len(results) / elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
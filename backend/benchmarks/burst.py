@@ -0,0 +1,89 @@
+"""Dashboard-style bursts against POST /chat/: identical questions vs distinct ones.
+
+All requests arrive at once. Identical questions should share one agent run (LLM calls stay
+at one question's worth); distinct ones queue behind the LLM concurrency limit, and whatever
+doesn't fit in the queue gets a 503 with Retry-After instead of hitting the provider.
+Run from backend/:  python -m benchmarks.burst --requests 32 --max-concurrency 4 --max-queue 8
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from app.agent.fake_llm import ScriptedChatModel
+from benchmarks.local_db import create_local_db
+
+
+async def run_burst(app, total: int, identical: bool):
+    import httpx
+
+    latencies, statuses = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            start = time.perf_counter()
+            question = "How many orders do we have?" if identical else f"How many orders do we have? #{i}"
+            response = await client.post("/chat/", json={"question": question, "session_id": f"burst-{i}"})
+            statuses.append(response.status_code)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+
+    latencies.sort()
+    return {
+        "ok": statuses.count(200),
+        "rejected": statuses.count(503),
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=8)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+
+    from langchain_community.utilities.sql_database import SQLDatabase
+    from app import main as app_main
+    from app.agent.answer_cache import AnswerCache
+    from app.agent.concurrency import ConcurrencyLimiter
+    from app.agent.default_engine import set_query_engine
+    from app.agent.query_engine import QueryEngine
+    from app.utils.database import engine
+    from app.utils.logger import logger
+
+    logger.setLevel("ERROR")
+
+    print(f"{'burst':>10} {'requests':>9} {'LLM calls':>10} {'ok':>4} {'503':>4} {'p50 (s)':>8} {'max (s)':>8}")
+    for identical in (True, False):
+        llm = ScriptedChatModel(latency=args.latency)
+        # No answer cache: only coalescing and the limiter are in play
+        bench_engine = QueryEngine(
+            db=SQLDatabase(engine),
+            llm=llm,
+            answer_cache=AnswerCache(max_entries=0),
+            limiter=ConcurrencyLimiter(max_concurrent=args.max_concurrency, max_queue=args.max_queue),
+        )
+        bench_engine.warm()
+        set_query_engine(bench_engine)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(run_burst(app_main.app, args.requests, identical))
+        label = "identical" if identical else "distinct"
+        print(f"{label:>10} {args.requests:>9} {llm.calls:>10} {result['ok']:>4} {result['rejected']:>4} "
+              f"{result['p50']:>8.3f} {result['max']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Concurrent load test for POST /chat/ against a scripted LLM and a local SQLite database.
+
+Run from backend/:  python -m benchmarks.chat_load --requests 128 --latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from app.agent.fake_llm import ScriptedChatModel
+from benchmarks.local_db import create_local_db
+
+
+async def run_level(app, concurrency: int, total: int):
+    import httpx
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/chat/", json={
+                    # Distinct wording per request so identical in-flight questions aren't coalesced
+                    "question": f"How many orders do we have? #{i}",
+                    "session_id": f"bench-{concurrency}-{i % concurrency}",
+                })
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+
+    from langchain_community.utilities.sql_database import SQLDatabase
+    from app import main as app_main
+    from app.agent.answer_cache import AnswerCache
+    from app.agent.concurrency import ConcurrencyLimiter
+    from app.agent.default_engine import set_query_engine
+    from app.agent.query_engine import QueryEngine
+    from app.utils.database import engine
+    from app.utils.logger import logger
+
+    logger.setLevel("WARNING")
+
+    # A zero-size answer cache keeps the agent on the hot path; the limiter is sized to never queue
+    levels = [int(x) for x in args.levels.split(",")]
+    bench_engine = QueryEngine(
+        db=SQLDatabase(engine),
+        llm=ScriptedChatModel(latency=args.latency),
+        answer_cache=AnswerCache(max_entries=0),
+        limiter=ConcurrencyLimiter(max_concurrent=max(levels), max_queue=args.requests),
+    )
+    bench_engine.warm()
+    set_query_engine(bench_engine)
+
+    print(f"{'concurrency':>11} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for level in levels:
+        # The agent runs with verbose=True; keep its trace out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(run_level(app_main.app, level, args.requests))
+        print(f"{result['concurrency']:>11} {result['throughput']:>8.2f} {result['p50']:>8.3f} {result['p95']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
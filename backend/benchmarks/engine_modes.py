@@ -0,0 +1,64 @@
+"""Compare the full ReAct agent with the single-query "direct" engine mode.
+
+Reports LLM calls per question and p50/p95 latency against a scripted LLM and a local
+SQLite database. Run from backend/:  python -m benchmarks.engine_modes --questions 20
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from app.agent.fake_llm import ScriptedChatModel
+from benchmarks.local_db import create_local_db
+
+
+async def run_mode(mode: str, questions: int, latency: float):
+    from app.agent.answer_cache import AnswerCache
+    from app.agent.query_engine import QueryEngine
+
+    llm = ScriptedChatModel(latency=latency)
+    engine = QueryEngine(llm=llm, mode=mode, answer_cache=AnswerCache(max_entries=0))
+    engine.warm()
+
+    latencies = []
+    for i in range(questions):
+        start = time.perf_counter()
+        result = await engine.arun_query("How many orders do we have?", session_id=f"{mode}-{i}")
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "llm_calls": llm.calls / questions,
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (seconds)")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+
+    from app.utils.logger import logger
+    logger.setLevel("WARNING")
+
+    print(f"{'mode':>8} {'LLM calls/q':>12} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for mode in ("agent", "direct"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(run_mode(mode, args.questions, args.latency))
+        print(f"{result['mode']:>8} {result['llm_calls']:>12.1f} {result['p50']:>8.3f} {result['p95']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Golden-question accuracy and cost for each engine configuration.
+
+Every question in golden_questions.jsonl carries the SQL that answers it. That SQL runs against a
+SQLite database seeded by generate_data.py to get the expected rows; each configuration then
+answers the question and counts as correct when the rows behind its answer (the response's
+``data``) match, ignoring column order, column names and extra columns. Per configuration it
+reports accuracy, LLM calls, prompt/completion tokens and SQL executions per question, and p50/p95
+wall-clock time per question.
+
+The default LLM is an offline oracle: a scripted model that walks the agent's usual trajectory
+(schema, checker, query, answer) with each question's expected SQL, so it measures the engine's own
+calls, tokens and plumbing. To score a real model, run once with --llm openai --record run.jsonl,
+then replay it offline with --script run.jsonl; prompts missing from the recording are reported
+as unmatched and answered with "No data available.".
+
+By default the questions run against a generated SQLite database. The agent's prompt asks for
+Postgres SQL (DATE_TRUNC, EXTRACT), so score a live model against a seeded Postgres with
+--database-url. Each question's ``expected_sql`` is written for SQLite, and an
+``expected_sql_postgresql`` entry overrides it where the dialects differ. Months are compared as
+'YYYY-MM', so a DATE_TRUNC('month', ...) timestamp matches a strftime('%Y-%m', ...) string.
+Run from backend/:  python -m benchmarks.golden --configs agent direct --repeats 3
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.local_db import create_generated_db
+
+CORPUS_PATH = Path(__file__).with_name("golden_questions.jsonl")
+MONTH = re.compile(r"^\d{4}-\d{2}$")
+# The first instant of a month, as a date or timestamp normalized below
+MONTH_START = re.compile(r"^(\d{4}-\d{2})-01(?: 00:00:00)?$")
+
+# Environment each configuration is built under; caches are off so every run does the full work
+CONFIGS = {
+    "agent": {"QUERY_ENGINE_MODE": "agent"},
+    "agent-full-schema": {"QUERY_ENGINE_MODE": "agent", "SCHEMA_TOKEN_BUDGET": "0"},
+    "direct": {"QUERY_ENGINE_MODE": "direct"},
+}
+
+
+def load_corpus(path: Path, dialect: str = "sqlite"):
+    corpus = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    for item in corpus:
+        item["expected_sql"] = item.get(f"expected_sql_{dialect}", item["expected_sql"])
+    return corpus
+
+
+def oracle_rules(corpus):
+    """Scripted responses that answer each question with its expected SQL."""
+    from app.agent.fake_llm import react_action
+    from app.agent.sql_validation import referenced_tables
+
+    rules = []
+    for item in corpus:
+        question, sql = re.escape(item["question"]), item["expected_sql"]
+        rules += [
+            (rf"^\s*{re.escape(sql)}\s*Double check the", sql),
+            (rf"^Write one SQL query that answers: {question}$", sql),
+            (rf"^Question: {question}\nSQL:", "The result is {result}"),
+            (rf"^{question}(?:.*Observation:){{3}}", "Thought: I now know the final answer\nFinal Answer: {result}"),
+            (rf"^{question}(?:.*Observation:){{2}}", react_action("sql_db_query", sql)),
+            (rf"^{question}.*Observation:", react_action("sql_db_query_checker", sql)),
+            (rf"^{question}", react_action("sql_db_schema", ", ".join(sorted(referenced_tables(sql))))),
+        ]
+    return rules
+
+
+def normalize(value):
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat().replace("T", " ")
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return round(float(value), 2)
+    return str(value).strip()
+
+
+def as_month(value):
+    match = MONTH_START.match(value) if isinstance(value, str) else None
+    return match.group(1) if match else value
+
+
+def rows_match(expected_rows, data, ordered: bool) -> bool:
+    """Whether every expected column appears in ``data`` with the same rows."""
+    if not data or not data["complete"] or data["sampled"]:
+        return False
+    actual = [[normalize(v) for v in column] for column in data["values"]]
+    expected = [[normalize(row[i]) for row in expected_rows] for i in range(len(expected_rows[0]))] if expected_rows else []
+    if data["row_count"] != len(expected_rows):
+        return False
+    if not expected_rows:
+        return True
+
+    # Map each expected column to an unused result column holding the same values; a column of
+    # 'YYYY-MM' months also matches month starts, e.g. from DATE_TRUNC('month', ...)
+    months = [[as_month(v) for v in column] for column in actual]
+    mapping, matched = [], []
+    for column in expected:
+        source = months if all(isinstance(v, str) and MONTH.match(v) for v in column) else actual
+        candidates = [
+            i for i, values in enumerate(source)
+            if i not in mapping and sorted(values, key=repr) == sorted(column, key=repr)
+        ]
+        if not candidates:
+            return False
+        mapping.append(candidates[0])
+        matched.append(source[candidates[0]])
+    projected = [tuple(values[r] for values in matched) for r in range(len(expected_rows))]
+    wanted = [tuple(normalize(v) for v in row) for row in expected_rows]
+    if ordered:
+        return projected == wanted
+    return sorted(projected, key=repr) == sorted(wanted, key=repr)
+
+
+def usage():
+    from app.utils.metrics import metrics
+
+    snapshot = metrics.snapshot()
+    counters, histograms = snapshot["counters"], snapshot["histograms"]
+    return {
+        "llm_calls": histograms.get("llm_call_tokens", {}).get("count", 0),
+        "prompt_tokens": counters.get("llm_prompt_tokens", 0),
+        "completion_tokens": counters.get("llm_completion_tokens", 0),
+        # Statements on the agent's engine, plan checks included; catalog reads and sample rows go elsewhere
+        "sql": histograms.get("agent_sql_seconds", {}).get("count", 0),
+    }
+
+
+@contextlib.contextmanager
+def environment(overrides):
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def run_config(name: str, llm, corpus, expected, repeats: int):
+    from app.agent.query_engine import QueryEngine
+
+    with environment(CONFIGS[name]):
+        engine = QueryEngine(llm=llm)
+    engine.warm()
+
+    outcomes, latencies = [], []
+    totals = dict.fromkeys(usage(), 0)
+    for repeat in range(repeats):
+        for item in corpus:
+            before = usage()
+            start = time.perf_counter()
+            result = await engine.arun_query(item["question"], session_id=f"golden-{name}-{repeat}-{item['id']}")
+            latencies.append(time.perf_counter() - start)
+            after = usage()
+            for key in totals:
+                totals[key] += after[key] - before[key]
+            ordered = "ORDER BY" in item["expected_sql"].upper()
+            correct = "error" not in result and rows_match(expected[item["id"]], result.get("data"), ordered)
+            outcomes.append((item["id"], correct, result.get("error")))
+
+    runs = len(outcomes)
+    latencies.sort()
+    return {
+        "config": name,
+        "accuracy": sum(correct for _, correct, _ in outcomes) / runs,
+        **{key: value / runs for key, value in totals.items()},
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+        "failures": sorted({(qid, error) for qid, correct, error in outcomes if not correct}, key=str),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--scale", type=float, default=0.5, help="generate_data.py scale of the seeded database")
+    parser.add_argument("--database-url", help="Seeded database to run against instead of a generated SQLite file")
+    parser.add_argument("--repeats", type=int, default=3, help="Times the corpus is asked per configuration")
+    parser.add_argument("--llm", default="scripted", help="'scripted' (offline) or an LLM provider name, e.g. openai")
+    parser.add_argument("--script", help="JSONL of recorded responses to replay instead of the oracle")
+    parser.add_argument("--record", help="Append the live LLM's responses to this JSONL for later --script replays")
+    parser.add_argument("--latency", type=float, default=0.0, help="Scripted LLM latency per call (seconds)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_path = os.path.join(tempfile.gettempdir(), "chipchip_golden.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            os.environ["DATABASE_URL"] = create_generated_db(db_path, scale=args.scale)
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+    os.environ["SQL_RESULT_CACHE_BYTES"] = "0"
+    os.environ.setdefault("AGENT_VERBOSE", "false")
+    if args.record:
+        os.environ["LLM_RECORD_PATH"] = args.record
+
+    from sqlalchemy import text
+
+    from app.agent.fake_llm import ScriptedChatModel, load_script
+    from app.agent.llm_providers import create_llm
+    from app.utils.database import get_engine
+    from app.utils.logger import logger
+    logger.setLevel("WARNING")
+
+    corpus = load_corpus(args.corpus, get_engine().dialect.name)
+    with get_engine().connect() as conn:
+        expected = {item["id"]: conn.execute(text(item["expected_sql"])).all() for item in corpus}
+
+    if args.llm != "scripted":
+        llm = create_llm(args.llm)
+        source = f"live {args.llm}"
+    elif args.script:
+        recorded, rules = load_script(args.script)
+        llm = ScriptedChatModel(recorded=recorded, rules=rules, latency=args.latency)
+        source = f"replay of {args.script}"
+    else:
+        llm = ScriptedChatModel(rules=oracle_rules(corpus), latency=args.latency)
+        source = "offline oracle"
+
+    print(f"🏁 {len(corpus)} golden questions x {args.repeats}, LLM: {source}, database: {get_engine().dialect.name}")
+    print(f"{'config':>18} {'accuracy':>9} {'LLM calls':>10} {'prompt tok':>11} {'compl. tok':>11} "
+          f"{'SQL runs':>9} {'p50 (s)':>8} {'p95 (s)':>8}")
+    results = []
+    for name in args.configs:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(run_config(name, llm, corpus, expected, args.repeats))
+        results.append(result)
+        print(f"{name:>18} {result['accuracy']:>9.1%} {result['llm_calls']:>10.1f} {result['prompt_tokens']:>11.0f} "
+              f"{result['completion_tokens']:>11.0f} {result['sql']:>9.1f} {result['p50']:>8.3f} {result['p95']:>8.3f}")
+
+    for result in results:
+        for qid, error in result["failures"]:
+            print(f"❌ {result['config']}: {qid}" + (f" ({error})" if error else ""))
+    if isinstance(llm, ScriptedChatModel) and llm.unmatched:
+        print(f"⚠️ {llm.unmatched} prompts had no recorded response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+import sqlite3
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).resolve().parents[1] / "database" / "schema.sql"
+
+
+def create_local_db(path: str, orders: int = 300, seed: int = 42) -> str:
+    """Create a SQLite copy of schema.sql with a small seeded dataset and return its URL."""
+    rng = random.Random(seed)
+    Path(path).unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    # SQLAlchemy reflects SQLite's UUID columns as NUMERIC by type affinity; store them as TEXT
+    conn.executescript(SCHEMA_PATH.read_text().replace(" UUID", " TEXT"))
+
+    def uid():
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    now = datetime(2025, 1, 1)
+    users = [uid() for _ in range(50)]
+    conn.executemany(
+        "INSERT INTO users (id, name, email, registration_channel, user_status, user_type, created_at) "
+        "VALUES (?, ?, ?, 'organic', 'active', ?, ?)",
+        [(u, f"User {i}", f"user{i}@example.com", "group_leader" if i < 10 else "customer", str(now))
+         for i, u in enumerate(users)],
+    )
+    products = [(uid(), f"Product {i}", "active", round(rng.uniform(3, 25), 2)) for i in range(10)]
+    conn.executemany("INSERT INTO products (id, name, status, unit_price) VALUES (?, ?, ?, ?)", products)
+
+    order_rows, item_rows = [], []
+    for _ in range(orders):
+        order_id = uid()
+        items = [(uid(), order_id, rng.choice(products)[0], rng.randint(1, 3), round(rng.uniform(4, 20), 2))
+                 for _ in range(rng.randint(1, 4))]
+        total = round(sum(qty * price for _, _, _, qty, price in items), 2)
+        order_date = now - timedelta(days=rng.randint(0, 365))
+        order_rows.append((order_id, rng.choice(users), "completed", total, str(order_date)))
+        item_rows.extend(items)
+    conn.executemany(
+        "INSERT INTO orders (id, user_id, status, total_amount, order_date) VALUES (?, ?, ?, ?, ?)", order_rows
+    )
+    conn.executemany(
+        "INSERT INTO order_items (id, order_id, product_id, quantity, price) VALUES (?, ?, ?, ?, ?)", item_rows
+    )
+    conn.commit()
+    conn.close()
+    return f"sqlite:///{path}"
+
+
+def create_generated_db(path: str, scale: float = 1.0, seed: int = 42) -> str:
+    """Create a SQLite copy of schema.sql filled by generate_data.py at the given scale."""
+    import pandas as pd
+
+    from app.utils.generate_data import generate
+
+    Path(path).unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_PATH.read_text().replace(" UUID", " TEXT"))
+    with tempfile.TemporaryDirectory() as out_dir:
+        tables = generate(out_dir, seed=seed, scale=scale)
+        for table in tables:
+            for chunk in pd.read_csv(Path(out_dir) / f"{table}.csv", chunksize=250_000):
+                chunk.to_sql(table, conn, if_exists="append", index=False)
+    conn.commit()
+    conn.close()
+    return f"sqlite:///{path}"
@@ -0,0 +1,72 @@
+"""Catalog and sample-row queries per request with and without the table-metadata cache.
+
+Runs the agent against a scripted LLM (whose script calls sql_db_schema on every question) and a
+local SQLite database, counting every statement the database sees during the requests. The
+uncached run uses a plain SQLDatabase, which re-reads sample rows on each sql_db_schema call.
+Run from backend/:  python -m benchmarks.metadata_cache --questions 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from benchmarks.local_db import create_local_db
+
+
+async def run(engine, questions: int):
+    start = time.perf_counter()
+    for i in range(questions):
+        result = await engine.arun_query(f"How many orders do we have? #{i}", session_id=f"metadata-{i}")
+        if "error" in result:
+            raise RuntimeError(result["error"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=50)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+    os.environ["SQL_RESULT_CACHE_BYTES"] = "0"
+    os.environ.setdefault("AGENT_VERBOSE", "false")
+
+    from langchain_community.utilities.sql_database import SQLDatabase
+
+    from app.agent.fake_llm import ScriptedChatModel
+    from app.agent.query_engine import QueryEngine, create_sql_database
+    from app.utils.database import get_agent_engine, get_engine
+    from app.utils.logger import logger
+    logger.setLevel("WARNING")
+
+    statements = {"count": 0}
+
+    def count(*_):
+        statements["count"] += 1
+
+    for sa_engine in (get_engine(), get_agent_engine()):
+        event.listen(sa_engine, "before_cursor_execute", count)
+
+    print(f"{'metadata':>9} {'statements/req':>15} {'ms/req':>8}")
+    results = {}
+    for label, db in (("uncached", SQLDatabase(get_engine())), ("cached", create_sql_database())):
+        engine = QueryEngine(db=db, llm=ScriptedChatModel(latency=0))
+        engine.warm()
+        statements["count"] = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = asyncio.run(run(engine, args.questions))
+        results[label] = statements["count"] / args.questions
+        print(f"{label:>9} {results[label]:>15.1f} {elapsed / args.questions * 1000:>8.2f}")
+
+    print(f"Catalog/sample-row statements eliminated per request: {results['uncached'] - results['cached']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
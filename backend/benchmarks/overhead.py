@@ -0,0 +1,81 @@
+"""Where a /chat request spends its time when the LLM costs nothing.
+
+Serves POST /chat/ through the real app with LLM_PROVIDER=scripted and no fake latency, then
+splits the mean request time using the per-request trace histograms: HTTP (FastAPI, middleware,
+JSON), LLM calls, tools (including their SQL), SQL alone, post-processing, and the remaining
+agent/framework overhead. Run from backend/:  python -m benchmarks.overhead --requests 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.local_db import create_local_db
+
+COMPONENTS = ("llm", "tool", "sql", "post_process")
+
+
+async def run_requests(app, total: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        for i in range(total):
+            response = await client.post("/chat/", json={"question": f"How many orders do we have? #{i}", "session_id": f"overhead-{i}"})
+            response.raise_for_status()
+        return time.perf_counter() - start
+
+
+def histogram_sum(snapshot, name: str) -> float:
+    return snapshot["histograms"].get(name, {}).get("sum", 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+    os.environ["LLM_PROVIDER"] = "scripted"
+    os.environ["FAKE_LLM_LATENCY"] = "0"
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+    os.environ.setdefault("AGENT_VERBOSE", "false")
+
+    from app import main as app_main
+    from app.agent.default_engine import set_query_engine
+    from app.agent.query_engine import QueryEngine
+    from app.utils.logger import logger
+    from app.utils.metrics import metrics
+    logger.setLevel("WARNING")
+
+    header = f"{'mode':>7} {'total':>7} {'http':>7} {'llm':>7} {'tool':>7} {'sql':>7} {'post':>7} {'agent':>7}"
+    print("Mean milliseconds per request (tool includes its SQL and the query checker's LLM call; agent = the rest of the engine)")
+    print(header)
+    for mode in ("agent", "direct"):
+        engine = QueryEngine(mode=mode)
+        engine.warm()
+        set_query_engine(engine)
+
+        before = metrics.snapshot()
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = asyncio.run(run_requests(app_main.app, args.requests))
+        after = metrics.snapshot()
+
+        def mean_ms(name: str) -> float:
+            return (histogram_sum(after, name) - histogram_sum(before, name)) / args.requests * 1000
+
+        total = elapsed / args.requests * 1000
+        engine_ms = mean_ms("request_seconds")
+        parts = {kind: mean_ms(f"request_{kind}_seconds") for kind in COMPONENTS}
+        agent = engine_ms - parts["llm"] - parts["tool"] - parts["post_process"]
+        print(f"{mode:>7} {total:>7.2f} {total - engine_ms:>7.2f} {parts['llm']:>7.2f} {parts['tool']:>7.2f} "
+              f"{parts['sql']:>7.2f} {parts['post_process']:>7.2f} {agent:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Prompt tokens per request with the full schema.sql vs the token-budgeted schema context.
+
+Runs each question through the agent against a scripted LLM and a local SQLite database and
+sums the prompt tokens of every LLM call it makes (tiktoken when available, else ~4 chars/token).
+Run from backend/:  python -m benchmarks.prompt_tokens --budget 1200
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+from app.agent.fake_llm import ScriptedChatModel
+from benchmarks.local_db import create_local_db
+
+QUESTIONS = [
+    "How many orders do we have?",
+    "What is the monthly revenue trend for group orders?",
+    "Top 5 group leaders by number of members",
+    "Which campaign channel brought in the most customers?",
+    "Best selling products in each category",
+    "How many users signed up last month by registration channel?",
+]
+
+
+def prompt_tokens(engine, question: str, session_id: str):
+    from app.utils.metrics import metrics
+
+    before = metrics.snapshot()["counters"].get("llm_prompt_tokens", 0)
+    result = engine.run_query(question, session_id=session_id)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return int(metrics.snapshot()["counters"]["llm_prompt_tokens"] - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=int(os.getenv("SCHEMA_TOKEN_BUDGET", "1200")))
+    parser.add_argument("--mode", choices=("agent", "direct"), default="agent")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    os.environ["DATABASE_URL"] = create_local_db(db_path)
+
+    from app.agent.answer_cache import AnswerCache
+    from app.agent.query_engine import QueryEngine
+    from app.agent.schema_context import SchemaContextBuilder
+    from app.utils.logger import logger
+    from app.utils.tokens import count_tokens
+    logger.setLevel("WARNING")
+
+    engine = QueryEngine(llm=ScriptedChatModel(), mode=args.mode, answer_cache=AnswerCache(max_entries=0))
+    full = SchemaContextBuilder(engine.schema_text, token_budget=0)
+    budgeted = SchemaContextBuilder(engine.schema_text, token_budget=args.budget)
+
+    print(f"📏 Full schema: {count_tokens(engine.schema_text)} tokens; budget: {args.budget} tokens")
+    print(f"{'schema':>7} {'before':>8} {'after':>8} {'saved':>6}  question")
+    totals = [0, 0]
+    for i, question in enumerate(QUESTIONS):
+        counts = []
+        for label, builder in (("full", full), ("budget", budgeted)):
+            engine.schema_context = builder
+            with contextlib.redirect_stdout(io.StringIO()):
+                counts.append(prompt_tokens(engine, question, f"{label}-{i}"))
+        totals = [totals[0] + counts[0], totals[1] + counts[1]]
+        schema = count_tokens(budgeted.build(question))
+        print(f"{schema:>7} {counts[0]:>8} {counts[1]:>8} {1 - counts[1] / counts[0]:>6.0%}  {question}")
+    print(f"{'total':>7} {totals[0]:>8} {totals[1]:>8} {1 - totals[1] / totals[0]:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
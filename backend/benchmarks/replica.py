@@ -0,0 +1,174 @@
+"""Representative agent queries on the row-store primary vs the DuckDB analytics replica.
+
+For each size, synthetic users, products, groups, orders (2 items each) and group members are
+generated inside the primary with a single INSERT ... SELECT per table, the replica is synced,
+and every query is timed on both engines with a check that they return the same rows.
+By default the primary is a SQLite file standing in for Postgres. Pass --source-url with a
+Postgres URL to measure the real thing; data goes into a throwaway ``replica_bench`` schema.
+100M orders needs tens of GB of disk and a long generation step.
+Run from backend/:  python -m benchmarks.replica --orders 1000000 10000000 100000000
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.local_db import SCHEMA_PATH
+
+BENCH_SCHEMA = "replica_bench"
+
+# Agent-style SQL, in Postgres' dialect, which DuckDB runs unchanged. Only the month bucket differs on SQLite.
+QUERIES = [
+    ("monthly revenue", "SELECT {month} AS month, ROUND(SUM(total_amount), 2) FROM orders "
+                        "WHERE status = 'completed' GROUP BY 1 ORDER BY 1"),
+    ("group vs solo share", "SELECT ROUND(AVG(CASE WHEN groups_carts_id IS NOT NULL THEN 1.0 ELSE 0 END), 4) FROM orders"),
+    ("top products", "SELECT p.name, ROUND(SUM(oi.price * oi.quantity), 2) AS revenue FROM order_items oi "
+                     "JOIN products p ON p.id = oi.product_id GROUP BY p.name ORDER BY revenue DESC, p.name LIMIT 5"),
+    ("average group size", "SELECT ROUND(AVG(members), 2) FROM "
+                           "(SELECT group_id, COUNT(*) AS members FROM group_members GROUP BY group_id) AS sizes"),
+    ("top customers", "SELECT user_id, ROUND(SUM(total_amount), 2) AS spend FROM orders "
+                      "GROUP BY user_id ORDER BY spend DESC, user_id LIMIT 10"),
+]
+MONTH = {
+    "postgresql": "DATE_TRUNC('month', order_date)",
+    "sqlite": "strftime('%Y-%m-01', order_date)",
+    "duckdb": "DATE_TRUNC('month', order_date)",
+}
+
+# Dialect pieces for the generators: a 1..count sequence, ids, and timestamps minutes after 2023-01-01
+SEQUENCE = {
+    "sqlite": "(WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {count}) SELECT n FROM seq) AS seq",
+    "postgresql": "generate_series(1, {count}) AS seq(n)",
+}
+ID = {"sqlite": "('{prefix}' || ({expr}))", "postgresql": "md5('{prefix}' || ({expr}))::uuid"}
+TIMESTAMP = {
+    "sqlite": "datetime('2023-01-01', '+' || ({expr}) || ' minutes')",
+    "postgresql": "TIMESTAMP '2023-01-01' + ({expr}) * INTERVAL '1 minute'",
+}
+
+
+def generators(dialect: str, orders: int):
+    users, products, groups = max(orders // 20, 1000), 2000, max(orders // 10, 1)
+
+    def uid(prefix, expr):
+        return ID[dialect].format(prefix=prefix, expr=expr)
+
+    def ts(expr):
+        return TIMESTAMP[dialect].format(expr=expr)
+
+    return [
+        ("users", users, "id, name, email, registration_channel, user_status, user_type, created_at",
+         f"{uid('u', 'n')}, 'User ' || n, 'user' || n || '@example.com', 'organic', 'active', "
+         f"CASE WHEN n % 10 = 0 THEN 'group_leader' ELSE 'customer' END, {ts('n % 525600')}"),
+        ("products", products, "id, name, status, unit_price",
+         f"{uid('p', 'n')}, 'Product ' || n, 'active', 3 + (n % 2200) / 100.0"),
+        ("groups", groups, "id, created_by, status, created_at",
+         f"{uid('g', 'n')}, {uid('u', f'(n % {users}) + 1')}, 'completed', {ts('n % 1051200')}"),
+        ("orders", orders, "id, groups_carts_id, user_id, status, total_amount, order_date",
+         f"{uid('o', 'n')}, CASE WHEN n % 3 = 0 THEN {uid('g', f'(n % {groups}) + 1')} END, "
+         f"{uid('u', f'(n % {users}) + 1')}, CASE n % 10 WHEN 0 THEN 'cancelled' WHEN 1 THEN 'pending' ELSE 'completed' END, "
+         f"5 + (n % 9000) / 100.0, {ts('n % 1051200')}"),
+        ("order_items", orders * 2, "id, order_id, product_id, quantity, price",
+         f"{uid('i', 'n')}, {uid('o', '(n + 1) / 2')}, {uid('p', f'(n * 7 % {products}) + 1')}, 1 + n % 3, 2 + (n % 1800) / 100.0"),
+        ("group_members", groups * 3, "id, group_id, user_id, joined_at",
+         f"{uid('m', 'n')}, {uid('g', f'((n - 1) / 3) + 1')}, {uid('u', f'(n * 13 % {users}) + 1')}, {ts('n % 1051200')}"),
+    ]
+
+
+def create_primary(url: str, orders: int):
+    engine = create_engine(url)
+    dialect = engine.dialect.name
+    schema = SCHEMA_PATH.read_text()
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE; CREATE SCHEMA {BENCH_SCHEMA}")
+            conn.exec_driver_sql(f"SET search_path TO {BENCH_SCHEMA}")
+        else:
+            schema = schema.replace(" UUID", " TEXT")
+        for statement in schema.split(";"):
+            # Indexes come from schema.sql too, as they would in production
+            if statement.strip():
+                conn.exec_driver_sql(statement)
+        for table, count, columns, values in generators(dialect, orders):
+            sequence = SEQUENCE[dialect].format(count=count)
+            conn.exec_driver_sql(f"INSERT INTO {table} ({columns}) SELECT {values} FROM {sequence}")
+    if dialect == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    return engine
+
+
+def normalize(rows):
+    def value(v):
+        if isinstance(v, (date, datetime)):
+            return v.isoformat()[:10]
+        if isinstance(v, (Decimal, float)):
+            return round(float(v), 2)
+        return str(v)
+    return [tuple(value(v) for v in row) for row in rows]
+
+
+def timed(engine, sql: str, repeats: int):
+    timings, rows = [], None
+    with engine.connect() as conn:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = conn.execute(text(sql)).all()
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[1_000_000, 10_000_000, 100_000_000])
+    parser.add_argument("--source-url", help="Postgres URL to use as the primary instead of a local SQLite file")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    from app.agent.replica import AnalyticsReplica
+    from app.utils.logger import logger
+    logger.setLevel("ERROR")
+
+    workdir = Path(tempfile.mkdtemp(prefix="chipchip_replica_"))
+    print(f"{'orders':>12} {'query':<20} {'primary (ms)':>13} {'duckdb (ms)':>12} {'speedup':>8} {'match':>6}")
+    for orders in args.orders:
+        if args.source_url:
+            separator = "&" if "?" in args.source_url else "?"
+            url = f"{args.source_url}{separator}options=-csearch_path%3D{BENCH_SCHEMA}"
+        else:
+            db_path = workdir / "primary.db"
+            db_path.unlink(missing_ok=True)
+            url = f"sqlite:///{db_path}"
+
+        start = time.perf_counter()
+        primary = create_primary(url, orders)
+        generate_seconds = time.perf_counter() - start
+
+        replica = AnalyticsReplica(primary, str(workdir / "replica" / "analytics.duckdb"), SCHEMA_PATH.read_text(),
+                                   routing="all", max_lag=0)
+        start = time.perf_counter()
+        replica.sync()
+        sync_seconds = time.perf_counter() - start
+
+        for name, sql in QUERIES:
+            primary_time, primary_rows = timed(primary, sql.format(month=MONTH[primary.dialect.name]), args.repeats)
+            replica_time, replica_rows = timed(replica.engine, sql.format(month=MONTH["duckdb"]), args.repeats)
+            match = normalize(primary_rows) == normalize(replica_rows)
+            print(f"{orders:>12,} {name:<20} {primary_time * 1000:>13.1f} {replica_time * 1000:>12.1f} "
+                  f"{primary_time / max(replica_time, 1e-9):>7.1f}x {'yes' if match else 'NO':>6}")
+        print(f"{'':>12} {'(generate / sync)':<20} {generate_seconds * 1000:>13.0f} {sync_seconds * 1000:>12.0f}")
+        primary.dispose()
+        if args.source_url:
+            with create_engine(args.source_url).begin() as conn:
+                conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Agent SQL through QueryExecutor with and without the SQL result cache.
+
+Replays the raw business queries from benchmarks.rollups the way different sessions tend to
+write them (case, spacing, comments, trailing semicolons) against a generated SQLite database,
+then writes to ``orders`` and checks the affected entries are invalidated.
+Run from backend/:  python -m benchmarks.result_cache --scale 50 --rounds 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.local_db import create_generated_db
+from benchmarks.rollups import QUESTIONS
+
+
+def spellings(sql: str):
+    yield sql
+    yield sql.lower()
+    yield sql.replace(" FROM ", "\n  FROM ").replace(" GROUP BY ", "\n GROUP  BY ").replace(", ", " ,  ") + ";"
+    yield "-- generated by the agent\n" + sql.upper().replace("'START OF MONTH'", "'start of month'")
+
+
+def run(executor, workload):
+    start = time.perf_counter()
+    for sql in workload:
+        executor.execute(sql)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    from app.agent.result_cache import ResultCache
+    from app.agent.sql_executor import QueryExecutor
+    from app.utils.logger import logger
+    from app.utils.metrics import metrics
+    logger.setLevel("WARNING")
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_result_cache.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        url = create_generated_db(db_path, scale=args.scale)
+    engine = create_engine(url)
+
+    variants = [variant for _, raw_sql, _ in QUESTIONS for variant in spellings(raw_sql)]
+    workload = [random.Random(i).choice(variants) for i in range(args.rounds * len(variants))]
+
+    cache = ResultCache()
+    plain = QueryExecutor(engine)
+    cached = QueryExecutor(engine, result_cache=cache)
+    plain_seconds = run(plain, workload)
+    before = metrics.snapshot()["counters"]
+    cached_seconds = run(cached, workload)
+    after = metrics.snapshot()["counters"]
+    hits = after.get("sql_result_cache_hits", 0) - before.get("sql_result_cache_hits", 0)
+
+    print(f"{len(workload)} queries ({len(QUESTIONS)} distinct, {len(variants)} spellings), {cache.bytes:,} bytes cached")
+    print(f"{'executor':>9} {'ms/query':>9} {'hit rate':>9}")
+    print(f"{'plain':>9} {plain_seconds / len(workload) * 1000:>9.2f} {'-':>9}")
+    print(f"{'cached':>9} {cached_seconds / len(workload) * 1000:>9.2f} {hits / len(workload):>9.1%}")
+
+    # A new order must not be hidden by the cache once orders is invalidated
+    count_sql = "SELECT COUNT(*) FROM orders"
+    stale = cached.execute(count_sql).rows[0][0]
+    with engine.begin() as conn:
+        row = dict(conn.execute(text("SELECT * FROM orders LIMIT 1")).mappings().one())
+        row["id"] = f"{row['id']}-copy"
+        conn.execute(text(f"INSERT INTO orders ({', '.join(row)}) VALUES ({', '.join(':' + c for c in row)})"), row)
+    dropped = cache.invalidate(["orders"])
+    fresh = cached.execute(count_sql).rows[0][0]
+    print(f"invalidate(['orders']) dropped {dropped} entries; COUNT(*) {stale} -> {fresh}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Time common business questions against the raw fact tables and against the rollups.
+
+Builds a SQLite database per scale with generate_data.py, refreshes the rollups, then runs
+each question both ways and checks the answers agree.
+Run from backend/:  python -m benchmarks.rollups --scales 10 50 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.local_db import create_generated_db
+
+# (question, raw SQL, rollup SQL); both must return the same rows
+QUESTIONS = [
+    (
+        "monthly revenue",
+        "SELECT DATE(order_date, 'start of month') AS month, ROUND(SUM(total_amount), 2) "
+        "FROM orders GROUP BY month ORDER BY month",
+        "SELECT period_start, ROUND(revenue, 2) FROM rollup_monthly_orders ORDER BY period_start",
+    ),
+    (
+        "group vs solo share",
+        "SELECT ROUND(AVG(CASE WHEN groups_carts_id IS NOT NULL THEN 1.0 ELSE 0 END), 4) FROM orders",
+        "SELECT ROUND(SUM(group_order_count) * 1.0 / SUM(order_count), 4) FROM rollup_monthly_orders",
+    ),
+    (
+        "top products",
+        "SELECT p.name, ROUND(SUM(oi.price * oi.quantity), 2) AS revenue FROM order_items oi "
+        "JOIN products p ON p.id = oi.product_id GROUP BY p.name ORDER BY revenue DESC LIMIT 5",
+        "SELECT p.name, ROUND(SUM(r.revenue), 2) AS revenue FROM rollup_monthly_product_sales r "
+        "JOIN products p ON p.id = r.product_id GROUP BY p.name ORDER BY revenue DESC LIMIT 5",
+    ),
+    (
+        "campaign performance",
+        "SELECT c.name, COUNT(*), ROUND(SUM(o.total_amount), 2) FROM orders o "
+        "JOIN campaigns c ON c.id = o.campaign_id GROUP BY c.name ORDER BY c.name",
+        "SELECT c.name, SUM(r.order_count), ROUND(SUM(r.revenue), 2) FROM rollup_monthly_campaign_sales r "
+        "JOIN campaigns c ON c.id = r.campaign_id GROUP BY c.name ORDER BY c.name",
+    ),
+    (
+        "top group leaders",
+        "SELECT u.name, ROUND(SUM(o.total_amount), 2) AS revenue FROM orders o "
+        "JOIN groups g ON g.id = o.groups_carts_id JOIN users u ON u.id = g.created_by "
+        "GROUP BY u.id, u.name ORDER BY revenue DESC LIMIT 5",
+        "SELECT u.name, ROUND(SUM(r.revenue), 2) AS revenue FROM rollup_monthly_leader_sales r "
+        "JOIN users u ON u.id = r.leader_id GROUP BY u.id, u.name ORDER BY revenue DESC LIMIT 5",
+    ),
+]
+
+
+def timed(engine, sql, repeats):
+    timings, rows = [], None
+    with engine.connect() as conn:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = conn.execute(text(sql)).all()
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=float, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.agent.rollups import RollupManager
+    from app.utils.logger import logger
+    logger.setLevel("WARNING")
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_rollups.db")
+    print(f"{'scale':>6} {'orders':>10} {'question':<22} {'raw (ms)':>9} {'rollup (ms)':>12} {'speedup':>8} {'match':>6}")
+    for scale in args.scales:
+        with contextlib.redirect_stdout(io.StringIO()):
+            url = create_generated_db(db_path, scale=scale)
+        engine = create_engine(url)
+        manager = RollupManager(engine)
+        manager.create_tables()
+        start = time.perf_counter()
+        manager.refresh(full=True)
+        refresh_seconds = time.perf_counter() - start
+        with engine.connect() as conn:
+            orders = conn.execute(text("SELECT COUNT(*) FROM orders")).scalar()
+
+        for question, raw_sql, rollup_sql in QUESTIONS:
+            raw_time, raw_rows = timed(engine, raw_sql, args.repeats)
+            rollup_time, rollup_rows = timed(engine, rollup_sql, args.repeats)
+            match = [tuple(r) for r in raw_rows] == [tuple(r) for r in rollup_rows]
+            print(f"{scale:>6g} {orders:>10,} {question:<22} {raw_time * 1000:>9.1f} {rollup_time * 1000:>12.1f} "
+                  f"{raw_time / max(rollup_time, 1e-9):>7.1f}x {'yes' if match else 'NO':>6}")
+        print(f"{'':>6} {'':>10} {'(full rollup refresh)':<22} {refresh_seconds * 1000:>9.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
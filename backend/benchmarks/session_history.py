@@ -0,0 +1,85 @@
+"""Prompt tokens per turn over one long session: raw chat history vs compact turn records.
+
+Asks the golden questions over and over in a single session, answered by the offline oracle
+from benchmarks.golden (whose answers spell out the full query result, like a verbose model),
+and reports the prompt tokens of each turn's LLM calls. "buffer" replays every earlier
+question and answer, "window" the last 6 exchanges (the previous default) and "compact" the
+turn records that fit in SESSION_HISTORY_TOKENS.
+Run from backend/:  python -m benchmarks.session_history --turns 40 --mode agent
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+
+from benchmarks.golden import CORPUS_PATH, load_corpus, oracle_rules
+from benchmarks.local_db import create_generated_db
+
+REPORT_TURNS = (1, 5, 10, 20, 40, 80)
+
+
+def raw_store(window):
+    from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory
+
+    from app.agent.session_store import InMemorySessionStore
+
+    class RawHistoryStore(InMemorySessionStore):
+        def get_memory(self, session_id: str):
+            options = {"chat_memory": self.get_history(session_id), "memory_key": "chat_history",
+                       "input_key": "input", "output_key": "output", "return_messages": True}
+            if window:
+                return ConversationBufferWindowMemory(k=window, **options)
+            return ConversationBufferMemory(**options)
+
+    return RawHistoryStore(window_turns=10_000)
+
+
+async def run_session(engine, corpus, turns: int):
+    from app.utils.metrics import metrics
+
+    tokens = []
+    for turn in range(turns):
+        before = metrics.snapshot()["counters"].get("llm_prompt_tokens", 0)
+        result = await engine.arun_query(corpus[turn % len(corpus)]["question"], session_id="long-session")
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        tokens.append(metrics.snapshot()["counters"]["llm_prompt_tokens"] - before)
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--mode", choices=("agent", "direct"), default="agent")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_golden.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        os.environ["DATABASE_URL"] = create_generated_db(db_path, scale=0.5)
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+    os.environ.setdefault("AGENT_VERBOSE", "false")
+
+    from app.agent.fake_llm import ScriptedChatModel
+    from app.agent.query_engine import QueryEngine
+    from app.agent.session_store import create_session_store
+    from app.utils.logger import logger
+    logger.setLevel("WARNING")
+
+    corpus = load_corpus(CORPUS_PATH)
+    stores = {"buffer": raw_store(None), "window": raw_store(6), "compact": create_session_store()}
+    shown = [t for t in REPORT_TURNS if t <= args.turns]
+
+    print(f"📏 Prompt tokens per turn, {args.mode} mode, history budget {stores['compact'].history_tokens} tokens")
+    print(f"{'history':>8} " + " ".join(f"{'turn ' + str(t):>9}" for t in shown) + f" {'mean':>9}")
+    for name, store in stores.items():
+        engine = QueryEngine(llm=ScriptedChatModel(rules=oracle_rules(corpus)), mode=args.mode, session_store=store)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tokens = asyncio.run(run_session(engine, corpus, args.turns))
+        print(f"{name:>8} " + " ".join(f"{tokens[t - 1]:>9.0f}" for t in shown) + f" {statistics.mean(tokens):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cold-start cost: import time of app.main, and time until /health and /ready answer.
+
+Each run starts a fresh interpreter, so nothing is cached in-process. The server runs under
+uvicorn against a local SQLite database with the scripted LLM provider.
+Run from backend/:  python -m benchmarks.startup --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.local_db import create_local_db
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds(env) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def serve_until_ready(env, timeout: float = 60):
+    import httpx
+
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    times = {}
+    try:
+        while len(times) < 2 and time.perf_counter() - start < timeout:
+            for path in ("/health", "/ready"):
+                if path in times:
+                    continue
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1).status_code == 200:
+                        times[path] = time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    return times.get("/health"), times.get("/ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), "chipchip_bench.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": create_local_db(db_path),
+        "LLM_PROVIDER": "scripted",
+        "PYTHONPATH": os.getcwd(),
+    }
+
+    imports = [import_seconds(env) for _ in range(args.runs)]
+    served = [serve_until_ready(env) for _ in range(args.runs)]
+    health = [h for h, _ in served if h is not None]
+    ready = [r for _, r in served if r is not None]
+
+    print(f"{'stage':>22} {'median (s)':>11} {'max (s)':>8}")
+    for label, values in (("import app.main", imports), ("spawn -> /health 200", health), ("spawn -> /ready 200", ready)):
+        if values:
+            print(f"{label:>22} {statistics.median(values):>11.3f} {max(values):>8.3f}")
+        else:
+            print(f"{label:>22} {'timed out':>11}")
+
+
+if __name__ == "__main__":
+    main()
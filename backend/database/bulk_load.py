@@ -0,0 +1,86 @@
+import csv
+import io
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Sequence
+
+import psycopg2
+
+
+class BulkWriter(ABC):
+    """Appends row batches to tables and keeps per-table row counts for rows/sec reporting.
+
+    ``conn`` is a DB-API connection; subclasses open it and implement ``_write`` for one batch.
+    """
+
+    def __init__(self, conn: Any):
+        self.conn = conn
+        self.rows = defaultdict(int)
+        self.started_at = time.perf_counter()
+
+    def write(self, table: str, columns: Sequence[str], rows: Sequence[Sequence]) -> None:
+        if rows:
+            self._write(table, columns, rows)
+            self.rows[table] += len(rows)
+
+    @abstractmethod
+    def _write(self, table: str, columns: Sequence[str], rows: Sequence[Sequence]) -> None:
+        ...
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def report(self) -> None:
+        elapsed = time.perf_counter() - self.started_at
+        total = sum(self.rows.values())
+        for table, count in self.rows.items():
+            print(f"   {table:<15} {count:>12,} rows")
+        print(f"📈 {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+
+class PostgresCopyWriter(BulkWriter):
+    """Streams each batch through COPY ... FROM STDIN as CSV."""
+
+    def __init__(self, url: str):
+        super().__init__(psycopg2.connect(url))
+
+    def _write(self, table, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with self.conn.cursor() as cur:
+            cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+class SQLiteWriter(BulkWriter):
+    """Fallback for local runs: batched executemany inside one transaction."""
+
+    def __init__(self, url: str):
+        super().__init__(sqlite3.connect(url.split("sqlite:///", 1)[1]))
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA journal_mode = MEMORY")
+
+    def _write(self, table, columns, rows):
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            [tuple(str(v) if hasattr(v, "isoformat") else v for v in row) for row in rows],
+        )
+
+
+def open_writer(url: str) -> BulkWriter:
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("postgresql"):
+        return PostgresCopyWriter(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteWriter(url)
+    raise ValueError(f"Unsupported database URL for bulk loading: {url}")
@@ -1,192 +1,204 @@
-import uuid
+import argparse
+import os
 import random
+import sys
+import uuid
 from datetime import datetime, timedelta, timezone
-import psycopg2
-from dotenv import load_dotenv
-import os
 from pathlib import Path
+
+from dotenv import load_dotenv
 from faker import Faker
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bulk_load import open_writer  # noqa: E402
+
 fake = Faker()
 
-# Load DB URL
-env_path = Path(__file__).resolve().parents[2] / '.env'
-load_dotenv(dotenv_path=env_path)
-DATABASE_URL = os.getenv("DATABASE_URL").replace("postgres://", "postgresql://")
+# Row counts at scale factor 1; --scale multiplies everything but the lookup tables
+BASE_COUNTS = {
+    "users": 120,
+    "group_leaders": 20,
+    "group_deals": 30,
+    "groups": 50,
+    "group_members": 200,
+    "orders": 300,
+}
+CHUNK_SIZE = 50_000
+NAME_POOL_SIZE = 1_000
+
+SEGMENTS = ["Working Professionals", "Students", "Parents", "Seniors"]
+REG_CHANNELS = ["organic", "referral", "paid ad", "email", "influencer"]
+CATEGORY_NAMES = ["Fresh Produce", "Dairy", "Meat", "Snacks", "Bakery"]
+TABLE_CODES = {
+    "users": 1, "categories": 2, "products": 3, "campaigns": 4, "group_deals": 5,
+    "groups": 6, "group_members": 7, "orders": 8, "order_items": 9,
+}
+
 
 def uid(): return str(uuid.uuid4())
 
+
+def entity_id(table, index):
+    # Derived from the row index, so parents can be referenced without keeping ID lists in memory
+    return str(uuid.UUID(int=(TABLE_CODES[table] << 96) | index))
+
+
 def recent_date(days=730):
     return datetime.now(timezone.utc) - timedelta(days=random.randint(0, days), hours=random.randint(0, 23))
 
-def seed():
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-
-        print("🔄 Seeding data...")
-
-        # USERS
-        print("👥 Seeding 120 users...")
-        user_ids = []
-        group_leader_ids = []
-        segments = ["Working Professionals", "Students", "Parents", "Seniors"]
-        reg_channels = ["organic", "referral", "paid ad", "email", "influencer"]
-        for i in range(120):
-            is_leader = i < 20
-            name = fake.name()
-            uid_ = uid()
-            user_ids.append(uid_)
-            if is_leader:
-                group_leader_ids.append(uid_)
-
-            cur.execute("""
-                INSERT INTO users (id, name, email, registration_channel, user_status, user_type, customer_segment, created_at)
-                VALUES (%s, %s, %s, %s, 'active', %s, %s, %s)
-            """, (
-                uid_,
-                name,
-                fake.email(),
-                random.choice(reg_channels),
-                'group_leader' if is_leader else 'customer',
-                random.choice(segments),
-                recent_date()
-            ))
 
-        # CATEGORIES
-        print("📦 Seeding 5 categories...")
-        cat_names = ["Fresh Produce", "Dairy", "Meat", "Snacks", "Bakery"]
-        category_ids = {}
-        for name in cat_names:
-            cid = uid()
-            category_ids[name] = cid
-            cur.execute("INSERT INTO categories (id, name, status) VALUES (%s, %s, 'active')", (cid, name))
-
-        # PRODUCTS
-        print("🛒 Seeding 30 products...")
-        product_ids = []
-        for i in range(30):
-            name = fake.word().capitalize()
-            category = random.choice(list(category_ids.values()))
-            pid = uid()
-            product_ids.append(pid)
-            cur.execute("""
-                INSERT INTO products (id, name, name_id, status, unit_price)
-                VALUES (%s, %s, %s, 'active', %s)
-            """, (pid, name, category, round(random.uniform(3, 25), 2)))
-
-        # CAMPAIGNS
-        print("📢 Seeding 10 campaigns...")
-        campaign_ids = []
-        for i in range(10):
-            cid = uid()
-            campaign_ids.append(cid)
-            cur.execute("""
-                INSERT INTO campaigns (id, name, channel, start_date, status)
-                VALUES (%s, %s, %s, %s, 'active')
-            """, (
-                cid,
-                f"{random.choice(['Holiday', 'Promo', 'Flash'])} Campaign {i+1}",
-                random.choice(["facebook", "influencer", "email", "tiktok"]),
-                recent_date()
-            ))
+def chunks(total, size=CHUNK_SIZE):
+    for start in range(0, total, size):
+        yield min(size, total - start)
 
-        # GROUP DEALS
-        print("🤝 Seeding 30 group deals...")
-        group_deal_ids = []
-        for i in range(30):
-            gid = uid()
-            group_deal_ids.append(gid)
-            created_at = recent_date()
-            effective_from = created_at + timedelta(days=1)
-            cur.execute("""
-                INSERT INTO group_deals (id, product_id, max_group_member, group_price, created_at, effective_from)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                gid,
-                random.choice(product_ids),
-                random.randint(3, 10),
-                round(random.uniform(2, 15), 2),
-                created_at,
-                effective_from
-            ))
 
-        # GROUPS
-        print("👨‍👩‍👧‍👦 Seeding 50 groups...")
-        group_ids = []
-        for i in range(50):
-            gid = uid()
-            group_ids.append(gid)
-            cur.execute("""
-                INSERT INTO groups (id, group_deals_id, created_by, status, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                gid,
-                random.choice(group_deal_ids),
-                random.choice(group_leader_ids),
-                random.choice(['completed', 'open']),
-                recent_date()
-            ))
+def scaled_counts(scale):
+    return {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
 
-        # GROUP MEMBERS
-        print("➕ Seeding 200 group members...")
-        for _ in range(200):
-            cur.execute("""
-                INSERT INTO group_members (id, group_id, user_id, joined_at)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                uid(),
-                random.choice(group_ids),
-                random.choice(user_ids),
+
+def seed_users(writer, count, leader_count):
+    print(f"👥 Seeding {count:,} users...")
+    # Faker is slow per call, so names come from a pool and emails are made unique by index
+    names = [fake.name() for _ in range(NAME_POOL_SIZE)]
+    columns = ("id", "name", "email", "registration_channel", "user_status", "user_type", "customer_segment", "created_at")
+    index = 0
+    for size in chunks(count):
+        rows = []
+        for _ in range(size):
+            is_leader = index < leader_count
+            name = random.choice(names)
+            rows.append((
+                entity_id("users", index),
+                name,
+                f"{name.lower().replace(' ', '.')}.{index}@example.com",
+                random.choice(REG_CHANNELS),
+                "active",
+                "group_leader" if is_leader else "customer",
+                random.choice(SEGMENTS),
                 recent_date()
             ))
-
-        # ORDERS + ORDER ITEMS
-        print("📦 Seeding 300 orders and 900+ items...")
-        for _ in range(300):
+            index += 1
+        writer.write("users", columns, rows)
+
+
+def seed_catalog(writer):
+    print(f"📦 Seeding {len(CATEGORY_NAMES)} categories...")
+    category_ids = [uid() for _ in CATEGORY_NAMES]
+    writer.write("categories", ("id", "name", "status"),
+                 [(cid, name, "active") for cid, name in zip(category_ids, CATEGORY_NAMES)])
+
+    print("🛒 Seeding 30 products...")
+    products = [(uid(), fake.word().capitalize(), random.choice(category_ids), "active", round(random.uniform(3, 25), 2))
+                for _ in range(30)]
+    writer.write("products", ("id", "name", "name_id", "status", "unit_price"), products)
+
+    print("📢 Seeding 10 campaigns...")
+    campaigns = [(
+        uid(),
+        f"{random.choice(['Holiday', 'Promo', 'Flash'])} Campaign {i+1}",
+        random.choice(["facebook", "influencer", "email", "tiktok"]),
+        recent_date(),
+        "active"
+    ) for i in range(10)]
+    writer.write("campaigns", ("id", "name", "channel", "start_date", "status"), campaigns)
+    return [p[0] for p in products], [c[0] for c in campaigns]
+
+
+def random_id(table, count):
+    return entity_id(table, random.randrange(count))
+
+
+def seed_groups(writer, counts, product_ids):
+    print(f"🤝 Seeding {counts['group_deals']:,} group deals...")
+    index = 0
+    for size in chunks(counts["group_deals"]):
+        rows = []
+        for _ in range(size):
+            created_at = recent_date()
+            rows.append((entity_id("group_deals", index), random.choice(product_ids), random.randint(3, 10),
+                         round(random.uniform(2, 15), 2), created_at, created_at + timedelta(days=1)))
+            index += 1
+        writer.write("group_deals", ("id", "product_id", "max_group_member", "group_price", "created_at", "effective_from"), rows)
+
+    print(f"👨‍👩‍👧‍👦 Seeding {counts['groups']:,} groups...")
+    index = 0
+    for size in chunks(counts["groups"]):
+        rows = []
+        for _ in range(size):
+            rows.append((entity_id("groups", index), random_id("group_deals", counts["group_deals"]),
+                         random_id("users", counts["group_leaders"]),
+                         random.choice(["completed", "open"]), recent_date()))
+            index += 1
+        writer.write("groups", ("id", "group_deals_id", "created_by", "status", "created_at"), rows)
+
+    print(f"➕ Seeding {counts['group_members']:,} group members...")
+    for size in chunks(counts["group_members"]):
+        rows = [(uid(), random_id("groups", counts["groups"]), random_id("users", counts["users"]), recent_date())
+                for _ in range(size)]
+        writer.write("group_members", ("id", "group_id", "user_id", "joined_at"), rows)
+
+
+def seed_orders(writer, counts, campaign_ids, product_ids):
+    count = counts["orders"]
+    print(f"🧾 Seeding {count:,} orders and their items...")
+    order_columns = ("id", "groups_carts_id", "user_id", "status", "total_amount", "order_date", "campaign_id")
+    item_columns = ("id", "order_id", "product_id", "quantity", "price")
+    for size in chunks(count):
+        orders, items = [], []
+        for _ in range(size):
             order_id = uid()
-            user_id = random.choice(user_ids)
-            group_id = random.choice(group_ids)
-            campaign_id = random.choice(campaign_ids)
-            order_date = recent_date()
-
-            # Step 1: Insert placeholder order
-            cur.execute("""
-                INSERT INTO orders (id, groups_carts_id, user_id, status, total_amount, order_date, campaign_id)
-                VALUES (%s, %s, %s, 'completed', %s, %s, %s)
-            """, (
-                order_id, group_id, user_id, 0.0, order_date, campaign_id
-            ))
-
-            # Step 2: Insert order items
+            # Totals are summed here so orders are written once instead of inserted then updated
             total = 0
             for _ in range(random.randint(2, 5)):
-                product_id = random.choice(product_ids)
                 qty = random.randint(1, 3)
                 price = round(random.uniform(4, 20), 2)
                 total += price * qty
+                items.append((uid(), order_id, random.choice(product_ids), qty, price))
+            orders.append((order_id, random_id("groups", counts["groups"]), random_id("users", counts["users"]), "completed",
+                           round(total, 2), recent_date(), random.choice(campaign_ids)))
+        # Parents first so foreign keys hold within the chunk
+        writer.write("orders", order_columns, orders)
+        writer.write("order_items", item_columns, items)
 
-                cur.execute("""
-                    INSERT INTO order_items (id, order_id, product_id, quantity, price)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
-                    uid(), order_id, product_id, qty, price
-                ))
 
-            # Step 3: Update total_amount
-            cur.execute("""
-                UPDATE orders SET total_amount = %s WHERE id = %s
-            """, (round(total, 2), order_id))
+def seed(database_url, scale=1.0):
+    counts = scaled_counts(scale)
+    writer = open_writer(database_url)
+    try:
+        print(f"🔄 Seeding data at scale {scale}...")
+        seed_users(writer, counts["users"], counts["group_leaders"])
+        product_ids, campaign_ids = seed_catalog(writer)
+        seed_groups(writer, counts, product_ids)
+        seed_orders(writer, counts, campaign_ids, product_ids)
 
-        conn.commit()
+        writer.commit()
         print("✅ Data seeding completed successfully.")
+        writer.report()
 
     except Exception as e:
         print("❌ Error during seeding:", e)
-        conn.rollback()
+        writer.rollback()
     finally:
-        cur.close()
-        conn.close()
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the ChipChip database with synthetic data.")
+    parser.add_argument("--scale", type=float, default=float(os.getenv("SEED_SCALE", "1")),
+                        help="Multiplier for users, groups and orders (1 = 300 orders)")
+    parser.add_argument("--database-url", default=None, help="Defaults to DATABASE_URL from .env")
+    args = parser.parse_args()
+
+    # Load DB URL
+    env_path = Path(__file__).resolve().parents[2] / '.env'
+    load_dotenv(dotenv_path=env_path)
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL not found in .env")
+        return
+
+    seed(database_url, scale=args.scale)
+
 
 if __name__ == "__main__":
-    seed()
+    main()
@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+from benchmarks.local_db import create_local_db
+
+# Engines are created on first use from the environment, so it has to be in place before any test runs
+_db_dir = tempfile.mkdtemp(prefix="chipchip_tests_")
+os.environ["DATABASE_URL"] = create_local_db(os.path.join(_db_dir, "tests.db"))
+os.environ.setdefault("AGENT_VERBOSE", "false")
+os.environ.setdefault("AGENT_QUERY_LOG", "")
+os.environ.setdefault("ROLLUPS_ENABLED", "false")
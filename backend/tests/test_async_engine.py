@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from sqlalchemy import create_engine, event
+
+from app.agent.answer_cache import AnswerCache
+from app.agent.fake_llm import ScriptedChatModel
+from app.agent.query_engine import QueryEngine
+from app.agent.schema_context import SchemaContextBuilder
+from app.agent.session_store import SQLSessionStore
+
+BLOCK_SECONDS = 0.2
+
+
+class SlowEmbeddings:
+    """Stands in for a synchronous embeddings HTTP client."""
+
+    def embed_query(self, text):
+        time.sleep(BLOCK_SECONDS)
+        return [1.0, float(len(text))]
+
+    def embed_documents(self, texts):
+        time.sleep(BLOCK_SECONDS)
+        return [[1.0, float(len(t))] for t in texts]
+
+
+def slow_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def slow(*_):
+        time.sleep(BLOCK_SECONDS / 4)
+    return engine
+
+
+async def max_loop_stall(work):
+    # Ticks every 10ms; a blocking call on the loop shows up as a long gap between ticks
+    stall, done = 0.0, False
+
+    async def heartbeat():
+        nonlocal stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    ticker = asyncio.create_task(heartbeat())
+    try:
+        await work()
+    finally:
+        done = True
+        await ticker
+    return stall
+
+
+def test_async_paths_do_not_block_the_loop_with_sql_store_and_embeddings(tmp_path):
+    store = SQLSessionStore(slow_engine(create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")))
+    embeddings = SlowEmbeddings()
+
+    def watermark():
+        time.sleep(BLOCK_SECONDS)
+        return "2025-01-01"
+
+    for mode in ("agent", "direct"):
+        engine = QueryEngine(
+            llm=ScriptedChatModel(),
+            mode=mode,
+            session_store=store,
+            answer_cache=AnswerCache(embeddings=embeddings, watermark_fn=watermark),
+        )
+        engine.schema_context = SchemaContextBuilder(engine.schema_text, embeddings=embeddings)
+        engine.warm()
+
+        async def work():
+            # Fresh answer, cached answer, a follow-up with history, coalesced followers, then streaming
+            question = f"How many orders do we have in {mode} mode?"
+            assert "error" not in await engine.arun_query(question, f"{mode}-a")
+            assert (await engine.arun_query(question, f"{mode}-b"))["cached"]
+            assert "error" not in await engine.arun_query("And last month?", f"{mode}-a")
+            await asyncio.gather(*(engine.arun_query("Orders by channel?", f"{mode}-c{i}") for i in range(3)))
+            events = [e async for e in engine.astream_query("Orders by status?", f"{mode}-d")]
+            assert events[-1]["event"] == "answer"
+
+        start = time.perf_counter()
+        stall = asyncio.run(max_loop_stall(work))
+        assert time.perf_counter() - start > 4 * BLOCK_SECONDS
+        assert stall < BLOCK_SECONDS / 2, f"event loop blocked for {stall:.3f}s in {mode} mode"
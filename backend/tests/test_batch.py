@@ -0,0 +1,20 @@
+from app.agent.answer_cache import AnswerCache
+from app.agent.fake_llm import ScriptedChatModel
+from app.agent.query_engine import QueryEngine
+from app.agent.session_store import InMemorySessionStore
+
+
+def test_batch_questions_leave_the_session_store_alone():
+    store = InMemorySessionStore(max_sessions=2)
+    engine = QueryEngine(
+        llm=ScriptedChatModel(), mode="direct", session_store=store, answer_cache=AnswerCache(max_entries=8)
+    )
+    assert "error" not in engine.run_query("How many orders do we have?", "live-user")
+
+    # Fresh answers, answers from the cache and coalesced duplicates alike
+    questions = ["How many orders do we have?"] + [f"How many orders in week {i}?" for i in range(4)] * 2
+    results = engine.batch_query(questions, concurrency=4)
+
+    assert all("error" not in item for item in results)
+    assert len(store) == 1
+    assert store.has_history("live-user")
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from benchmarks.golden import CORPUS_PATH, load_corpus, rows_match
+
+
+def columnar(*columns, rows):
+    return {"values": [list(c) for c in columns], "row_count": rows, "complete": True, "sampled": False}
+
+
+def test_month_starts_match_month_strings():
+    expected = [("2024-01", 10.0), ("2024-02", 12.5)]
+    # DATE_TRUNC('month', order_date) on Postgres
+    truncated = columnar([datetime(2024, 1, 1), datetime(2024, 2, 1)], [10, 12.5], rows=2)
+    assert rows_match(expected, truncated, ordered=True)
+
+    days = columnar([datetime(2024, 1, 2), datetime(2024, 2, 1)], [10, 12.5], rows=2)
+    assert not rows_match(expected, days, ordered=True)
+
+
+def test_corpus_picks_the_dialects_expected_sql():
+    sqlite = {item["id"]: item["expected_sql"] for item in load_corpus(CORPUS_PATH)}
+    postgres = {item["id"]: item["expected_sql"] for item in load_corpus(CORPUS_PATH, "postgresql")}
+    assert "strftime" in sqlite["monthly_revenue"]
+    assert "strftime" not in " ".join(postgres.values())
+    assert sqlite["repeat_customers"] == postgres["repeat_customers"]
@@ -0,0 +1,34 @@
+import time
+
+from sqlalchemy import create_engine
+
+from app.agent.name_resolver import NameResolver
+
+USER_ID = "00000001-0000-0000-0000-000000000001"
+
+
+def users_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'names.db'}")
+    with engine.begin() as conn:
+        for table in ("users", "products", "categories", "campaigns"):
+            conn.exec_driver_sql(f"CREATE TABLE {table} (id TEXT PRIMARY KEY, name TEXT)")
+        conn.exec_driver_sql("CREATE TABLE groups (id TEXT PRIMARY KEY, created_by TEXT)")
+    return engine
+
+
+def test_unknown_ids_and_renames_are_looked_up_again(tmp_path):
+    engine = users_engine(tmp_path)
+    resolver = NameResolver(engine, ttl_seconds=0.2, miss_ttl_seconds=0.05)
+    assert resolver.resolve(f"Top buyer: {USER_ID}") == f"Top buyer: {USER_ID}"
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO users VALUES ('{USER_ID}', 'Almaz')")
+    time.sleep(0.06)
+    assert resolver.resolve(f"Top buyer: {USER_ID}") == "Top buyer: Almaz"
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"UPDATE users SET name = 'Almaz Bekele' WHERE id = '{USER_ID}'")
+    # Still within the name TTL, so the cached name is served
+    assert resolver.resolve(USER_ID) == "Almaz"
+    time.sleep(0.2)
+    assert resolver.resolve(USER_ID) == "Almaz Bekele"
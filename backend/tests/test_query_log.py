@@ -0,0 +1,50 @@
+import threading
+
+from sqlalchemy import create_engine
+
+from app.agent.query_log import QueryLog, create_query_log, read_query_log
+from app.utils.metrics import metrics
+
+
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE orders (id INTEGER PRIMARY KEY, status TEXT)")
+    return engine
+
+
+def test_logging_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("AGENT_QUERY_LOG", raising=False)
+    assert create_query_log(sqlite_engine(tmp_path)) is None
+
+
+def test_full_queue_drops_entries(tmp_path):
+    release = threading.Event()
+
+    class SlowExplainLog(QueryLog):
+        def explain_plan(self, sql):
+            release.wait()
+            return super().explain_plan(sql)
+
+    log = SlowExplainLog(sqlite_engine(tmp_path), str(tmp_path / "queries.jsonl"), max_pending=2)
+    dropped = metrics.snapshot()["counters"].get("query_log_dropped", 0)
+    for _ in range(10):
+        log.record("SELECT * FROM orders", 0.01, rows=0)
+    release.set()
+    log.flush()
+
+    entries = list(read_query_log(str(tmp_path / "queries.jsonl")))
+    # One entry is being explained while two wait; everything after that is dropped
+    assert len(entries) <= 3
+    assert metrics.snapshot()["counters"]["query_log_dropped"] - dropped == 10 - len(entries)
+
+
+def test_replica_queries_are_not_explained(tmp_path):
+    log = QueryLog(sqlite_engine(tmp_path), str(tmp_path / "queries.jsonl"))
+    log.record("SELECT * FROM orders", 0.01, rows=0)
+    log.record("SELECT * FROM orders WHERE status = 'completed'", 0.01, rows=0, replica=True)
+    log.flush()
+
+    primary, replica = read_query_log(str(tmp_path / "queries.jsonl"))
+    assert primary["plan"] and not primary["replica"]
+    assert "plan" not in replica and replica["replica"]
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.agent import default_engine, query_engine
+
+
+class FakeRollups:
+    def __init__(self):
+        self.started = threading.Event()
+
+    async def refresh_forever(self, interval):
+        self.started.set()
+        await asyncio.sleep(3600)
+
+
+class FlakyQueryEngine:
+    """Fails to build until the database "comes up", like Postgres still booting under compose."""
+
+    database_up = False
+    rollups = FakeRollups()
+    replica = None
+
+    def __init__(self):
+        if not FlakyQueryEngine.database_up:
+            raise ConnectionError("could not connect to server")
+
+    def warm(self):
+        pass
+
+    def ping(self):
+        pass
+
+
+@pytest.fixture
+def flaky_engine(monkeypatch):
+    FlakyQueryEngine.database_up = False
+    FlakyQueryEngine.rollups = FakeRollups()
+    monkeypatch.setattr(query_engine, "QueryEngine", FlakyQueryEngine)
+    default_engine.set_query_engine(None)
+    yield FlakyQueryEngine
+    default_engine.set_query_engine(None)
+
+
+def wait_for(client, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/ready")
+        if response.json()["status"] == status or time.monotonic() > deadline:
+            return response
+        time.sleep(0.02)
+
+
+def test_ready_once_warm_up_retry_succeeds(flaky_engine, monkeypatch):
+    monkeypatch.setattr(main, "STARTUP_RETRY_SECONDS", 0.05)
+    with TestClient(main.app) as client:
+        response = wait_for(client, "retrying")
+        assert response.status_code == 503
+        assert "could not connect" in response.json()["error"]
+
+        flaky_engine.database_up = True
+        assert wait_for(client, "ready").status_code == 200
+        assert flaky_engine.rollups.started.wait(5)
+
+
+def test_engine_built_by_a_request_makes_the_app_ready(flaky_engine, monkeypatch):
+    # The warm-up has failed once and is backing off for a long time
+    monkeypatch.setattr(main, "STARTUP_RETRY_SECONDS", 3600)
+    with TestClient(main.app) as client:
+        assert wait_for(client, "retrying").status_code == 503
+
+        flaky_engine.database_up = True
+        # What a chat route's Depends(get_query_engine) does on its first request
+        default_engine.get_query_engine()
+        assert client.get("/ready").status_code == 200
+        assert flaky_engine.rollups.started.wait(5)
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.agent.replica import AnalyticsReplica, sql_literal
+
+duckdb = pytest.importorskip("duckdb")
+
+SCHEMA = "CREATE TABLE orders (\n    id INTEGER PRIMARY KEY,\n    status VARCHAR(20)\n);\n"
+
+
+@pytest.fixture
+def source(tmp_path):
+    # A quote in the path must not break out of the ATTACH literal
+    path = tmp_path / "o'reilly.db"
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE orders (id INTEGER PRIMARY KEY, status VARCHAR(20))")
+        conn.exec_driver_sql("INSERT INTO orders VALUES (1, 'completed'), (2, 'cancelled')")
+    return engine
+
+
+def test_sql_literal_escapes_quotes():
+    assert sql_literal("postgresql://u:it's@h/db") == "'postgresql://u:it''s@h/db'"
+
+
+def test_sync_keeps_files_of_other_workers(tmp_path, source):
+    replica_dir = tmp_path / "replica"
+    replica_dir.mkdir()
+    # os.getppid() is a running process standing in for another worker on the same path
+    other = replica_dir / f"analytics.{os.getppid()}.1.duckdb"
+    duckdb.connect(str(other)).close()
+
+    replica = AnalyticsReplica(source, str(replica_dir / "analytics.duckdb"), SCHEMA, routing="all", max_lag=0)
+    replica.sync()
+    first = replica._engine.url.database
+    replica.sync()
+
+    with replica.route("SELECT COUNT(*) FROM orders").connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM orders")).scalar() == 2
+    assert other.exists()
+    assert not os.path.exists(first)
+    assert len(list(replica_dir.glob(f"analytics.{os.getpid()}.*.duckdb"))) == 1
+
+
+def test_resume_removes_files_of_exited_workers(tmp_path, source):
+    replica_dir = tmp_path / "replica"
+    replica_dir.mkdir()
+    AnalyticsReplica(source, str(replica_dir / "analytics.duckdb"), SCHEMA).sync()
+    newest = next(replica_dir.glob("*.duckdb"))
+    # No process runs with a pid this large, so these were left behind by a worker that exited
+    stale = [replica_dir / "analytics.999999999.1.duckdb", replica_dir / "analytics.999999999.2.duckdb.building"]
+    for path in stale:
+        path.touch()
+    os.utime(stale[0], (0, 0))
+
+    replica = AnalyticsReplica(source, str(replica_dir / "analytics.duckdb"), SCHEMA)
+    assert replica.tables == {"orders"}
+    assert newest.exists()
+    assert not any(path.exists() for path in stale)
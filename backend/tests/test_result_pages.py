@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.agent.sql_executor import QueryExecutor
+
+
+@pytest.fixture
+def executor(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE numbers (n INTEGER, label TEXT)")
+        conn.exec_driver_sql(
+            "INSERT INTO numbers (n, label) VALUES " + ", ".join(f"({i}, 'n--{i};')" for i in range(1, 26))
+        )
+    return QueryExecutor(engine, max_rows=10)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT n, label FROM numbers ORDER BY n;",
+    "SELECT n, label FROM numbers ORDER BY n ;  \n",
+    "SELECT n, label FROM numbers ORDER BY n -- every row",
+    "SELECT n, label FROM numbers /* all of them */ ORDER BY n; -- done",
+])
+def test_pages_of_sql_with_trailing_semicolon_or_comment(executor, sql):
+    result = executor.execute(sql)
+    assert result.truncated and result.handle
+
+    first = executor.fetch_page(result.handle, page=1, page_size=20)
+    second = executor.fetch_page(result.handle, page=2, page_size=20)
+    assert [row[0] for row in first["rows"]] == list(range(1, 21))
+    assert first["has_more"]
+    assert [row[0] for row in second["rows"]] == list(range(21, 26))
+    assert not second["has_more"]
+    # "--" and ";" inside string literals are data, not comments
+    assert second["rows"][-1][1] == "n--25;"
@@ -0,0 +1,96 @@
+import asyncio
+import contextlib
+
+from sqlalchemy import create_engine, text
+
+from app.agent.rollups import RollupManager
+
+
+def orders_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE groups (id TEXT PRIMARY KEY, created_by TEXT)")
+        conn.exec_driver_sql("CREATE TABLE products (id TEXT PRIMARY KEY, name_id TEXT)")
+        conn.exec_driver_sql(
+            "CREATE TABLE orders (id TEXT PRIMARY KEY, groups_carts_id TEXT, user_id TEXT, status TEXT, "
+            "total_amount NUMERIC, order_date TIMESTAMP, campaign_id TEXT)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE order_items (id TEXT PRIMARY KEY, order_id TEXT, product_id TEXT, quantity INTEGER, price NUMERIC)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO orders VALUES "
+            "('o1', NULL, 'u1', 'completed', 10, '2024-03-02 10:00:00', 'c1'), "
+            "('o2', NULL, 'u2', 'cancelled', 20, '2024-03-05 10:00:00', 'c1'), "
+            "('o3', NULL, 'u1', 'pending', 40, '2024-03-09 10:00:00', 'c1')"
+        )
+    return engine
+
+
+def test_rollups_split_revenue_by_status(tmp_path):
+    manager = RollupManager(orders_engine(tmp_path))
+    manager.create_tables()
+    manager.refresh()
+
+    with manager.engine.connect() as conn:
+        completed = conn.execute(text(
+            "SELECT SUM(revenue) FROM rollup_monthly_orders WHERE status = 'completed'"
+        )).scalar()
+        by_status = dict(conn.execute(text("SELECT status, revenue FROM rollup_monthly_campaign_sales")).all())
+    assert completed == 10
+    assert by_status == {"completed": 10, "cancelled": 20, "pending": 40}
+
+
+def test_tables_from_an_older_definition_are_rebuilt(tmp_path):
+    manager = RollupManager(orders_engine(tmp_path))
+    with manager.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE rollup_monthly_orders (period_start DATE, order_count INTEGER, revenue NUMERIC)")
+        conn.exec_driver_sql(
+            "CREATE TABLE rollup_state (table_name VARCHAR(255) PRIMARY KEY, watermark TIMESTAMP, refreshed_at TIMESTAMP)"
+        )
+        # Up to date as far as the old table knew, so only a cleared watermark makes it rebuild
+        conn.exec_driver_sql("INSERT INTO rollup_state VALUES ('rollup_monthly_orders', '2024-03-09 10:00:00', '2024-03-10')")
+    manager.create_tables()
+    manager.refresh()
+
+    with manager.engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(order_count) FROM rollup_monthly_orders")).scalar() == 3
+
+
+def monthly_status(manager, month):
+    with manager.engine.connect() as conn:
+        return dict(conn.execute(text(
+            "SELECT status, revenue FROM rollup_monthly_orders WHERE period_start = :month"
+        ), {"month": month}).all())
+
+
+def test_recent_status_changes_are_picked_up_without_new_orders(tmp_path):
+    manager = RollupManager(orders_engine(tmp_path))
+    manager.create_tables()
+    manager.refresh()
+    with manager.engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE orders SET status = 'completed' WHERE id = 'o3'")
+    manager.refresh()
+
+    assert monthly_status(manager, "2024-03-01") == {"completed": 50, "cancelled": 20}
+
+
+def test_refresh_loop_rebuilds_older_periods_in_full(tmp_path):
+    manager = RollupManager(orders_engine(tmp_path), lookback_days=30, full_interval=0.2)
+    with manager.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO orders VALUES ('o0', NULL, 'u3', 'pending', 7, '2024-01-15 10:00:00', 'c1')")
+    manager.create_tables()
+    manager.refresh()
+    with manager.engine.begin() as conn:
+        # A January order completes long after the lookback window, once a June order has been placed
+        conn.exec_driver_sql("UPDATE orders SET status = 'completed' WHERE id = 'o0'")
+        conn.exec_driver_sql("INSERT INTO orders VALUES ('o4', NULL, 'u3', 'pending', 5, '2024-06-01 10:00:00', 'c1')")
+    manager.refresh()
+    assert monthly_status(manager, "2024-01-01") == {"pending": 7}
+
+    async def run_loop():
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(manager.refresh_forever(0.05), timeout=0.5)
+
+    asyncio.run(run_loop())
+    assert monthly_status(manager, "2024-01-01") == {"completed": 7}
@@ -0,0 +1,40 @@
+from langchain_community.chat_message_histories import ChatMessageHistory
+
+from app.agent.turn_memory import CompactTurnMemory, TurnRecord, prompt_tokens
+
+
+def memory_with(records, **options):
+    history = ChatMessageHistory()
+    for record in records:
+        history.add_messages(record.to_messages())
+    return CompactTurnMemory(chat_memory=history, return_messages=True, **options)
+
+
+def test_latest_turn_over_budget_is_cut_to_fit():
+    long = " ".join(f"word{i}" for i in range(400))
+    record = TurnRecord(
+        question=f"Which customers {long}?",
+        answer=f"They are {long}.",
+        sql=f"SELECT name FROM users WHERE note = '{long}'",
+        result=f"400 rows (name): {long}",
+    )
+    memory = memory_with([record], token_budget=120)
+
+    messages = memory.load_memory_variables({})["chat_history"]
+    question, answer = (str(m.content) for m in messages)
+    assert prompt_tokens(messages) <= 120
+    assert question.startswith("Which customers") and question.endswith(" ...")
+    assert "SQL: SELECT name FROM users" in answer and "Result: 400 rows" in answer
+
+
+def test_earlier_turns_keep_question_and_sql():
+    records = [
+        TurnRecord(f"Revenue in month {month}?", f"Revenue was {month}00.", f"SELECT {month}", f"1 rows (revenue): {month}00")
+        for month in range(1, 4)
+    ]
+    messages = memory_with(records).load_memory_variables({})["chat_history"]
+
+    assert [str(m.content) for m in messages[-2:]] == [
+        "Revenue in month 3?", "Revenue was 300.\nSQL: SELECT 3\nResult: 1 rows (revenue): 300",
+    ]
+    assert [str(m.content) for m in messages[:2]] == ["Revenue in month 1?", "SQL: SELECT 1"]